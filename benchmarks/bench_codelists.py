@@ -0,0 +1,100 @@
+"""Benchmarks for loading the Codelists for every supported version of the Standard.
+
+Run from the root of the repository with::
+
+    python -m benchmarks.bench_codelists
+
+Codelists created with `iati.Codelist(name, xml=...)` are compared with those read in columnar form by `iati.codelists.parse_codelist()`.
+
+Checking a column of values against a Codelist one value at a time is then compared with the batch checks that use the index of the Codelist.
+
+"""
+import gc
+import random
+import timeit
+import tracemalloc
+import iati.codelists
+import iati.default
+import iati.resources
+import iati.utilities
+import iati.version
+
+
+REPEAT = 5
+"""The number of times to time each approach."""
+
+BATCH_CODELISTS = ['Country', 'Currency', 'Sector']
+"""The Codelists to check a column of values against."""
+
+BATCH_SIZE = 1000000
+"""The number of values within the column checked against each Codelist."""
+
+
+def codelist_paths():
+    """List the paths of the Codelists for every supported version of the Standard."""
+    return [path for version in iati.version.STANDARD_VERSIONS_SUPPORTED for path in iati.resources.get_codelist_paths(version)]
+
+
+def parse_codelists(paths):
+    """Load Codelists in columnar form, without creating their Codes."""
+    return [iati.codelists.parse_codelist(iati.utilities.load_as_bytes(path)) for path in paths]
+
+
+def load_codelists_from_str(paths):
+    """Load Codelists by creating each from its XML string."""
+    return [iati.Codelist('', xml=iati.utilities.load_as_string(path)) for path in paths]
+
+
+def batch_values(codelist):
+    """Return a column of values to check against a Codelist, of which roughly one in ten is not on the Codelist."""
+    valid_values = sorted(code.value for code in codelist.codes)
+    random.seed(0)
+
+    return [random.choice(valid_values) if random.random() < 0.9 else 'not a value' for _ in range(BATCH_SIZE)]
+
+
+def traced_size(func, paths):
+    """Return the number of bytes allocated by a function that are still held once it has returned the result."""
+    gc.collect()
+    tracemalloc.start()
+    result = func(paths)  # pylint: disable=unused-variable
+    gc.collect()
+    traced_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return traced_bytes
+
+
+def main():
+    """Run the benchmarks."""
+    paths = codelist_paths()
+    print('{0} Codelists for {1} versions'.format(len(paths), len(iati.version.STANDARD_VERSIONS_SUPPORTED)))
+
+    for description, func in [('Codelist(name, xml=...)', load_codelists_from_str), ('parse_codelist()', parse_codelists)]:
+        elapsed = min(timeit.repeat(lambda: func(paths), number=1, repeat=REPEAT))  # pylint: disable=cell-var-from-loop
+        print('{0}'.format(description))
+        print('    {0:.3f}s, {1:.1f}MB held'.format(elapsed, traced_size(func, paths) / 2 ** 20))
+
+    codelists = parse_codelists(paths)
+    elapsed = timeit.timeit(lambda: [len(codelist.codes) for codelist in codelists], number=1)
+    print('creating Codes for the columnar Codelists on first access: {0:.3f}s'.format(elapsed))
+
+    for name in BATCH_CODELISTS:
+        codelist = iati.default.codelist(name, '2.03')
+        values = batch_values(codelist)
+        print('checking {0} values against {1}'.format(len(values), name))
+
+        elapsed = timeit.timeit(lambda: [value for value in values if value not in codelist.codes], number=1)  # pylint: disable=cell-var-from-loop
+        print('    `value not in codes`: {0:.3f}s'.format(elapsed))
+        elapsed = min(timeit.repeat(lambda: codelist.invalid_values(values), number=1, repeat=REPEAT))  # pylint: disable=cell-var-from-loop
+        print('    invalid_values():     {0:.3f}s'.format(elapsed))
+
+        try:
+            elapsed = min(timeit.repeat(lambda: codelist.isin(values), number=1, repeat=REPEAT))  # pylint: disable=cell-var-from-loop
+            print('    isin():               {0:.3f}s'.format(elapsed))
+        except ImportError:
+            print('    isin():               NumPy is not installed')
+
+
+if __name__ == '__main__':
+    main()
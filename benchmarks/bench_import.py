@@ -0,0 +1,87 @@
+"""Benchmarks for the time taken to import pyIATI, with a budget to catch regressions.
+
+Run from the root of the repository with::
+
+    python -m benchmarks.bench_import
+
+Each import is timed in a new interpreter using `-X importtime`. The process exits with a non-zero status when the median time exceeds its budget.
+
+"""
+import statistics
+import subprocess
+import sys
+
+
+IMPORTS = [
+    ('import iati', 50),
+    ('import iati; iati.Dataset; iati.ActivitySchema; iati.Ruleset', 250)
+]
+"""Statements to time, along with the budget for each in milliseconds. The budgets leave room for slower machines."""
+
+HEAVY_MODULES = ['chardet', 'jsonschema', 'pkg_resources', 'yaml']
+"""Dependencies that are slow to import, so must not be imported by `import iati`."""
+
+REPEAT = 5
+"""The number of times to time each statement."""
+
+
+def import_time(statement):
+    """Time the imports performed by a statement in a new interpreter.
+
+    Args:
+        statement (str): The Python statement to run.
+
+    Returns:
+        float: The cumulative time reported by `-X importtime` for the top-level modules imported, in milliseconds.
+
+    """
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement], stderr=subprocess.PIPE, check=True).stderr.decode('utf-8')
+
+    total_us = 0
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, module_name = line[len('import time:'):].split('|')
+        # nested imports are indented, and are included in the cumulative time of the module that imported them
+        if not module_name[1:].startswith(' '):
+            total_us += int(cumulative_us)
+
+    return total_us / 1000
+
+
+def imported_heavy_modules(statement):
+    """List the slow dependencies that a statement imports.
+
+    Args:
+        statement (str): The Python statement to run.
+
+    Returns:
+        list of str: The modules within `HEAVY_MODULES` that are imported.
+
+    """
+    check = '{0}; import sys; print(" ".join(name for name in {1!r} if name in sys.modules))'.format(statement, HEAVY_MODULES)
+
+    return subprocess.run([sys.executable, '-c', check], stdout=subprocess.PIPE, check=True).stdout.decode('utf-8').split()
+
+
+def main():
+    """Run the benchmarks."""
+    over_budget = False
+
+    for statement, budget_ms in IMPORTS:
+        median_ms = statistics.median(import_time(statement) for _ in range(REPEAT))
+        within_budget = median_ms <= budget_ms
+        over_budget = over_budget or not within_budget
+
+        print('{0}'.format(statement))
+        print('    {0:.1f}ms median of {1} runs, budget {2}ms{3}'.format(median_ms, REPEAT, budget_ms, '' if within_budget else ' - OVER BUDGET'))
+
+    heavy_modules = imported_heavy_modules('import iati')
+    print('heavy dependencies imported by `import iati`: {0}'.format(', '.join(heavy_modules) or 'none'))
+
+    if over_budget or heavy_modules:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
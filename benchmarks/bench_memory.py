@@ -0,0 +1,66 @@
+"""Benchmarks for the memory used by the default data cached within `iati.default`.
+
+Run from the root of the repository with::
+
+    python -m benchmarks.bench_memory
+
+"""
+import gc
+import resource
+import sys
+import timeit
+import tracemalloc
+import iati.default
+import iati.version
+
+
+def instance_size(obj):
+    """Return the size in bytes of an object, including its attribute dictionary when it has one."""
+    size = sys.getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def load_default_data():
+    """Fully load the Codelists, Rulesets and Schemas for each supported version of the Standard.
+
+    Returns:
+        list of iati.Ruleset: The Standard Ruleset for each version. Rulesets are not cached by `iati.default`, so are returned to keep them in memory.
+
+    """
+    rulesets = list()
+    for version in iati.version.STANDARD_VERSIONS_SUPPORTED:
+        iati.default._codelists(version, use_cache=True)  # pylint: disable=protected-access
+        iati.default.activity_schema(version)
+        iati.default.organisation_schema(version)
+        rulesets.append(iati.default.ruleset(version))
+
+    return rulesets
+
+
+def main():
+    """Run the benchmarks."""
+    gc.collect()
+    tracemalloc.start()
+    start = timeit.default_timer()
+
+    rulesets = load_default_data()
+
+    elapsed = timeit.default_timer() - start
+    gc.collect()
+    traced_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    codes = [code for key in iati.default._CODELISTS for code in iati.default._CODELISTS[key].codes]  # pylint: disable=protected-access
+    rules = [rule for ruleset in rulesets for rule in ruleset.rules]
+
+    print('default data for {0} versions, loaded in {1:.3f}s'.format(len(iati.version.STANDARD_VERSIONS_SUPPORTED), elapsed))
+    print('    traced:   {0:.1f}MB'.format(traced_bytes / 2 ** 20))
+    print('    resident: {0:.1f}MB peak'.format(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 10))
+    print('    {0} cached Codes, {1} bytes each'.format(len(codes), instance_size(codes[0])))
+    print('    {0} Rules, {1} bytes each'.format(len(rules), max(instance_size(rule) for rule in rules)))
+
+
+if __name__ == '__main__':
+    main()
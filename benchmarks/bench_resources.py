@@ -0,0 +1,36 @@
+"""Benchmarks for locating and loading default data once it has been cached.
+
+Run from the root of the repository with::
+
+    python -m benchmarks.bench_resources
+
+"""
+import timeit
+import iati.default
+import iati.resources
+
+
+VERSION = '2.03'
+"""The version of the Standard to locate resources for."""
+
+
+def time_per_call(func, number=100):
+    """Return the mean time taken by a function over the fastest of several runs."""
+    return min(timeit.repeat(func, number=number, repeat=3)) / number
+
+
+def main():
+    """Run the benchmarks."""
+    # warm the caches, so that only the overhead of locating the cached data is measured
+    iati.default.codelists(VERSION)
+    iati.default.codelist('Country', VERSION)
+
+    print('warm default data at version {0}'.format(VERSION))
+    print('    get_codelist_paths(): {0:.3f}ms'.format(time_per_call(lambda: iati.resources.get_codelist_paths(VERSION)) * 1000))
+    print('    get_ruleset_paths():  {0:.3f}ms'.format(time_per_call(lambda: iati.resources.get_ruleset_paths(VERSION)) * 1000))
+    print('    codelists():          {0:.3f}ms'.format(time_per_call(lambda: iati.default.codelists(VERSION), number=10) * 1000))
+    print('    codelist():           {0:.3f}ms'.format(time_per_call(lambda: iati.default.codelist('Country', VERSION)) * 1000))
+
+
+if __name__ == '__main__':
+    main()
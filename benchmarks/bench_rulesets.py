@@ -0,0 +1,143 @@
+"""Benchmarks for checking Datasets against Rules and Rulesets.
+
+Run from the root of the repository with::
+
+    python -m benchmarks.bench_rulesets [number_of_activities]
+
+"""
+import decimal
+import re
+import sys
+import timeit
+from lxml import etree
+import iati
+import iati.default
+import iati.xslt
+
+
+NUM_ACTIVITIES = 100000
+"""The default number of activities in the generated Dataset."""
+
+IDENTIFIER_REGEX = r'[^\/\&\|\?]+'
+"""The regex that the Standard Ruleset uses to check identifiers."""
+
+
+def generate_activities(num_activities):
+    """Generate a Dataset containing the specified number of minimal activities.
+
+    Args:
+        num_activities (int): The number of `iati-activity` elements to generate.
+
+    Returns:
+        iati.Dataset: A Dataset containing the generated activities.
+
+    """
+    root = etree.Element('iati-activities', version='2.03')
+    for idx in range(num_activities):
+        activity = etree.SubElement(root, 'iati-activity')
+        etree.SubElement(activity, 'reporting-org', ref='AA-AAA-123456789')
+        etree.SubElement(activity, 'iati-identifier').text = 'AA-AAA-123456789-{0}'.format(idx)
+        etree.SubElement(activity, 'participating-org', ref='AA-AAA-123456789', role='1')
+        etree.SubElement(activity, 'recipient-country', code='AF', percentage='50')
+        etree.SubElement(activity, 'recipient-country', code='AG', percentage='25')
+        etree.SubElement(activity, 'recipient-region', code='89', percentage='25')
+
+    return iati.Dataset(root)
+
+
+def time_function(func, repeat=3):
+    """Return the fastest time taken to run a function."""
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def bench_identifier_regex(dataset):
+    """Compare per-element and batched checking of the Standard Ruleset identifier regex."""
+    rule = iati.RuleRegexMatches('//iati-activity', {'regex': IDENTIFIER_REGEX, 'paths': ['reporting-org/@ref', 'iati-identifier', 'participating-org/@ref']})
+    context_elements = rule._find_context_elements(dataset)  # pylint: disable=protected-access
+
+    def per_element():
+        """Check each context element in turn, compiling the regex each time."""
+        for context_element in context_elements:
+            pattern = re.compile(rule.regex)
+            for path in rule.paths:
+                for string_to_check in rule._extract_text_from_element_or_attribute(context_element, path):  # pylint: disable=protected-access
+                    if not pattern.search(string_to_check):
+                        return False
+        return True
+
+    def batched():
+        """Check all context elements in one go."""
+        return rule._check_batch_against_Rule(context_elements)  # pylint: disable=protected-access
+
+    print('regex_matches on {0} activities'.format(len(context_elements)))
+    print('    per-element: {0:.3f}s'.format(time_function(per_element)))
+    print('    batched:     {0:.3f}s'.format(time_function(batched)))
+    print('    is_valid_for: {0:.3f}s'.format(time_function(lambda: rule.is_valid_for(dataset))))
+
+
+def bench_aggregate_rules(dataset):
+    """Compare summing values in Python with the native XPath aggregation used by Rules that count or sum values."""
+    paths = ['recipient-country/@percentage', 'recipient-region/@percentage']
+    rules = [
+        iati.RuleSum('//iati-activity', {'paths': paths, 'sum': 100}),
+        iati.RuleNoMoreThanOne('//iati-activity', {'paths': ['iati-identifier']}),
+        iati.RuleAtLeastOne('//iati-activity', {'paths': ['iati-identifier']})
+    ]
+    context_elements = rules[0]._find_context_elements(dataset)  # pylint: disable=protected-access
+
+    def sum_in_python():
+        """Sum the values within each context element using `decimal.Decimal`."""
+        for context_element in context_elements:
+            values = [decimal.Decimal(value) for path in paths for value in context_element.xpath(path)]
+            if sum(values) != 100:
+                return False
+        return True
+
+    print('sum on {0} activities'.format(len(context_elements)))
+    print('    python:       {0:.3f}s'.format(time_function(sum_in_python)))
+    for rule in rules:
+        print('    {0}: {1:.3f}s'.format(rule.name, time_function(lambda: rule.is_valid_for(dataset))))  # pylint: disable=cell-var-from-loop
+
+
+def bench_conditional_rules(dataset):
+    """Compare evaluating Rule conditions against each context element in turn with evaluating each distinct condition once for a Ruleset."""
+    condition = 'count(recipient-region) > 1'
+    ruleset = iati.Ruleset()
+    ruleset.rules = {
+        iati.RuleAtLeastOne('//iati-activity', {'paths': [path], 'condition': condition})
+        for path in ['iati-identifier', 'reporting-org', 'participating-org', 'recipient-country', 'recipient-region']
+    }
+    context_elements = dataset.xml_tree.xpath('//iati-activity')
+
+    def per_element():
+        """Evaluate the condition of each Rule against each context element."""
+        return [[context_element.xpath(rule.condition) for context_element in context_elements] for rule in ruleset.rules]
+
+    print('{0} conditional rules on {1} activities'.format(len(ruleset.rules), len(context_elements)))
+    print('    per-element conditions: {0:.3f}s'.format(time_function(per_element)))
+    print('    ruleset results:        {0:.3f}s'.format(time_function(lambda: ruleset.results_for(dataset))))
+
+
+def bench_compiled_ruleset(dataset):
+    """Compare checking each Rule in the Standard Ruleset in Python with applying the Ruleset compiled to XSLT."""
+    ruleset = iati.default.ruleset('2.03')
+    compiled_ruleset = iati.xslt.CompiledRuleset(ruleset)
+
+    print('standard ruleset on {0} activities'.format(len(dataset.xml_tree.getroot())))
+    print('    python:   {0:.3f}s'.format(time_function(lambda: ruleset.results_for(dataset))))
+    print('    compiled: {0:.3f}s'.format(time_function(lambda: compiled_ruleset.results_for(dataset))))
+
+
+def main():
+    """Run the benchmarks."""
+    num_activities = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_ACTIVITIES
+    dataset = generate_activities(num_activities)
+
+    bench_identifier_regex(dataset)
+    bench_aggregate_rules(dataset)
+    bench_conditional_rules(dataset)
+    bench_compiled_ruleset(dataset)
+
+
+if __name__ == '__main__':
+    main()
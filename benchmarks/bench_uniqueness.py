@@ -0,0 +1,75 @@
+"""Benchmarks for checking that identifiers are unique across many files.
+
+Run from the root of the repository with::
+
+    python -m benchmarks.bench_uniqueness [number_of_files] [activities_per_file]
+
+"""
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+import iati.uniqueness
+
+
+NUM_FILES = 100
+"""The default number of files to generate."""
+
+ACTIVITIES_PER_FILE = 10000
+"""The default number of activities in each generated file."""
+
+
+def write_activity_files(directory, num_files, activities_per_file):
+    """Write files of minimal activities, where the first activity in each file reuses an identifier from the previous file.
+
+    Args:
+        directory (str): The directory to write the files to.
+        num_files (int): The number of files to write.
+        activities_per_file (int): The number of `iati-activity` elements in each file.
+
+    Returns:
+        list of str: The paths to the written files.
+
+    """
+    file_paths = list()
+    for file_idx in range(num_files):
+        file_path = os.path.join(directory, 'activities-{0}.xml'.format(file_idx))
+        with open(file_path, 'w') as xml_file:
+            xml_file.write('<iati-activities version="2.03">\n')
+            for activity_idx in range(activities_per_file):
+                identifier_idx = file_idx * activities_per_file + activity_idx - (activity_idx == 0)
+                xml_file.write('<iati-activity><iati-identifier>AA-AAA-123456789-{0}</iati-identifier></iati-activity>\n'.format(identifier_idx))
+            xml_file.write('</iati-activities>\n')
+        file_paths.append(file_path)
+
+    return file_paths
+
+
+def main():
+    """Run the benchmarks."""
+    num_files = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_FILES
+    activities_per_file = int(sys.argv[2]) if len(sys.argv) > 2 else ACTIVITIES_PER_FILE
+    rule = iati.RuleUnique('//iati-activity', {'paths': ['iati-identifier']})
+
+    directory = tempfile.mkdtemp()
+    try:
+        file_paths = write_activity_files(directory, num_files, activities_per_file)
+
+        with iati.uniqueness.UniquenessIndex(rule) as index:
+            start = timeit.default_timer()
+            for file_path in file_paths:
+                index.add_file(file_path)
+            indexed = timeit.default_timer()
+            num_collisions = sum(1 for _ in index.collisions())
+            finished = timeit.default_timer()
+
+            print('unique identifiers across {0} files of {1} activities'.format(num_files, activities_per_file))
+            print('    index:      {0:.3f}s ({1} values, {2:.1f}MB on disk)'.format(indexed - start, len(index), os.path.getsize(index.path) / 2 ** 20))
+            print('    collisions: {0:.3f}s ({1} repeated values)'.format(finished - indexed, num_collisions))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
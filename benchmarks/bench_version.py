@@ -0,0 +1,61 @@
+"""Benchmarks for normalising the version of the Standard that is passed to functions.
+
+Run from the root of the repository with::
+
+    python -m benchmarks.bench_version
+
+Applying `decimalise_integer`, `normalise_decimals` and `allow_fully_supported_version` in turn is compared with applying the fused `normalise_fully_supported_version` decorator.
+
+The time taken to repeatedly access default resources, where most time used to be spent normalising the version, is then reported.
+
+"""
+import timeit
+import iati.default
+import iati.version
+
+
+NUMBER = 10000
+"""The number of calls to time for each approach."""
+
+REPEAT = 5
+"""The number of times to time each approach."""
+
+VERSION_INPUTS = ['2.03', '2', 2, iati.Version('2.2.0')]
+"""Representations of a version of the Standard that functions may be called with."""
+
+
+@iati.version.decimalise_integer
+@iati.version.normalise_decimals
+@iati.version.allow_fully_supported_version
+def stacked(version):
+    """Return the version, normalised and checked by the individual decorators."""
+    return version
+
+
+@iati.version.normalise_fully_supported_version
+def fused(version):
+    """Return the version, normalised and checked by the fused decorator."""
+    return version
+
+
+def time_per_call(func):
+    """Return the shortest time taken for a single call to a function, in microseconds."""
+    return min(timeit.repeat(func, number=NUMBER, repeat=REPEAT)) / NUMBER * 10 ** 6
+
+
+def main():
+    """Run the benchmarks."""
+    for version in VERSION_INPUTS:
+        print('normalising {0}'.format(repr(version)))
+
+        for description, func in [('individual decorators', stacked), ('fused decorator', fused)]:
+            print('    {0}: {1:.2f}us'.format(description, time_per_call(lambda: func(version))))  # pylint: disable=cell-var-from-loop
+
+    iati.default.codelist('Country', '2.03')
+    iati.default.codelist_mapping('2.03')
+    print('warm iati.default.codelist(): {0:.2f}us'.format(time_per_call(lambda: iati.default.codelist('Country', '2.03'))))
+    print('warm iati.default.codelist_mapping(): {0:.2f}us'.format(time_per_call(lambda: iati.default.codelist_mapping('2.03'))))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,81 @@
-"""A top-level namespace package for IATI."""
-from .version import Version  # noqa: F401
-from .codelists import Code, Codelist  # noqa: F401
-from .data import Dataset  # noqa: F401
-from .rulesets import Rule, Ruleset  # noqa: F401
-from .rulesets import RuleAtLeastOne, RuleDateOrder, RuleDependent, RuleNoMoreThanOne, RuleRegexMatches, RuleRegexNoMatches, RuleStartsWith, RuleSum, RuleUnique  # noqa: F401
-from .schemas import ActivitySchema, OrganisationSchema  # noqa: F401
-
-__import__('pkg_resources').declare_namespace(__name__)
+"""A top-level namespace package for IATI.
+
+The public classes are imported from their modules when first accessed, so that `import iati` does not import modules and dependencies until they are needed.
+Submodules are likewise imported when first accessed as attributes of the package, so `iati.default` may be used after `import iati`.
+
+"""
+import importlib
+import pkgutil
+import sys
+
+
+_LAZY_ATTRIBUTES = {
+    'Version': 'iati.version',
+    'Code': 'iati.codelists',
+    'Codelist': 'iati.codelists',
+    'Dataset': 'iati.data',
+    'Rule': 'iati.rulesets',
+    'Ruleset': 'iati.rulesets',
+    'RuleAtLeastOne': 'iati.rulesets',
+    'RuleDateOrder': 'iati.rulesets',
+    'RuleDependent': 'iati.rulesets',
+    'RuleNoMoreThanOne': 'iati.rulesets',
+    'RuleRegexMatches': 'iati.rulesets',
+    'RuleRegexNoMatches': 'iati.rulesets',
+    'RuleStartsWith': 'iati.rulesets',
+    'RuleSum': 'iati.rulesets',
+    'RuleUnique': 'iati.rulesets',
+    'ActivitySchema': 'iati.schemas',
+    'OrganisationSchema': 'iati.schemas'
+}
+"""The module that each public class is imported from when first accessed."""
+
+_LAZY_SUBMODULES = frozenset([
+    'bundle', 'cache', 'codelists', 'constants', 'data', 'default', 'exceptions', 'logs', 'resources',
+    'rulesets', 'schemas', 'typeindex', 'uniqueness', 'utilities', 'validator', 'version', 'xslt'
+])
+"""The submodules that are imported when first accessed as attributes of the package."""
+
+__all__ = sorted(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name):
+    """Import a public class or submodule when first accessed.
+
+    Args:
+        name (str): The name of the attribute being accessed.
+
+    Returns:
+        type or module: The public class or submodule with the given name.
+
+    Raises:
+        AttributeError: When there is no public class or submodule with the given name.
+
+    """
+    if name in _LAZY_SUBMODULES:
+        # importing a submodule also sets it as an attribute of the package
+        return importlib.import_module('{0}.{1}'.format(__name__, name))
+
+    try:
+        module_name = _LAZY_ATTRIBUTES[name]
+    except KeyError:
+        raise AttributeError('module {0!r} has no attribute {1!r}'.format(__name__, name))
+
+    value = getattr(importlib.import_module(module_name), name)
+    # later accesses find the class directly, rather than through this function
+    globals()[name] = value
+
+    return value
+
+
+def __dir__():
+    """List the attributes of the package, including public classes and submodules that have not yet been imported."""
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES) | _LAZY_SUBMODULES)
+
+
+if sys.version_info < (3, 7):
+    # module-level `__getattr__` is not supported before Python 3.7, so the public classes and submodules are imported immediately
+    for _name in sorted(_LAZY_ATTRIBUTES) + sorted(_LAZY_SUBMODULES):
+        __getattr__(_name)
+
+__path__ = pkgutil.extend_path(__path__, __name__)  # pylint: disable=used-before-assignment
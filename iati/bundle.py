@@ -0,0 +1,374 @@
+"""A module containing functionality to pack resources into a single bundle file, and to read resources from it.
+
+Installing and opening thousands of small resource files is slow on some filesystems, such as container overlay filesystems and network mounts.
+A bundle holds every resource needed at runtime in one file, which is memory-mapped and read without opening each resource.
+
+A bundle is used when one exists at the path named by the `IATI_RESOURCE_BUNDLE` environment variable. Where this is not set, a `resources.bundle` file within the `iati` package is used if it exists.
+Setting `IATI_RESOURCE_BUNDLE` to an empty string disables bundles. Resources that are not within the bundle are read from loose files, so development does not require a bundle to be built.
+
+Resources keep the same file system paths whether or not they are read from a bundle, so paths from `iati.resources` may be passed to `iati.utilities.load_as_*` in either case.
+
+A bundle can be built at the default location from the root of the repository with::
+
+    make bundle
+
+The format of a bundle is:
+
+* A header containing `BUNDLE_MAGIC`, the format version, and the length of the index.
+* The index. This is a JSON list of `[name, offset, stored_length, compressed]` entries, sorted by name. Names are paths relative to the `iati` package, separated by `/`. Offsets are relative to the end of the index.
+* The content of each resource, compressed with zlib where `compressed` is true. Resources with identical content share a single copy.
+
+"""
+import argparse
+import bisect
+import functools
+import json
+import mmap
+import os
+import struct
+import urllib.parse
+import zlib
+from io import BytesIO
+from lxml import etree
+
+
+BUNDLE_ENV_VAR = 'IATI_RESOURCE_BUNDLE'
+"""The name of the environment variable that specifies the bundle to read resources from."""
+
+BUNDLE_FOLDERS = ('resources/standard', 'resources/lib_data')
+"""The folders, relative to the `iati` package, whose resources are packed into a bundle by default."""
+
+BUNDLE_MAGIC = b'PYIATIRB'
+"""The bytes that start every bundle."""
+
+_BUNDLE_FORMAT = 1
+"""The version of the bundle format. This should be incremented whenever the format changes."""
+
+_HEADER = struct.Struct('<8sHQ')
+"""The layout of the header at the start of a bundle: the magic bytes, the format version, and the length of the index in bytes."""
+
+_PACKAGE_PATH = os.path.dirname(__file__)
+"""The file system path of the `iati` package, which resource names are relative to."""
+
+DEFAULT_BUNDLE_PATH = os.path.join(_PACKAGE_PATH, 'resources.bundle')
+"""The path of the bundle that is used when `IATI_RESOURCE_BUNDLE` is not set."""
+
+
+class Bundle:
+    """A bundle of resources, memory-mapped from a single file.
+
+    Attributes:
+        path (str): The path of the bundle file.
+
+    """
+
+    def __init__(self, path):
+        """Open a Bundle.
+
+        Args:
+            path (str): The path of the bundle file.
+
+        Raises:
+            OSError: When the bundle file cannot be read.
+            ValueError: When the file is not a bundle, or is a bundle of an unsupported format.
+
+        """
+        self.path = path
+
+        with open(path, 'rb') as bundle_file:
+            self._mmap = mmap.mmap(bundle_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, bundle_format, index_length = _HEADER.unpack_from(self._mmap, 0)
+        except struct.error:
+            raise ValueError('The file at {0} is too short to be a bundle.'.format(path))
+        if magic != BUNDLE_MAGIC:
+            raise ValueError('The file at {0} is not a bundle.'.format(path))
+        if bundle_format != _BUNDLE_FORMAT:
+            raise ValueError('The bundle at {0} has format {1}, but only format {2} is supported.'.format(path, bundle_format, _BUNDLE_FORMAT))
+
+        index = json.loads(self._mmap[_HEADER.size:_HEADER.size + index_length].decode('utf-8'))
+        self._names = [name for name, _, _, _ in index]
+        self._entries = [(offset, stored_length, compressed) for _, offset, stored_length, compressed in index]
+        self._data_offset = _HEADER.size + index_length
+
+    def __contains__(self, name):
+        """Check whether the bundle contains a resource with the given name."""
+        return self._locate(name) is not None
+
+    def names(self):
+        """List the resources within the bundle.
+
+        Returns:
+            list of str: The names of the resources, in sorted order.
+
+        """
+        return list(self._names)
+
+    def read(self, name):
+        """Read a resource from the bundle.
+
+        Args:
+            name (str): The name of the resource, relative to the `iati` package and separated by `/`.
+
+        Returns:
+            bytes: The content of the resource.
+
+        Raises:
+            KeyError: When the bundle does not contain the resource.
+
+        """
+        idx = self._locate(name)
+        if idx is None:
+            raise KeyError(name)
+
+        offset, stored_length, compressed = self._entries[idx]
+        start = self._data_offset + offset
+        data = self._mmap[start:start + stored_length]
+
+        return zlib.decompress(data) if compressed else data
+
+    def _locate(self, name):
+        """Locate the position of a resource within the sorted index.
+
+        Returns:
+            int or None: The position of the resource. `None` when the bundle does not contain the resource.
+
+        """
+        idx = bisect.bisect_left(self._names, name)
+        if idx < len(self._names) and self._names[idx] == name:
+            return idx
+        return None
+
+
+def build(path, folders=BUNDLE_FOLDERS, compress=False, source_path=_PACKAGE_PATH):
+    """Pack resources into a bundle file.
+
+    Args:
+        path (str): The path to write the bundle to.
+        folders (iterable of str): The folders to pack, relative to `source_path` and separated by `/`.
+        compress (bool): Whether to compress each resource. Resources are only stored compressed when this makes them smaller.
+        source_path (str): The folder that resource names are relative to. Defaults to the `iati` package.
+
+    Returns:
+        int: The number of resources packed.
+
+    Note:
+        The bundle is written to a temporary file that is then moved into place, so that processes reading an existing bundle never see a partially written one.
+
+    """
+    contents = dict()
+    for folder in folders:
+        for folder_path, _, file_names in os.walk(os.path.join(source_path, *folder.split('/'))):
+            for file_name in file_names:
+                file_path = os.path.join(folder_path, file_name)
+                if os.path.isfile(file_path):
+                    with open(file_path, 'rb') as resource_file:
+                        contents[_name_for_relative_path(os.path.relpath(file_path, source_path))] = resource_file.read()
+
+    index = list()
+    members = list()
+    stored_entries = dict()
+    offset = 0
+    for name in sorted(contents):
+        data = contents[name]
+        # resources with identical content, such as Codelists that are unchanged between versions, are only stored once
+        if data not in stored_entries:
+            compressed_data = zlib.compress(data, 9) if compress else data
+            is_compressed = len(compressed_data) < len(data)
+            stored_data = compressed_data if is_compressed else data
+
+            stored_entries[data] = [offset, len(stored_data), is_compressed]
+            members.append(stored_data)
+            offset += len(stored_data)
+
+        index.append([name] + stored_entries[data])
+
+    index_bytes = json.dumps(index, separators=(',', ':')).encode('utf-8')
+
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'wb') as bundle_file:
+        bundle_file.write(_HEADER.pack(BUNDLE_MAGIC, _BUNDLE_FORMAT, len(index_bytes)))
+        bundle_file.write(index_bytes)
+        for stored_data in members:
+            bundle_file.write(stored_data)
+    os.replace(temporary_path, path)
+
+    return len(index)
+
+
+class BundleResolver(etree.Resolver):
+    """A resolver that reads documents referenced while parsing, such as included schemas, from the current bundle.
+
+    Documents that are not within the current bundle are resolved by lxml as normal.
+
+    """
+
+    def resolve(self, url, pubid, context):  # pylint: disable=unused-argument
+        """Resolve a document from the current bundle.
+
+        Args:
+            url (str): The URL or file system path of the referenced document.
+            pubid (str): The public identifier of the referenced document. Unused.
+            context (object): The lxml context that the document is resolved within.
+
+        Returns:
+            object or None: The resolved document. `None` when the document is not within the current bundle.
+
+        """
+        path = url[len('file://'):] if url.startswith('file://') else url
+        data = read_resource(urllib.parse.unquote(path))
+        if data is None:
+            return None
+
+        return self.resolve_string(data, context, base_url=url)
+
+
+def bundle_path():
+    """Locate the bundle that resources should be read from.
+
+    Returns:
+        str or None: The path to the bundle. `None` when no bundle is to be used.
+
+    """
+    try:
+        return os.environ[BUNDLE_ENV_VAR] or None
+    except KeyError:
+        pass
+
+    return DEFAULT_BUNDLE_PATH if _default_bundle_exists() else None
+
+
+def current_bundle():
+    """Open the bundle that resources should be read from.
+
+    Returns:
+        iati.bundle.Bundle or None: The bundle. `None` when no bundle is to be used, or the bundle cannot be opened.
+
+    """
+    path = bundle_path()
+    if path is None:
+        return None
+
+    return _open_bundle(path)
+
+
+def name_for_path(path):
+    """Determine the name that a resource at a given file system path has within a bundle.
+
+    Args:
+        path (str): The file system path of the resource.
+
+    Returns:
+        str or None: The name of the resource. `None` when the path is not within the `iati` package.
+
+    """
+    if not path.startswith(_PACKAGE_PATH + os.sep):
+        return None
+
+    return _name_for_relative_path(path[len(_PACKAGE_PATH) + 1:])
+
+
+def path_for_name(name):
+    """Determine the file system path of a resource with a given name within a bundle.
+
+    Args:
+        name (str): The name of the resource.
+
+    Returns:
+        str: The file system path that the resource has when it is a loose file.
+
+    """
+    return os.path.join(_PACKAGE_PATH, *name.split('/'))
+
+
+def parse_resource(path):
+    """Parse an XML resource from the current bundle.
+
+    Args:
+        path (str): The file system path of the resource.
+
+    Returns:
+        etree._ElementTree or None: The parsed XML. Documents that it references, such as included schemas, are also read from the bundle. `None` when there is no bundle, or the bundle does not contain the resource.
+
+    Raises:
+        lxml.etree.XMLSyntaxError: When the resource does not contain valid XML.
+
+    """
+    data = read_resource(path)
+    if data is None:
+        return None
+
+    parser = etree.XMLParser()
+    parser.resolvers.add(BundleResolver())
+
+    return etree.parse(BytesIO(data), parser, base_url=path)
+
+
+def read_resource(path):
+    """Read a resource from the current bundle.
+
+    Args:
+        path (str): The file system path of the resource.
+
+    Returns:
+        bytes or None: The content of the resource. `None` when there is no bundle, or the bundle does not contain the resource.
+
+    """
+    current = current_bundle()
+    if current is None:
+        return None
+
+    name = name_for_path(path)
+    if name is None:
+        return None
+
+    try:
+        return current.read(name)
+    except KeyError:
+        return None
+
+
+@functools.lru_cache(maxsize=1)
+def _default_bundle_exists():
+    """Determine whether there is a bundle at the default location.
+
+    Returns:
+        bool: Whether there is a bundle at `DEFAULT_BUNDLE_PATH`. This is checked once per process.
+
+    """
+    return os.path.isfile(DEFAULT_BUNDLE_PATH)
+
+
+def _name_for_relative_path(relative_path):
+    """Convert a path relative to the `iati` package into the name of a resource within a bundle."""
+    return '/'.join(relative_path.split(os.sep))
+
+
+@functools.lru_cache(maxsize=8)
+def _open_bundle(path):
+    """Open a bundle, once per process for each path.
+
+    Returns:
+        iati.bundle.Bundle or None: The bundle. `None` when the bundle cannot be opened.
+
+    """
+    try:
+        return Bundle(path)
+    except (OSError, ValueError):
+        return None
+
+
+def main(args=None):
+    """Build a bundle from the command line.
+
+    Args:
+        args (list of str): The command line arguments. Defaults to those the process was started with.
+
+    """
+    arg_parser = argparse.ArgumentParser(description='Pack the resources needed by pyIATI at runtime into a single bundle file.')
+    arg_parser.add_argument('path', nargs='?', default=DEFAULT_BUNDLE_PATH, help='The path to write the bundle to.')
+    arg_parser.add_argument('--compress', action='store_true', help='Compress each resource within the bundle.')
+    parsed_args = arg_parser.parse_args(args)
+
+    print('Packed {0} resources into {1}'.format(build(parsed_args.path, compress=parsed_args.compress), parsed_args.path))
@@ -0,0 +1,432 @@
+"""A module containing caches that avoid rebuilding resources.
+
+`LRUCache` is a bounded in-memory cache, used to hold default data within `iati.default`.
+
+The remaining functionality stores precompiled forms of resources on disk, so that each new process does not need to rebuild them.
+The on-disk cache is stored in the directory named by the `IATI_CACHE_DIR` environment variable. Where this is not set, a `pyiati` directory within the user cache directory is used. Setting `IATI_CACHE_DIR` to an empty string disables the cache.
+
+Entries are identified by a key derived from the content they were built from, along with the versions of pyIATI and Python that built them.
+An entry is therefore never found once the content it was built from changes, so no explicit invalidation is needed.
+
+Warning:
+    Entries may be loaded using `pickle`. The cache directory must only be writable by trusted users.
+
+"""
+import collections
+import functools
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+import threading
+from lxml import etree
+import iati.utilities
+
+
+CACHE_DIR_ENV_VAR = 'IATI_CACHE_DIR'
+"""The name of the environment variable that specifies the cache directory."""
+
+
+def approximate_size(obj):
+    """Approximate the memory used by an object, including the objects that it refers to.
+
+    Args:
+        obj (object): The object to measure.
+
+    Returns:
+        int: The approximate size of the object in bytes.
+
+    Note:
+        Objects that are referred to more than once are only counted once. Classes, functions and modules are not counted. XML trees are counted as the length of their serialised form.
+
+    Warning:
+        Objects shared with other items in a cache are counted against each item, so the total for a cache may overestimate the memory it uses.
+
+    """
+    seen = set()
+    to_measure = [obj]
+    size = 0
+
+    while to_measure:
+        current = to_measure.pop()
+        if id(current) in seen or isinstance(current, (type, type(approximate_size), type(sys))):
+            continue
+        seen.add(id(current))
+
+        if isinstance(current, (etree._ElementTree, etree._Element)):  # pylint: disable=protected-access
+            size += len(etree.tostring(current))
+            continue
+
+        size += sys.getsizeof(current)
+
+        if isinstance(current, (str, bytes)):
+            continue
+        if isinstance(current, dict):
+            to_measure.extend(current.keys())
+            to_measure.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            to_measure.extend(current)
+
+        if hasattr(current, '__dict__'):
+            to_measure.append(current.__dict__)
+        for cls in type(current).__mro__:
+            for slot in getattr(cls, '__slots__', ()):
+                try:
+                    to_measure.append(getattr(current, slot))
+                except AttributeError:
+                    pass
+
+    return size
+
+
+class LRUCache:
+    """An in-memory cache that holds a bounded number of items, evicting those least recently used.
+
+    The budget may be set as a number of entries, an approximate number of bytes, or both. Items are evicted once either is exceeded.
+
+    Attributes:
+        max_entries (int or None): The maximum number of items to hold. `None` when unlimited.
+        max_bytes (int or None): The maximum approximate number of bytes to hold. `None` when unlimited.
+        hits (int): The number of lookups that found an item.
+        misses (int): The number of lookups that did not find an item.
+        evictions (int): The number of items that have been evicted to stay within the budget.
+
+    Note:
+        This is safe to use from multiple threads.
+
+        The size of items is only determined while `max_bytes` is set, since approximating the size of large items is slow.
+
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None, sizeof=approximate_size):
+        """Initialise an LRUCache.
+
+        Args:
+            max_entries (int): The maximum number of items to hold. Defaults to unlimited.
+            max_bytes (int): The maximum approximate number of bytes to hold. Defaults to unlimited.
+            sizeof (func): A function that returns the approximate size of an item in bytes.
+
+        Raises:
+            ValueError: When a budget is negative.
+
+        """
+        self._items = collections.OrderedDict()
+        self._sizes = dict()
+        self._sizeof = sizeof
+        self._lock = threading.RLock()
+        self.max_entries = None
+        self.max_bytes = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.resize(max_entries, max_bytes)
+
+    def __contains__(self, key):
+        """Check whether an item is held, without counting a lookup or marking the item as recently used."""
+        with self._lock:
+            return key in self._items
+
+    def __delitem__(self, key):
+        """Remove an item."""
+        with self._lock:
+            del self._items[key]
+            self._sizes.pop(key, None)
+
+    def __getitem__(self, key):
+        """Return an item, marking it as recently used.
+
+        Raises:
+            KeyError: When there is no item with the given key.
+
+        """
+        with self._lock:
+            try:
+                item = self._items[key]
+            except KeyError:
+                self.misses += 1
+                raise
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item
+
+    def __iter__(self):
+        """Iterate over the keys of the items held, from least to most recently used."""
+        with self._lock:
+            return iter(list(self._items.keys()))
+
+    def __len__(self):
+        """Return the number of items held."""
+        with self._lock:
+            return len(self._items)
+
+    def __setitem__(self, key, item):
+        """Add an item, marking it as recently used, then evict items until the cache is within its budget.
+
+        Note:
+            An item that exceeds the budget by itself is evicted immediately.
+
+        """
+        with self._lock:
+            self._items[key] = item
+            self._items.move_to_end(key)
+            if self.max_bytes is not None:
+                self._sizes[key] = self._sizeof(item)
+            self._evict()
+
+    @property
+    def size_bytes(self):
+        """The approximate number of bytes held, as an int. `None` when `max_bytes` is not set."""
+        with self._lock:
+            if self.max_bytes is None:
+                return None
+            return sum(self._sizes.values())
+
+    def clear(self):
+        """Remove every item. Counters are not reset."""
+        with self._lock:
+            self._items.clear()
+            self._sizes.clear()
+
+    def get(self, key, default=None):
+        """Return an item, marking it as recently used, or a default where there is no such item."""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def resize(self, max_entries=None, max_bytes=None):
+        """Change the budget, evicting items until the cache is within it.
+
+        Args:
+            max_entries (int): The maximum number of items to hold. `None` for unlimited.
+            max_bytes (int): The maximum approximate number of bytes to hold. `None` for unlimited.
+
+        Raises:
+            ValueError: When a budget is negative.
+
+        """
+        if any(budget is not None and budget < 0 for budget in (max_entries, max_bytes)):
+            raise ValueError('The budget of an LRUCache cannot be negative.')
+
+        with self._lock:
+            self.max_entries = max_entries
+            self.max_bytes = max_bytes
+
+            if max_bytes is None:
+                self._sizes.clear()
+            else:
+                for key, item in self._items.items():
+                    if key not in self._sizes:
+                        self._sizes[key] = self._sizeof(item)
+
+            self._evict()
+
+    def statistics(self):
+        """Summarise the use of the cache.
+
+        Returns:
+            dict: The `hits`, `misses`, `evictions`, number of `entries` and approximate `bytes` held, along with the `max_entries` and `max_bytes` budget. `bytes` is `None` when `max_bytes` is not set.
+
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._items),
+                'bytes': self.size_bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes
+            }
+
+    def _evict(self):
+        """Evict the least recently used items until the cache is within its budget."""
+        while self._items and self._is_over_budget():
+            key, _ = self._items.popitem(last=False)
+            self._sizes.pop(key, None)
+            self.evictions += 1
+
+    def _is_over_budget(self):
+        """Determine whether the cache holds more than its budget allows.
+
+        Returns:
+            bool: Whether either budget is exceeded.
+
+        """
+        if self.max_entries is not None and len(self._items) > self.max_entries:
+            return True
+        return self.max_bytes is not None and sum(self._sizes.values()) > self.max_bytes
+
+
+def cache_directory():
+    """Locate the directory that the cache is stored in.
+
+    Returns:
+        str or None: The path to the cache directory. `None` when the cache is disabled.
+
+    Note:
+        The directory is not created until an entry is stored.
+
+    """
+    try:
+        return os.environ[CACHE_DIR_ENV_VAR] or None
+    except KeyError:
+        pass
+
+    user_cache_directory = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(user_cache_directory, 'pyiati')
+
+
+@functools.lru_cache(maxsize=1)
+def library_version():
+    """Determine the version of pyIATI that is running.
+
+    Returns:
+        str: The installed version of pyIATI, or `unknown` when pyIATI is not installed as a distribution.
+
+    Note:
+        The version is determined once per process, since locating the distribution is slow compared to loading an entry.
+
+    """
+    try:
+        import importlib.metadata
+    except ImportError:  # `importlib.metadata` was added in Python 3.8
+        import pkg_resources
+
+        try:
+            return pkg_resources.get_distribution('pyIATI').version
+        except pkg_resources.DistributionNotFound:
+            return 'unknown'
+
+    try:
+        return importlib.metadata.version('pyIATI')
+    except importlib.metadata.PackageNotFoundError:
+        return 'unknown'
+
+
+def cache_key(*parts):
+    """Create a key that identifies an entry built from some content.
+
+    Args:
+        *parts (str or bytes): The content that the entry is built from, along with anything else that should distinguish it, such as a format version.
+
+    Returns:
+        str: A hex digest of the parts, the version of pyIATI, and the version of Python.
+
+    """
+    digest = hashlib.sha256()
+    for part in (library_version(), sys.version) + parts:
+        part_bytes = part if isinstance(part, bytes) else str(part).encode('utf-8')
+        # the length is included so that different divisions of the same bytes into parts give different keys
+        digest.update(str(len(part_bytes)).encode('ascii') + b':' + part_bytes)
+
+    return digest.hexdigest()
+
+
+def _entry_path(namespace, key):
+    """Determine the path that an entry is stored at.
+
+    Args:
+        namespace (str): The type of entry, such as `rulesets`.
+        key (str): The key that identifies the entry, as created by `cache_key()`.
+
+    Returns:
+        str or None: The path to the entry. `None` when the cache is disabled.
+
+    """
+    directory = cache_directory()
+    if directory is None:
+        return None
+
+    return os.path.join(directory, namespace, key)
+
+
+def load(namespace, key):
+    """Load an entry from the cache.
+
+    Args:
+        namespace (str): The type of entry, such as `rulesets`.
+        key (str): The key that identifies the entry, as created by `cache_key()`.
+
+    Returns:
+        bytes or None: The content of the entry. `None` when there is no such entry or the cache is disabled.
+
+    """
+    path = _entry_path(namespace, key)
+    if path is None:
+        return None
+
+    try:
+        with open(path, 'rb') as entry_file:
+            return entry_file.read()
+    except OSError:
+        return None
+
+
+def store(namespace, key, data):
+    """Store an entry in the cache.
+
+    Args:
+        namespace (str): The type of entry, such as `rulesets`.
+        key (str): The key that identifies the entry, as created by `cache_key()`.
+        data (bytes): The content of the entry.
+
+    Note:
+        The entry is written to a temporary file that is then moved into place, so that other processes never load a partially written entry.
+
+        A warning is logged when the entry cannot be written, such as when the cache directory is read-only. The cache is an optimisation, so this does not raise an error.
+
+    """
+    path = _entry_path(namespace, key)
+    if path is None:
+        return
+
+    directory = os.path.dirname(path)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(file_descriptor, 'wb') as entry_file:
+                entry_file.write(data)
+            os.replace(temporary_path, path)
+        except OSError:
+            os.remove(temporary_path)
+            raise
+    except OSError as err:
+        iati.utilities.log_warning('Unable to store an entry in the cache at %s: %s', path, err)
+
+
+def cached_object(namespace, key, build_func, expected_type=object):
+    """Return an object from the cache, building it and storing it where there is no usable entry.
+
+    Args:
+        namespace (str): The type of entry, such as `rulesets`.
+        key (str): The key that identifies the entry, as created by `cache_key()`.
+        build_func (func): A function that takes no arguments and builds the object when it cannot be loaded from the cache.
+        expected_type (type): The type of object that the entry must contain to be used.
+
+    Returns:
+        object: The object, either loaded from the cache or built by `build_func`.
+
+    Note:
+        Objects are stored using `pickle`. Entries that cannot be unpickled, such as those that are corrupt, or that contain an object of the wrong type, are replaced by building the object again.
+
+    """
+    entry = load(namespace, key)
+
+    if entry is not None:
+        try:
+            loaded_object = pickle.loads(entry)
+        except Exception:  # pylint: disable=broad-except
+            # unpickling can raise almost any type of exception when given data that is corrupt or from an incompatible version
+            loaded_object = None
+
+        if isinstance(loaded_object, expected_type):
+            return loaded_object
+
+    built_object = build_func()
+    store(namespace, key, pickle.dumps(built_object, protocol=pickle.HIGHEST_PROTOCOL))
+
+    return built_object
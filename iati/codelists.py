@@ -1,10 +1,107 @@
 """A module containing a core representation of IATI Codelists."""
 import collections
+import collections.abc
+import copy
+import hashlib
+import json
+import threading
 from lxml import etree
+import iati.constants
 import iati.resources
 import iati.utilities
 
 
+_CODES_LOCK = threading.RLock()
+"""A lock that guards creating the Codes of Codelists and replacing them with sets that may be shared, since default Codelists are shared between threads."""
+
+
+_CodeColumns = collections.namedtuple('_CodeColumns', ['values', 'names', 'categories'])
+"""The Codes within a Codelist, stored as parallel tuples of the value, name and category of each Code. The category is `None` where a Code has no category."""
+
+
+_CodeIndex = collections.namedtuple('_CodeIndex', ['values', 'codes_by_value', 'values_by_name'])
+"""An index of the Codes within a Codelist: a frozenset of their values, a dict mapping each value to a Code, and a dict mapping each name to a frozenset of the values with that name."""
+
+
+def parse_codelist(data):
+    """Create a Codelist from the bytes of a Codelist XML file.
+
+    Args:
+        data (bytes): The content of a Codelist XML file.
+
+    Returns:
+        iati.Codelist: The Codelist that the XML represents.
+
+    Raises:
+        lxml.etree.XMLSyntaxError: When the data is not valid XML.
+
+    Note:
+        The value, name and category of each Code are read in a single pass over the items within the Codelist, and stored as a compact set of columns. The Codes themselves are created the first time that `codes` is accessed.
+
+        Codelists created this way are equal to those created with `Codelist(name, xml=...)` from the same XML.
+
+    """
+    root = etree.fromstring(data)
+    codelist_name = root.attrib['name']
+
+    values = list()
+    names = list()
+    categories = list()
+    for code_el in root.iterfind('codelist-items/codelist-item'):
+        value, name, category = _read_code_element(code_el)
+
+        if (value is None) and (name is None):
+            msg = "The provided Codelist ({0}) has a Code that does not contain a name or value.".format(codelist_name)
+            iati.utilities.log_warning(msg)
+
+        values.append('' if value is None else value)
+        names.append('' if name is None else name)
+        categories.append(category)
+
+    codelist = Codelist(codelist_name)
+    if 'complete' in root.attrib:
+        codelist.complete = root.attrib['complete'] == '1'
+    codelist._codes = None  # pylint: disable=protected-access
+    codelist._code_columns = _CodeColumns(tuple(values), tuple(names), tuple(categories))  # pylint: disable=protected-access
+
+    return codelist
+
+
+def _read_code_element(code_el):
+    """Read the value, name and category of a `codelist-item` element.
+
+    Args:
+        code_el (etree._Element): The `codelist-item` element.
+
+    Returns:
+        tuple of (str, str, str): The value, name and category of the Code. Each is `None` when the element does not contain it.
+
+    Note:
+        This gives the same result as `findtext('code')`, `findtext('name/narrative') or findtext('name')` and `findtext('category')`, though walks the children of the element directly since this is much faster.
+
+    """
+    value = name = narrative = category = None
+
+    for child in code_el:
+        tag = child.tag
+        if tag == 'code':
+            if value is None:
+                value = child.text or ''
+        elif tag == 'name':
+            if name is None:
+                name = child.text or ''
+            if narrative is None:
+                for name_child in child:
+                    if name_child.tag == 'narrative':
+                        narrative = name_child.text or ''
+                        break
+        elif tag == 'category':
+            if category is None:
+                category = child.text or ''
+
+    return value, narrative or name, category
+
+
 class Codelist:
     """Representation of a Codelist as defined within the IATI SSOT.
 
@@ -25,6 +122,12 @@ class Codelist:
 
     """
 
+    _fingerprint = None
+    """tuple or None: The columns of a Codelist created by `parse_codelist()` when the fingerprint of its Codes was last calculated, along with that fingerprint."""
+
+    _code_columns = None
+    """_CodeColumns or None: The Codes within the Codelist, in columnar form, before the Codes have been created. See `parse_codelist()`."""
+
     # pylint: disable=too-many-instance-attributes
     def __init__(self, name, xml=None):
         """Initialise a Codelist.
@@ -124,6 +227,191 @@ class Codelist:
 
         return hash((self.name, self.complete, tuple(sorted_codes)))
 
+    @property
+    def fingerprint(self):
+        """str: A SHA-256 hex digest of the name, completeness and Codes of the Codelist.
+
+        Equal Codelists have the same fingerprint. Unlike the hash of a Codelist, the fingerprint is the same in every Python process, so may be used in keys that are stored.
+
+        Note:
+            The fingerprint of the Codes is calculated once, and calculated again only when the Codes are modified. It is shared with shared copies of the Codelist until either is modified.
+            The Codes of a Codelist created by `parse_codelist()` are fingerprinted without being created.
+
+        Warning:
+            Changes made through a reference to the set of Codes that was taken before the fingerprint was first calculated are not detected.
+
+        """
+        content = [self.name, self.complete, self._codes_fingerprint()]
+
+        return hashlib.sha256(json.dumps(content).encode('utf-8')).hexdigest()
+
+    @property
+    def codes(self):
+        """:obj:`set` of :obj:`iati.Code`: The codes demonstrating the range of values that the Codelist may represent.
+
+        Note:
+            For Codelists created by `parse_codelist()`, the Codes are created the first time that this is accessed.
+
+        """
+        if self._codes is None:
+            with _CODES_LOCK:
+                if self._codes is None:
+                    columns = self._code_columns
+                    self._codes = _CopyOnWriteSet(iati.Code(value, name) for value, name in zip(columns.values, columns.names))
+                    self._code_columns = None
+
+        return self._codes
+
+    @codes.setter
+    def codes(self, codes):
+        """Replace the Codes within the Codelist."""
+        self._codes = codes
+        self._code_columns = None
+
+    def code_for_value(self, value):
+        """Locate the Code with a given value.
+
+        Args:
+            value (str): The value to locate.
+
+        Returns:
+            iati.Code or None: The Code with the value. `None` when there is no such Code. Where several Codes have the value, one of them is returned.
+
+        """
+        return self._index().codes_by_value.get(value)
+
+    def values_for_name(self, name):
+        """Locate the values of the Codes with a given name.
+
+        Args:
+            name (str): The name of the Codes to locate.
+
+        Returns:
+            frozenset of str: The values of the Codes with the name. Empty when there are no such Codes.
+
+        """
+        return self._index().values_by_name.get(name, frozenset())
+
+    def contains_all(self, values):
+        """Check whether every one of a number of values is on the Codelist.
+
+        Args:
+            values (iterable of str): The values to check.
+
+        Returns:
+            bool: Whether each value is the value of a Code on the Codelist.
+
+        """
+        return self._index().values.issuperset(values)
+
+    def invalid_values(self, values):
+        """Determine which of a number of values are not on the Codelist.
+
+        Args:
+            values (iterable of str): The values to check.
+
+        Returns:
+            set of str: The distinct values that are not the value of any Code on the Codelist.
+
+        """
+        return set(values).difference(self._index().values)
+
+    def isin(self, values):
+        """Check which of a column of values are on the Codelist, in the manner of NumPy `isin`.
+
+        Args:
+            values (numpy.ndarray / sequence of str): The values to check. Arrays may have a string or object dtype, and any shape.
+
+        Returns:
+            numpy.ndarray: A boolean array with the shape of `values`, which is `True` where a value is the value of a Code on the Codelist.
+
+        Raises:
+            ImportError: When NumPy is not installed.
+
+        Note:
+            NumPy is not a dependency of pyIATI. It must be installed separately to use this function.
+
+            Each value is looked up in the frozenset of values on the Codelist. This is faster than `numpy.isin()` for arrays with an object dtype, and similar for arrays with a string dtype.
+
+        """
+        import numpy  # pylint: disable=import-error
+
+        if isinstance(values, numpy.ndarray):
+            shape = values.shape
+            flat_values = values.ravel()
+            # items of object arrays are the original strings, while items of string arrays are converted most quickly all at once
+            items = flat_values if flat_values.dtype == object else flat_values.tolist()
+        else:
+            items = list(values)
+            shape = (len(items),)
+
+        return numpy.fromiter(map(self._index().values.__contains__, items), dtype=bool, count=len(items)).reshape(shape)
+
+    def _index(self):
+        """Return an index of the Codes within the Codelist.
+
+        Returns:
+            _CodeIndex: The index.
+
+        Note:
+            The index is built the first time that it is needed, and built again only when the Codes have been modified. It is shared with shared copies of the Codelist until either is modified.
+
+        Warning:
+            Changes made through a reference to the set of Codes that was taken before the index was first built are not detected.
+
+        """
+        return self._copy_on_write_codes().derived('index', _build_code_index)
+
+    def _codes_fingerprint(self):
+        """Return a SHA-256 hex digest of the value and name of each Code within the Codelist.
+
+        Returns:
+            str: The fingerprint of the Codes.
+
+        """
+        columns = self._code_columns
+        if columns is not None:
+            if self._fingerprint is None or self._fingerprint[0] is not columns:
+                self._fingerprint = (columns, _fingerprint_code_pairs(zip(columns.values, columns.names)))
+            return self._fingerprint[1]
+
+        return self._copy_on_write_codes().derived('fingerprint', lambda codes: _fingerprint_code_pairs((code.value, code.name) for code in codes))
+
+    def _copy_on_write_codes(self):
+        """Return the Codes within the Codelist as a set that may be shared with copies, replacing a built-in set with a copy of it where needed.
+
+        Returns:
+            _CopyOnWriteSet: The Codes within the Codelist.
+
+        """
+        codes = self.codes
+        if not isinstance(codes, _CopyOnWriteSet):
+            with _CODES_LOCK:
+                codes = self.codes
+                if not isinstance(codes, _CopyOnWriteSet):
+                    codes = self.codes = _CopyOnWriteSet(codes)
+
+        return codes
+
+    def shared_copy(self):
+        """Copy the Codelist without copying its Codes.
+
+        The copy shares its Codes with this Codelist until either is modified, at which point the one that is modified takes its own copy of the Codes. This means that a copy is made in constant time, no matter how many Codes there are.
+
+        Returns:
+            iati.Codelist: A copy of the Codelist that may be modified without affecting this Codelist.
+
+        Note:
+            Codes are immutable, so sharing them does not allow a change to one Codelist to affect another.
+
+        """
+        # the Codes are created before copying where they have not been, so that they are created once rather than by each copy
+        codes = self._copy_on_write_codes()
+
+        codelist_copy = copy.copy(self)
+        codelist_copy.codes = codes.shared_copy()
+        return codelist_copy
+
     @property
     def xsd_restriction(self):
         """Output the Codelist as an XSD simpleType restriction.
@@ -165,6 +453,197 @@ class Codelist:
         return type_base_el
 
 
+def _fingerprint_code_pairs(code_pairs):
+    """Calculate a SHA-256 hex digest of the Codes within a Codelist.
+
+    Args:
+        code_pairs (iterable of tuple): The value and name of each Code. Identical pairs are fingerprinted once, as identical Codes are held once within a set.
+
+    Returns:
+        str: The fingerprint of the Codes.
+
+    """
+    return hashlib.sha256(json.dumps(sorted(set(code_pairs))).encode('utf-8')).hexdigest()
+
+
+def _build_code_index(codes):
+    """Build an index of a set of Codes.
+
+    Args:
+        codes (iterable of iati.Code): The Codes to index.
+
+    Returns:
+        _CodeIndex: The index of the Codes.
+
+    """
+    codes_by_value = dict()
+    values_by_name = collections.defaultdict(set)
+    for code in codes:
+        codes_by_value.setdefault(code.value, code)
+        values_by_name[code.name].add(code.value)
+
+    return _CodeIndex(frozenset(codes_by_value), codes_by_value, {name: frozenset(values) for name, values in values_by_name.items()})
+
+
+class _CopyOnWriteSet(collections.abc.MutableSet):
+    """A set of Codes that may share its contents with other sets, taking its own copy of the contents only when it is modified.
+
+    Note:
+        The methods and operators of the built-in `set` are provided. Those that return a new set return a built-in `set`.
+
+    """
+
+    __slots__ = ('_items', '_is_shared', '_derived')
+
+    _SHARING_LOCK = threading.Lock()
+    """A lock that guards changes to whether the items of any set are shared, so that cached sets may be copied from many threads."""
+
+    def __init__(self, items=()):
+        """Initialise a set containing a copy of the given items.
+
+        Args:
+            items (iterable): The items in the set.
+
+        """
+        self._items = set(items)
+        self._is_shared = False
+        self._derived = dict()
+
+    @classmethod
+    def _from_iterable(cls, it):
+        """Create the result of a set operation, which is a built-in set, as it is for the methods of the built-in `set`."""
+        return set(it)
+
+    def __contains__(self, item):
+        """Check whether an item is in the set."""
+        return item in self._items
+
+    def __iter__(self):
+        """Iterate over the items in the set."""
+        return iter(self._items)
+
+    def __len__(self):
+        """Return the number of items in the set."""
+        return len(self._items)
+
+    def __repr__(self):
+        """Return a representation of the items in the set."""
+        return '{0}({1!r})'.format(type(self).__name__, self._items)
+
+    def _writable_items(self):
+        """Return the items in the set so that they may be modified, copying them first if they are shared with another set."""
+        if self._is_shared:
+            with self._SHARING_LOCK:
+                if self._is_shared:
+                    self._items = set(self._items)
+                    self._is_shared = False
+        # values derived from the items are shared along with them, so are only ever discarded by a set that no longer shares its items
+        self._derived = dict()
+        return self._items
+
+    def add(self, value):
+        """Add an item to the set."""
+        self._writable_items().add(value)
+
+    def discard(self, value):
+        """Remove an item from the set if it is present."""
+        if value in self._items:
+            self._writable_items().discard(value)
+
+    def clear(self):
+        """Remove all items from the set."""
+        self._items = set()
+        self._is_shared = False
+        self._derived = dict()
+
+    def update(self, *others):
+        """Add the items from each of the other iterables to the set."""
+        self._writable_items().update(*others)
+
+    def intersection_update(self, *others):
+        """Keep only the items that are also within each of the other iterables."""
+        self._writable_items().intersection_update(*others)
+
+    def difference_update(self, *others):
+        """Remove the items that are within any of the other iterables."""
+        self._writable_items().difference_update(*others)
+
+    def symmetric_difference_update(self, other):
+        """Keep the items that are within either the set or the other iterable, but not both."""
+        self._writable_items().symmetric_difference_update(other)
+
+    def union(self, *others):
+        """Return a built-in set of the items within the set or any of the other iterables."""
+        return self._items.union(*others)
+
+    def intersection(self, *others):
+        """Return a built-in set of the items within the set and each of the other iterables."""
+        return self._items.intersection(*others)
+
+    def difference(self, *others):
+        """Return a built-in set of the items within the set but not any of the other iterables."""
+        return self._items.difference(*others)
+
+    def symmetric_difference(self, other):
+        """Return a built-in set of the items within either the set or the other iterable, but not both."""
+        return self._items.symmetric_difference(other)
+
+    def issubset(self, other):
+        """Check whether every item in the set is within the other iterable."""
+        return self._items.issubset(other)
+
+    def issuperset(self, other):
+        """Check whether every item in the other iterable is within the set."""
+        return self._items.issuperset(other)
+
+    def isdisjoint(self, other):
+        """Check whether the set has no items in common with the other iterable."""
+        return self._items.isdisjoint(other)
+
+    def __getstate__(self):
+        """Return the state of the set when it is copied or pickled, which is its items alone."""
+        return {'_items': self._items}
+
+    def __setstate__(self, state):
+        """Restore the state of a copied or unpickled set, which does not share its items."""
+        self._items = set(state['_items'])
+        self._is_shared = False
+        self._derived = dict()
+
+    def derived(self, name, build_func):
+        """Return a value derived from the items in the set, building it where it has not been built since the set was last modified.
+
+        Args:
+            name (str): The name of the derived value.
+            build_func (func): A function that takes the items in the set and builds the derived value.
+
+        Returns:
+            object: The derived value. This is shared with sets that share their items with this set, so must not be modified.
+
+        """
+        try:
+            return self._derived[name]
+        except KeyError:
+            value = self._derived[name] = build_func(self._items)
+            return value
+
+    def copy(self):
+        """Return a shallow copy of the set as a built-in set."""
+        return set(self._items)
+
+    def shared_copy(self):
+        """Return a copy of the set that shares its contents with this set until either is modified."""
+        items_copy = type(self)()
+
+        with self._SHARING_LOCK:
+            self._is_shared = True
+            items_copy._items = self._items  # pylint: disable=protected-access
+            items_copy._is_shared = True  # pylint: disable=protected-access
+            items_copy._derived = self._derived  # pylint: disable=protected-access
+
+        return items_copy
+
+
 class Code:
     """Representation of a Code contained within a Codelist.
 
@@ -172,12 +651,26 @@ class Code:
         name (str): The name of the code.
         value (str): The value of the code.
 
+    Note:
+        Codes are immutable once initialised, with their hash calculated once. Many thousands are held within the default Codelists, so they are stored without a per-instance `__dict__`.
+
     Todo:
         Implement and document attributes that are not yet implemented and documented.
 
     """
 
-    # pylint: disable=too-many-instance-attributes
+    __slots__ = ('name', 'value', '_hash')
+
+    # a number of placeholder attributes that Codelists have, though are not yet implemented
+    # these are shared by every Code until they are implemented, rather than stored on each instance
+    _description = None
+    _category = None
+    _url = None
+    _public_database = False
+    _status = None
+    _activation_date = None
+    _withdrawal_date = None
+
     def __init__(self, value, name=''):
         """Initialise a Code.
 
@@ -194,15 +687,33 @@ class Code:
         """
         self.name = name
         self.value = value
+        self._hash = hash(value)
 
-        # a number of placeholder attributes that Codelists have, though are not yet implemented
-        self._description = None
-        self._category = None
-        self._url = None
-        self._public_database = False
-        self._status = None
-        self._activation_date = None
-        self._withdrawal_date = None
+    def __setattr__(self, name, value):
+        """Set an attribute of the Code, so long as it has not already been set.
+
+        Raises:
+            AttributeError: When the attribute has already been set, since Codes are immutable.
+
+        """
+        if hasattr(self, name):
+            raise AttributeError('Codes are immutable, so `{0}` cannot be changed.'.format(name))
+        super(Code, self).__setattr__(name, value)
+
+    def __getstate__(self):
+        """Return the state of the Code when it is copied or pickled.
+
+        Note:
+            The hash is not included since the hash of a string differs between Python processes. It is recalculated by `__setstate__()`.
+
+        """
+        return {'name': self.name, 'value': self.value}
+
+    def __setstate__(self, state):
+        """Restore the state of a copied or unpickled Code."""
+        object.__setattr__(self, 'name', state['name'])
+        object.__setattr__(self, 'value', state['value'])
+        object.__setattr__(self, '_hash', hash(state['value']))
 
     def __eq__(self, other):
         """Check Code equality.
@@ -235,7 +746,7 @@ class Code:
             Be able to deal with checks against both Codes and strings.
 
         """
-        return hash((self.value))
+        return self._hash
 
     @property
     def xsd_enumeration(self):
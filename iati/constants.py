@@ -11,12 +11,7 @@ Todo:
 """
 
 LOG_FILE_NAME = 'iatilib.log'
-"""The location of the primary IATI log file.
-
-Warning:
-    Logging should be clearly user-definable.
-
-"""
+"""The location of the primary IATI log file where the `IATI_LOG_FILE` environment variable is not set. See `iati.logs`."""
 LOGGER_NAME = 'iati'
 """The name of the primary IATI Logger.
 
@@ -6,36 +6,144 @@ Todo:
     Handle multiple versions of the Standard rather than limiting to the latest.
     Implement more than Codelists.
 """
+import copy
+import gc
+import hashlib
 import json
 import os
+import threading
+import timeit
+import weakref
 from collections import defaultdict
-from copy import deepcopy
+from concurrent.futures import ThreadPoolExecutor
+import iati.cache
 import iati.codelists
 import iati.constants
 import iati.resources
+import iati.rulesets
+import iati.utilities
+import iati.version
 
 
-_CODELISTS = defaultdict(dict)
+_CACHE_LOCK = threading.RLock()
+"""A lock that is held while the caches of default data are read or modified."""
+
+_LOADS = dict()
+"""The loads of default data that are in progress, keyed by a `(cache_id, key)` tuple, where `cache_id` is the `id()` of the cache that the item is being loaded into.
+
+Concurrent callers that need the same uncached item wait for a single load to complete, rather than each loading the item themselves.
+Each load is removed once every caller waiting on it has finished, so this only holds items that are being loaded. The cache is referenced by those callers throughout, so its `id()` cannot be reused by another cache while the load is present.
+
+"""
+
+
+class _Load:
+    """An item of default data that is being loaded into a cache.
+
+    Attributes:
+        lock (threading.RLock): A lock that is held while the item is loaded.
+        callers (int): The number of callers that are loading the item or waiting for it to be loaded. Guarded by `_CACHE_LOCK`.
+
+    """
+
+    __slots__ = ('lock', 'callers')
+
+    def __init__(self):
+        """Initialise a load that no callers are yet waiting for."""
+        self.lock = threading.RLock()
+        self.callers = 0
+
+
+def _load_into_cache(cache, key, load_func, use_cache):
+    """Return an item of default data from a cache, loading it where needed.
+
+    Args:
+        cache (iati.cache.LRUCache or weakref.WeakValueDictionary): The cache that the item is held within.
+        key (hashable): The key of the item within `cache`.
+        load_func (func): A function that takes no arguments and loads the item.
+        use_cache (bool): Whether a cached item should be returned rather than loading the item again.
+
+    Returns:
+        object: The item, as cached.
+
+    Note:
+        When `use_cache` is `True`, loads are single-flight. Concurrent callers that find the item uncached wait while one of them loads it, then return the same item.
+
+        When `use_cache` is `False`, the item is always loaded by the caller, so that it is not shared with concurrent callers. It then replaces any cached item.
+
+        The item is returned even if it is evicted from the cache as soon as it is added.
+
+    """
+    if not use_cache:
+        item = load_func()
+        with _CACHE_LOCK:
+            cache[key] = item
+        return item
+
+    load_key = (id(cache), key)
+    with _CACHE_LOCK:
+        item = cache.get(key)
+        if item is not None:
+            return item
+
+        load = _LOADS.get(load_key)
+        if load is None:
+            load = _LOADS[load_key] = _Load()
+        load.callers += 1
+
+    try:
+        with load.lock:
+            # another caller may have loaded the item while the lock was awaited
+            with _CACHE_LOCK:
+                if key in cache:
+                    return cache[key]
+
+            item = load_func()
+            with _CACHE_LOCK:
+                cache[key] = item
+            return item
+    finally:
+        with _CACHE_LOCK:
+            load.callers -= 1
+            if not load.callers:
+                del _LOADS[load_key]
+
+
+def caches():
+    """Locate the caches of default data.
+
+    Returns:
+        dict: The cache for each type of default data. Keys are `codelists`, `codelist_mappings` and `schemas`. Values are `iati.cache.LRUCache` instances.
+
+    Note:
+        Each cache is unbounded by default. Long-running processes that use many versions of the Standard may bound the memory used by calling `resize()` on a cache.
+
+        Every item may be removed with `clear()`. Hit, miss and eviction counts are given by `statistics()`.
+
+    """
+    return {
+        'codelists': _CODELISTS,
+        'codelist_mappings': _CODELIST_MAPPINGS,
+        'schemas': _SCHEMAS
+    }
+
+
+def clear_caches():
+    """Remove every item from the caches of default data."""
+    with _CACHE_LOCK:
+        for cache in caches().values():
+            cache.clear()
+
+
+_CODELISTS = iati.cache.LRUCache()
 """A cache of loaded Codelists.
 
 This removes the need to repeatedly load a Codelist from disk each time it is accessed.
 
-The dictionary is structured as:
-
-{
-    "version_number_a": {
-        "codelist_name_1": iati.Codelist(codelist_1),
-        "codelist_name_2": iati.Codelist(codelist_2)
-        [...]
-    },
-    "version_number_b": {
-        [...]
-    },
-    [...]
-}
+Keys are `(version, codelist_name)` tuples. Values are iati.Codelist() instances.
 
 Warning:
-    Modifying values directly obtained from this cache can potentially cause unexpected behavior. As such, it is highly recommended to perform a `deepcopy()` on any accessed Codelist before it is modified in any way.
+    Modifying values directly obtained from this cache can potentially cause unexpected behavior. As such, it is highly recommended to take a `shared_copy()` of any accessed Codelist before it is modified in any way.
 
 """
 
@@ -54,6 +162,9 @@ def codelist(name, version):
     Returns:
         iati.Codelist: A Codelist with the specified name from the specified version of the Standard. It is populated with all the Codes on the Codelist.
 
+    Note:
+        The returned Codelist shares its Codes with the cached Codelist until it is modified, so is returned in constant time no matter how many Codes it contains. Modifying it does not affect the cached Codelist.
+
     Warning:
         A name may not be sufficient to act as a UID.
 
@@ -67,22 +178,20 @@ def codelist(name, version):
     """
     try:
         codelist_found = _codelists(version, True)[name]
-        return deepcopy(codelist_found)
+        return codelist_found.shared_copy()
     except (KeyError, TypeError):
         msg = "There is no default Codelist in version {0} of the Standard with the name {1}.".format(version, name)
         iati.utilities.log_warning(msg)
         raise ValueError(msg)
 
 
-@iati.version.decimalise_integer
-@iati.version.normalise_decimals
-@iati.version.allow_fully_supported_version
+@iati.version.normalise_fully_supported_version
 def _codelists(version, use_cache=False):
     """Locate the default Codelists for the specified version of the Standard.
 
     Args:
         version (str / Decimal / iati.Version): The Integer or Decimal version of the Standard to return the Codelists for. If an Integer Version is specified, uses the most recent Decimal Version within the Integer Version.
-        use_cache (bool): Whether the cache should be used rather than loading the Codelists from disk again. If used, a `deepcopy()` should be performed on any returned Codelist before it is modified.
+        use_cache (bool): Whether the cache should be used rather than loading the Codelists from disk again. If used, `shared_copy()` should be called on any returned Codelist before it is modified.
 
     Raises:
         ValueError: When a specified version is not a valid version of the IATI Standard.
@@ -92,23 +201,39 @@ def _codelists(version, use_cache=False):
 
     Warning:
         Setting `use_cache` to `True` is dangerous since it does not return a deep copy of the Codelists. This means that modification of a returned Codelist will modify the Codelist everywhere.
-        A `deepcopy()` should be performed on any returned value before it is modified.
+        `shared_copy()` should be called on any returned Codelist before it is modified.
 
     Note:
         This is a private function so as to prevent the (dangerous) `use_cache` parameter being part of the public API.
 
+        This is safe to call from multiple threads. Each Codelist is loaded once by concurrent callers that use the cache.
+
+        Each Codelist is read in a single pass into a compact columnar form, with its Codes created the first time that they are accessed. See `iati.codelists.parse_codelist()`.
+
+        When the cache is used, Codelists with identical XML at different versions of the Standard are the same instance. See `_CODELISTS_BY_CONTENT`.
+
     """
+    def load_codelist(name, path):
+        """Return a function that loads the Codelist with the given name from the given path."""
+        def load():
+            """Load the Codelist, sharing a Codelist loaded from identical XML when the cache is used."""
+            data = iati.utilities.load_as_bytes(path)
+            if not use_cache:
+                return iati.codelists.parse_codelist(data)
+
+            content_key = (name, hashlib.sha256(data).hexdigest())
+            return _load_into_cache(_CODELISTS_BY_CONTENT, content_key, lambda: iati.codelists.parse_codelist(data), True)
+        return load
+
     paths = iati.resources.get_codelist_paths(version)
+    codelists_found = dict()
 
     for path in paths:
         _, filename = os.path.split(path)
         name = filename[:-len(iati.resources.FILE_CODELIST_EXTENSION)]  # Get the name of the codelist, without the '.xml' file extension
-        if (name not in _CODELISTS[version].keys()) or not use_cache:
-            xml_str = iati.utilities.load_as_string(path)
-            codelist_found = iati.Codelist(name, xml=xml_str)
-            _CODELISTS[version][name] = codelist_found
+        codelists_found[name] = _load_into_cache(_CODELISTS, (version, name), load_codelist(name, path), use_cache)
 
-    return _CODELISTS[version]
+    return codelists_found
 
 
 def codelists(version):
@@ -127,9 +252,7 @@ def codelists(version):
     return _codelists(version)
 
 
-@iati.version.decimalise_integer
-@iati.version.normalise_decimals
-@iati.version.allow_fully_supported_version
+@iati.version.normalise_fully_supported_version
 def codelist_mapping(version):
     """Define the mapping process which states where in a Dataset you should find values on a given Codelist.
 
@@ -142,34 +265,68 @@ def codelist_mapping(version):
     Returns:
         dict of dict: A dictionary containing mapping information. Keys in the first dictionary are Codelist names. Keys in the second dictionary are `xpath` and `condition`. The condition is `None` if there is no condition.
 
+    Note:
+        The parsed mappings are loaded from the on-disk cache where possible. See `iati.cache`.
+
     Todo:
         Make use of the `version` parameter.
 
     """
-    path = iati.resources.create_codelist_mapping_path(version)
-    mapping_tree = iati.utilities.load_as_tree(path)
-    mappings = defaultdict(list)
+    def parse_mappings(mapping_bytes):
+        """Parse the mappings from the content of the Codelist Mapping File."""
+        mapping_tree = iati.utilities.convert_xml_to_tree(mapping_bytes)
+        mappings = defaultdict(list)
+
+        for mapping in mapping_tree.xpath('//mapping'):
+            codelist_name = mapping.find('codelist').attrib['ref']
+            codelist_location = mapping.find('path').text
 
-    for mapping in mapping_tree.getroot().xpath('//mapping'):
-        codelist_name = mapping.find('codelist').attrib['ref']
-        codelist_location = mapping.find('path').text
+            try:
+                condition = mapping.find('condition').text
+            except AttributeError:  # there is no condition
+                condition = None
 
-        try:
-            condition = mapping.find('condition').text
-        except AttributeError:  # there is no condition
-            condition = None
+            mappings[codelist_name].append({
+                'xpath': codelist_location,
+                'condition': condition
+            })
 
-        mappings[codelist_name].append({
-            'xpath': codelist_location,
-            'condition': condition
-        })
+        return mappings
 
-    return mappings
+    def load_mappings():
+        """Load the mappings from the Codelist Mapping File, using the on-disk cache where possible."""
+        path = iati.resources.create_codelist_mapping_path(version)
+        mapping_bytes = iati.utilities.load_as_bytes(path)
+        key = iati.cache.cache_key(mapping_bytes, _CODELIST_MAPPING_FORMAT)
 
+        return iati.cache.cached_object('codelist_mappings', key, lambda: parse_mappings(mapping_bytes), dict)
 
-@iati.version.decimalise_integer
-@iati.version.normalise_decimals
-@iati.version.allow_fully_supported_version
+    return copy.deepcopy(_load_into_cache(_CODELIST_MAPPINGS, version, load_mappings, True))
+
+
+_CODELISTS_BY_CONTENT = weakref.WeakValueDictionary()
+"""Every cached Codelist, keyed by a `(codelist_name, xml_hash)` tuple, where `xml_hash` is the SHA-256 hex digest of the XML it was created from.
+
+Most Codelists are identical across versions of the Standard. This allows a single instance of each to be shared by every version, rather than parsing and holding a copy for each.
+
+Note:
+    Codelists are only held for as long as they are referenced elsewhere, such as by `_CODELISTS`. They are therefore removed once evicted from every version.
+
+"""
+
+_CODELIST_MAPPING_FORMAT = 1
+"""The version of the format that parsed Codelist Mapping Files are stored in within the on-disk cache. This should be incremented whenever the structure returned by `codelist_mapping()` changes."""
+
+_CODELIST_MAPPINGS = iati.cache.LRUCache()
+"""A cache of loaded Codelist Mapping Files, keyed by version of the Standard.
+
+Warning:
+    Modifying values directly obtained from this cache can potentially cause unexpected behavior. `codelist_mapping()` returns a `deepcopy()` of the cached mappings.
+
+"""
+
+
+@iati.version.normalise_fully_supported_version
 def ruleset(version):
     """Return the Standard Ruleset for the specified version of the Standard.
 
@@ -182,11 +339,14 @@ def ruleset(version):
     Returns:
         iati.Ruleset: The default Ruleset for the specified version of the Standard.
 
+    Note:
+        A precompiled form of the Ruleset is loaded from the on-disk cache where possible. See `iati.rulesets.cached_ruleset()`.
+
     """
     path = iati.resources.get_ruleset_paths(version)[0]
     ruleset_str = iati.utilities.load_as_string(path)
 
-    return iati.Ruleset(ruleset_str)
+    return iati.rulesets.cached_ruleset(ruleset_str)
 
 
 def ruleset_schema():
@@ -208,30 +368,16 @@ def ruleset_schema():
     return json.loads(schema_str)
 
 
-_SCHEMAS = defaultdict(lambda: defaultdict(dict))
+_SCHEMAS = iati.cache.LRUCache()
 """A cache of loaded Schemas.
 
 This removes the need to repeatedly load a Schema from disk each time it is accessed.
 
-{
-    "version_number_a": {
-        "populated": {
-            "iati-activities": iati.ActivitySchema
-            "iati-organisations": iati.OrganisationSchema
-        },
-        "unpopulated": {
-            "iati-activities": iati.ActivitySchema
-            "iati-organisations": iati.OrganisationSchema
-        },
-    },
-    "version_number_b": {
-        [...]
-    },
-    [...]
-}
+Keys are `(version, population_status, root_element_name)` tuples, where `population_status` is either `populated` or `unpopulated`. For example: `(iati.Version('2.03'), 'populated', 'iati-activities')`.
+Values are iati.ActivitySchema() or iati.OrganisationSchema() instances.
 
 Warning:
-    Modifying values directly obtained from this cache can potentially cause unexpected behavior. As such, it is highly recommended to perform a `deepcopy()` on any accessed Schema before it is modified in any way.
+    Modifying values directly obtained from this cache can potentially cause unexpected behavior. As such, it is highly recommended to take a copy of any accessed Schema with `_copy_of_schema()` before it is modified in any way.
 
 """
 
@@ -239,7 +385,7 @@ Warning:
 def _populate_schema(schema, version):
     """Populate a Schema with all its extras.
 
-    The extras include Codelists and Rulesets.
+    The extras include Codelists and Rulesets. Codelists are shared copies of those in the default cache.
 
     Args:
         schema (iati.Schema): The Schema to populate.
@@ -252,9 +398,9 @@ def _populate_schema(schema, version):
         Does not create a copy of the provided Schema, instead adding to it directly.
 
     """
-    codelists_to_add = codelists(version)
+    codelists_to_add = _codelists(version, True)
     for codelist_to_add in codelists_to_add.values():
-        schema.codelists.add(codelist_to_add)
+        schema.codelists.add(codelist_to_add.shared_copy())
 
     schema.rulesets.add(ruleset(version))
 
@@ -269,7 +415,7 @@ def _schema(path_func, schema_class, version, populate=True, use_cache=False):
         schema_class (type): A class definition for the Schema of interest.
         version (iati.Version): The Decimal version of the Standard to return the Schema for.
         populate (bool): Whether the Schema should be populated with auxilliary information such as Codelists and Rulesets.
-        use_cache (bool): Whether the cache should be used rather than loading the Schema from disk again. If used, a `deepcopy()` should be performed on any returned Schema before it is modified.
+        use_cache (bool): Whether the cache should be used rather than loading the Schema from disk again. If used, `_copy_of_schema()` should be called on any returned Schema before it is modified.
 
     Raises:
         ValueError: When a specified version is not a valid version of the IATI Standard.
@@ -277,23 +423,54 @@ def _schema(path_func, schema_class, version, populate=True, use_cache=False):
     Returns:
         iati.Schema: An instantiated IATI Schema for the specified version.
 
+    Note:
+        This is safe to call from multiple threads. Each Schema is loaded once by concurrent callers that use the cache.
+
     """
+    def load_schema():
+        """Load the Schema, populating it if required."""
+        schema = schema_class(path_func(version)[0])
+        if populate:
+            schema = _populate_schema(schema, version)
+        return schema
+
     population_key = 'populated' if populate else 'unpopulated'
 
-    schema_paths = path_func(version)
+    return _load_into_cache(_SCHEMAS, (version, population_key, schema_class.ROOT_ELEMENT_NAME), load_schema, use_cache)
 
-    if (schema_class.ROOT_ELEMENT_NAME not in _SCHEMAS[version][population_key].keys()) or not use_cache:
-        schema = schema_class(schema_paths[0])
-        if populate:
-            schema = _populate_schema(schema, version)
-        _SCHEMAS[version][population_key][schema_class.ROOT_ELEMENT_NAME] = schema
 
-    return _SCHEMAS[version][population_key][schema_class.ROOT_ELEMENT_NAME]
+def _copy_of_schema(schema):
+    """Copy a Schema so that it may be modified without affecting the original.
+
+    Args:
+        schema (iati.Schema): The Schema to copy.
+
+    Returns:
+        iati.Schema: A copy of the Schema. The XML Schema tree is copied. Codelists are shared copies of those in the original, and Rulesets share their immutable Rules with those in the original.
+
+    Note:
+        This is much faster than a `deepcopy()`, since no Codes or Rules are copied.
+
+    """
+    def copy_of_ruleset(ruleset_to_copy):
+        """Copy a Ruleset, giving it a new set of Rules and no statistics."""
+        ruleset_copy = copy.copy(ruleset_to_copy)
+        ruleset_copy.rules = set(ruleset_to_copy.rules)
+        ruleset_copy.statistics = iati.rulesets.RulesetStatistics()
+        return ruleset_copy
 
+    schema_copy = copy.copy(schema)
+    schema_copy._schema_base_tree = copy.deepcopy(schema._schema_base_tree)  # pylint: disable=protected-access
+    if schema._flattened_base_tree is not None:  # pylint: disable=protected-access
+        # the copied tree has the same content, so the copy can use the flattened tree that has already been calculated
+        schema_copy._flattened_base_tree = (schema_copy._schema_base_tree,) + schema._flattened_base_tree[1:]  # pylint: disable=protected-access
+    schema_copy.codelists = set(codelist_to_copy.shared_copy() for codelist_to_copy in schema.codelists)
+    schema_copy.rulesets = set(copy_of_ruleset(ruleset_to_copy) for ruleset_to_copy in schema.rulesets)
 
-@iati.version.decimalise_integer
-@iati.version.normalise_decimals
-@iati.version.allow_known_version
+    return schema_copy
+
+
+@iati.version.normalise_known_version
 def activity_schema(version, populate=True):
     """Return the default Activity Schema for the specified version of the Standard.
 
@@ -307,13 +484,14 @@ def activity_schema(version, populate=True):
     Returns:
         iati.ActivitySchema: An instantiated IATI Schema for the specified version of the Standard.
 
+    Note:
+        The Schema is loaded once and cached. Each call returns a copy that may be modified without affecting the cache.
+
     """
-    return _schema(iati.resources.get_activity_schema_paths, iati.ActivitySchema, version, populate)
+    return _copy_of_schema(_schema(iati.resources.get_activity_schema_paths, iati.ActivitySchema, version, populate, True))
 
 
-@iati.version.decimalise_integer
-@iati.version.normalise_decimals
-@iati.version.allow_known_version
+@iati.version.normalise_known_version
 def organisation_schema(version, populate=True):
     """Return the default Organisation Schema for the specified version of the Standard.
 
@@ -327,5 +505,71 @@ def organisation_schema(version, populate=True):
     Returns:
         iati.OrganisationSchema: An instantiated IATI Schema for the specified version of the Standard.
 
+    Note:
+        The Schema is loaded once and cached. Each call returns a copy that may be modified without affecting the cache.
+
+    """
+    return _copy_of_schema(_schema(iati.resources.get_organisation_schema_paths, iati.OrganisationSchema, version, populate, True))
+
+
+PRELOAD_COMPONENTS = {
+    'codelists': lambda version: _codelists(version, True),
+    'codelist_mapping': codelist_mapping,
+    'ruleset': ruleset,
+    'activity_schema': activity_schema,
+    'organisation_schema': organisation_schema
+}
+"""The components of default data that may be loaded by `preload()`, along with a function to load each component for a version of the Standard."""
+
+
+def preload(versions=None, components=None, max_workers=None, freeze=False):
+    """Load default data into the caches ahead of time, so that it is not loaded when first needed.
+
+    Args:
+        versions (list of (str / Decimal / iati.Version)): The versions of the Standard to load default data for. Defaults to every fully supported version.
+        components (list of str): The components of default data to load. Each must be a key of `PRELOAD_COMPONENTS`. Defaults to every component.
+        max_workers (int): The maximum number of threads to load components with. Defaults to the default for `concurrent.futures.ThreadPoolExecutor`.
+        freeze (bool): Whether to move every object that has been loaded into the permanent generation of the garbage collector with `gc.freeze()` once loading is complete. This has no effect before Python 3.7.
+
+    Returns:
+        dict: The time in seconds taken to load each component. Keys are `(version, component)` tuples, where `version` is as provided.
+
+    Raises:
+        ValueError: When a specified component is not a component of default data.
+        ValueError: When a specified version is not a valid version of the IATI Standard.
+
+    Note:
+        Components are loaded concurrently, since reading files and parsing XML release the GIL.
+        Components that depend on one another, such as Codelists and populated Schemas, wait for a single load of the data they share.
+
+        When called in a process that then forks, such as the master of a pre-fork web server, each worker inherits the loaded data.
+        Freezing the garbage collector stops collections within workers from writing to the memory pages holding this data, which would otherwise copy the pages into each worker.
+
+    Warning:
+        Rulesets are not cached in memory. Loading the `ruleset` component stores a precompiled form in the on-disk cache, while populated Schemas hold the Standard Ruleset in memory.
+
     """
-    return _schema(iati.resources.get_organisation_schema_paths, iati.OrganisationSchema, version, populate)
+    if versions is None:
+        versions = iati.version.STANDARD_VERSIONS_SUPPORTED
+    if components is None:
+        components = list(PRELOAD_COMPONENTS.keys())
+
+    unknown_components = set(components) - set(PRELOAD_COMPONENTS.keys())
+    if unknown_components:
+        raise ValueError('Unknown components of default data: {0}'.format(', '.join(sorted(unknown_components))))
+
+    def timed_load(version, component):
+        """Load a component for a version, returning the time taken."""
+        start = timeit.default_timer()
+        PRELOAD_COMPONENTS[component](version)
+        return timeit.default_timer() - start
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {(version, component): executor.submit(timed_load, version, component) for version in versions for component in components}
+        load_times = {key: future.result() for key, future in futures.items()}
+
+    if freeze and hasattr(gc, 'freeze'):
+        gc.collect()
+        gc.freeze()  # pylint: disable=no-member
+
+    return load_times
@@ -0,0 +1,321 @@
+"""A module containing the logging subsystem used by `iati.utilities.log()` and its variants.
+
+Logging is configured once, the first time that a message is logged, rather than on every call.
+Records are placed on a queue by the thread that logs them and written by a background `QueueListener`, so logging never blocks on disk I/O.
+Repeated records are dropped before they reach the queue: each message template is rate limited, and identical messages are de-duplicated, within each period.
+Where records were dropped, the next record that is written from the same template states how many were suppressed.
+
+Records are written as JSON objects, one per line, to the file named by the `IATI_LOG_FILE` environment variable.
+Where this is not set, `iatilib.log` within the current working directory is used. Setting `IATI_LOG_FILE` to an empty string disables the log file.
+
+Example:
+    To send records to your own handlers instead of the log file::
+
+        iati.logs.configure(handlers=[logging.StreamHandler()])
+
+    To stop pyIATI from logging anything, for example before validating many Datasets::
+
+        iati.logs.disable()
+
+"""
+import atexit
+import collections
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+import iati.constants
+
+
+LOG_FILE_ENV_VAR = 'IATI_LOG_FILE'
+"""The name of the environment variable that specifies the log file."""
+
+RATE_LIMIT = 10
+"""The default number of records from the same message template that are written within each period."""
+
+RATE_LIMIT_PERIOD = 60.0
+"""The default length of the period over which records are rate limited, in seconds."""
+
+_DEFAULT_FILENAME = object()
+"""A sentinel to indicate that the log file should be located using `IATI_LOG_FILE`."""
+
+_LOG_RECORD_ATTRIBUTES = frozenset(logging.LogRecord('', logging.NOTSET, '', 0, '', None, None).__dict__) | {'message', 'asctime', 'suppressed'}
+"""The attributes of every LogRecord. Any other attributes were given with `extra` and are included within structured records."""
+
+_TEXT_FORMAT = '%(asctime)s %(levelname)s:%(name)s: %(message)s %(stack_info)s'
+"""The format of records that are not structured."""
+
+_state = {'pid': None, 'settings': None, 'listener': None, 'queue_handler': None, 'file_handler': None}
+"""The configuration of the logging subsystem, along with the ID of the process that configured it. Guarded by `_lock`."""
+
+_lock = threading.Lock()
+"""A lock that guards `_state`."""
+
+
+class JSONFormatter(logging.Formatter):
+    """A formatter that represents each record as a single-line JSON object.
+
+    Each object contains the time, level, logger name, message and source location of the record.
+    The formatted exception and stack are included where present, as is the number of records that were suppressed, along with any values given with `extra`.
+
+    """
+
+    def format(self, record):
+        """Format a record as a JSON object.
+
+        Args:
+            record (logging.LogRecord): The record to format.
+
+        Returns:
+            str: A JSON object representing the record, without any newlines.
+
+        """
+        structured = collections.OrderedDict([
+            ('time', datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'),
+            ('level', record.levelname),
+            ('logger', record.name),
+            ('message', record.getMessage()),
+            ('module', record.module),
+            ('line', record.lineno)
+        ])
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            structured['exception'] = record.exc_text
+        if record.stack_info:
+            structured['stack'] = self.formatStack(record.stack_info)
+        if getattr(record, 'suppressed', 0):
+            structured['suppressed'] = record.suppressed
+
+        for name, value in record.__dict__.items():
+            if name not in _LOG_RECORD_ATTRIBUTES:
+                structured[name] = value
+
+        return json.dumps(structured, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """A filter that rate limits and de-duplicates records.
+
+    Records are grouped by their logger, level and message template. Within each period, at most `rate_limit` records from each group pass the filter, and each distinct message passes once.
+    The first record from a group to pass in a later period is given a `suppressed` attribute counting the records that were dropped from the group in the meantime.
+
+    Note:
+        At most `max_groups` groups are tracked. The least recently seen group is forgotten where there are more.
+
+    """
+
+    def __init__(self, rate_limit=RATE_LIMIT, period=RATE_LIMIT_PERIOD, max_groups=1024, clock=time.monotonic):
+        """Initialise a RateLimitFilter.
+
+        Args:
+            rate_limit (int): The number of records from each group that pass the filter within each period.
+            period (float): The length of each period, in seconds.
+            max_groups (int): The number of groups of records to track.
+            clock (function): A function that returns the current time in seconds. Intended for use by tests.
+
+        """
+        super(RateLimitFilter, self).__init__()
+        self.rate_limit = rate_limit
+        self.period = period
+        self.max_groups = max_groups
+        self._clock = clock
+        self._groups = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        """Determine whether a record should be logged.
+
+        Args:
+            record (logging.LogRecord): The record to check.
+
+        Returns:
+            bool: Whether the record should be logged.
+
+        """
+        key = (record.name, record.levelno, str(record.msg))
+        message = record.getMessage()
+        now = self._clock()
+
+        with self._lock:
+            try:
+                group = self._groups.pop(key)
+            except KeyError:
+                group = {'start': now, 'messages': set(), 'suppressed': 0}
+            self._groups[key] = group
+
+            if len(self._groups) > self.max_groups:
+                self._groups.popitem(last=False)
+
+            if now - group['start'] >= self.period:
+                group['start'] = now
+                group['messages'] = set()
+
+            if message in group['messages'] or len(group['messages']) >= self.rate_limit:
+                group['suppressed'] += 1
+                return False
+
+            group['messages'].add(message)
+            record.suppressed = group['suppressed']
+            group['suppressed'] = 0
+
+        return True
+
+
+class _StructuredQueueHandler(logging.handlers.QueueHandler):
+    """A QueueHandler that keeps the structure of records, rather than replacing them with a formatted string.
+
+    The message is rendered and the exception formatted before the record is placed on the queue, since its arguments may be modified or be unpicklable by the time the record is written.
+
+    """
+
+    def prepare(self, record):
+        """Prepare a record for placing on the queue.
+
+        Args:
+            record (logging.LogRecord): The record to prepare.
+
+        Returns:
+            logging.LogRecord: A copy of the record, with its message rendered and any exception formatted.
+
+        """
+        prepared = logging.makeLogRecord(record.__dict__)
+        prepared.msg = record.getMessage()
+        prepared.args = None
+
+        if record.exc_info:
+            prepared.exc_text = logging.Formatter().formatException(record.exc_info)
+        prepared.exc_info = None
+
+        return prepared
+
+
+def configure(filename=_DEFAULT_FILENAME, handlers=None, level=logging.DEBUG, rate_limit=RATE_LIMIT, period=RATE_LIMIT_PERIOD, structured=True):
+    """Configure the logging subsystem, replacing any previous configuration.
+
+    Args:
+        filename (str or None): The path of the log file. Located using the `IATI_LOG_FILE` environment variable where not specified. None to not write a log file.
+        handlers (list of logging.Handler): The handlers to send records to, in addition to the log file. These are called from the background thread.
+        level (int): The lowest level of record that is logged.
+        rate_limit (int): The number of records from the same message template that are logged within each period. None to log every record.
+        period (float): The length of the period over which records are rate limited, in seconds.
+        structured (bool): Whether records are written to the log file as JSON. Otherwise, they are written as text.
+
+    Note:
+        This need not be called where the defaults are suitable, since it is called the first time a message is logged.
+
+        Records are not passed on to the root logger, so that they are only written by the background thread.
+
+        The background thread does not survive `os.fork()`. A child process configures the subsystem again with the same settings the first time that it logs a message.
+
+    """
+    settings = {'filename': filename, 'handlers': handlers, 'level': level, 'rate_limit': rate_limit, 'period': period, 'structured': structured}
+
+    if filename is _DEFAULT_FILENAME:
+        filename = os.environ.get(LOG_FILE_ENV_VAR, iati.constants.LOG_FILE_NAME) or None
+
+    handlers = list(handlers or [])
+    file_handler = None
+    if filename is not None:
+        file_handler = logging.FileHandler(filename, delay=True)
+        file_handler.setFormatter(JSONFormatter() if structured else logging.Formatter(_TEXT_FORMAT))
+        handlers.append(file_handler)
+
+    with _lock:
+        _stop()
+        logger = logging.getLogger(iati.constants.LOGGER_NAME)
+
+        if handlers:
+            log_queue = queue.Queue()
+            queue_handler = _StructuredQueueHandler(log_queue)
+            if rate_limit is not None:
+                queue_handler.addFilter(RateLimitFilter(rate_limit, period))
+
+            logger.addHandler(queue_handler)
+            _state['listener'] = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+            _state['listener'].start()
+            _state['queue_handler'] = queue_handler
+            _state['file_handler'] = file_handler
+
+        logger.setLevel(level if handlers else logging.CRITICAL + 1)
+        logger.propagate = False
+        _state['pid'] = os.getpid()
+        _state['settings'] = settings
+
+
+def disable():
+    """Stop pyIATI from logging anything.
+
+    Calls to `iati.utilities.log()` and its variants then return without creating a record.
+
+    """
+    configure(filename=None)
+
+
+def get_logger():
+    """Return the primary IATI Logger, configuring the logging subsystem with its defaults if it has not yet been configured within this process.
+
+    Returns:
+        logging.Logger: The primary IATI Logger.
+
+    """
+    if _state['pid'] != os.getpid():
+        # either not yet configured, or configured by a parent process whose background thread does not exist within this one
+        configure(**(_state['settings'] or {}))
+
+    return logging.getLogger(iati.constants.LOGGER_NAME)
+
+
+def shutdown():
+    """Write any queued records, then remove the configuration of the logging subsystem.
+
+    The defaults are used again the next time that a message is logged.
+
+    """
+    with _lock:
+        _stop()
+        _state['pid'] = None
+        _state['settings'] = None
+
+
+def _stop():
+    """Stop the background thread once it has written any queued records, and remove the handler that queues records from the primary IATI Logger.
+
+    Note:
+        Where the subsystem was configured by a parent process, the background thread does not exist within this process. Its handlers are removed, and any records queued by the parent are left for the parent to write.
+
+    Warning:
+        `_lock` must be held.
+
+    """
+    logger = logging.getLogger(iati.constants.LOGGER_NAME)
+
+    if _state['queue_handler'] is not None:
+        logger.removeHandler(_state['queue_handler'])
+        _state['queue_handler'] = None
+
+    if _state['listener'] is not None:
+        if _state['pid'] == os.getpid():
+            _state['listener'].stop()
+        _state['listener'] = None
+
+    if _state['file_handler'] is not None:
+        _state['file_handler'].close()
+        _state['file_handler'] = None
+
+
+def _reset_lock_after_fork():
+    """Replace the lock that guards the configuration within a child process, since it may have been held by another thread of the parent when it forked."""
+    global _lock  # pylint: disable=global-statement,invalid-name
+    _lock = threading.Lock()
+
+
+atexit.register(shutdown)
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_lock_after_fork)
@@ -11,19 +11,16 @@ Todo:
     Determine how to distribute SSOT content - with package, or separately (being downloaded at runtime).
 
 """
+import functools
 import inspect
 import os
 import re
-import pkg_resources
+import iati.bundle
 import iati.version
 
 
 PACKAGE = __name__
-"""The name of the resources package.
-
-Used to locate resources when the package is distributed in certain ways that do not provide a standard filesystem.
-
-"""
+"""The name of the resources module."""
 
 BASE_PATH = 'resources'
 """The relative location of the resources folder."""
@@ -60,6 +57,9 @@ FILE_SCHEMA_ACTIVITY_NAME = 'iati-activities-schema'
 FILE_SCHEMA_ORGANISATION_NAME = 'iati-organisations-schema'
 """The name of a file containing an Organisation Schema."""
 
+_PORTABLE_COMPONENT = re.compile('^[_.A-Za-z0-9][-_.A-Za-z0-9]*$')
+"""A regex matching a single component of a portable filepath."""
+
 
 @iati.version.decimalise_integer
 @iati.version.allow_possible_version
@@ -88,19 +88,14 @@ def get_codelist_paths(version):
         Look to provide an argument that allows the returned list to be restricted to only Embedded or only Non-Embedded Codelists (or both!).
 
     """
-    paths = []
-
     try:
         folder_path = path_for_version(PATH_CODELISTS, version)
     except ValueError:
-        folder_path = ''
+        return []
 
-    if os.path.isdir(folder_path):
-        files = pkg_resources.resource_listdir(PACKAGE, os.path.join(*folder_path[len(resource_filesystem_path('')):].split(os.sep)))
-        files_codelists_only = [file_name for file_name in files if file_name[-4:] == FILE_CODELIST_EXTENSION]
-        paths = [create_codelist_path(file_name, version) for file_name in files_codelists_only]
+    files = _manifest().get(folder_path, ())
 
-    return paths
+    return [os.path.join(folder_path, file_name) for file_name in files if file_name[-4:] == FILE_CODELIST_EXTENSION]
 
 
 def get_codelist_mapping_paths(version):
@@ -230,7 +225,7 @@ def _get_paths(version, file_name, path_creation_func, supported_versions):
         # major version
         versions = [minor_ver for minor_ver in iati.version.versions_for_integer(int(version)) if minor_ver in supported_versions]
 
-    num_path_creation_func_args = len(inspect.getfullargspec(path_creation_func).args)
+    num_path_creation_func_args = _num_args(path_creation_func)
 
     for minor_ver in versions:
         try:
@@ -239,7 +234,7 @@ def _get_paths(version, file_name, path_creation_func, supported_versions):
             else:
                 created_path = path_creation_func(minor_ver)
 
-            if os.path.isfile(created_path):
+            if _resource_exists(created_path):
                 paths.append(created_path)
         except ValueError:
             pass  # there is no path to check
@@ -491,7 +486,101 @@ def resource_filesystem_path(path):
         if path != '':
             raise
 
-    return pkg_resources.resource_filename(PACKAGE, path)
+    return os.path.join(_package_path(), path)
+
+
+@functools.lru_cache(maxsize=1)
+def _package_path():
+    """Locate the package that resources are stored within.
+
+    Returns:
+        str: The file system path of the `iati` package.
+
+    Note:
+        The package is located once per process. `importlib.resources` is imported on first use, since it is slow to import.
+
+    """
+    try:
+        from importlib.resources import files
+    except ImportError:  # `importlib.resources.files()` was added in Python 3.9
+        return os.path.dirname(os.path.abspath(__file__))
+
+    return str(files(__package__))
+
+
+def _manifest():
+    """Return the manifest of the resources relating to the IATI Standard.
+
+    Returns:
+        dict: The files within each folder of Standard resources. Keys are the file system paths of folders, such as the `codelists` folder at a particular version. Values are sorted tuples of the names of the files within each folder.
+
+    Note:
+        The manifest is built on first use, so that locating resources afterwards does not need to access the file system. When resources are read from a bundle, the manifest is built from the index of the bundle. See `iati.bundle`.
+
+    Warning:
+        Files added to the resources folder after the manifest is built are not found.
+
+    """
+    return _build_manifest(iati.bundle.current_bundle())
+
+
+@functools.lru_cache(maxsize=None)
+def _build_manifest(bundle):
+    """Build a manifest of the resources relating to the IATI Standard.
+
+    Args:
+        bundle (iati.bundle.Bundle or None): The bundle to list resources from. `None` to list loose files.
+
+    Returns:
+        dict: The files within each folder of Standard resources, as described by `_manifest()`.
+
+    """
+    manifest = dict()
+
+    if bundle is not None:
+        standard_path = resource_filesystem_path(BASE_PATH_STANDARD)
+        for name in bundle.names():
+            folder_path, file_name = os.path.split(iati.bundle.path_for_name(name))
+            if folder_path == standard_path or folder_path.startswith(standard_path + os.sep):
+                manifest.setdefault(folder_path, []).append(file_name)
+        return {folder_path: tuple(sorted(file_names)) for folder_path, file_names in manifest.items()}
+
+    for folder_path, _, file_names in os.walk(resource_filesystem_path(BASE_PATH_STANDARD)):
+        manifest[folder_path] = tuple(sorted(file_name for file_name in file_names if os.path.isfile(os.path.join(folder_path, file_name))))
+
+    return manifest
+
+
+def _resource_exists(path):
+    """Determine whether there is a file at the specified path.
+
+    Args:
+        path (str): The file system path to check.
+
+    Returns:
+        bool: Whether there is a file at the path. Paths within the Standard resources are checked against the manifest. Other paths are checked on the file system.
+
+    """
+    folder_path, file_name = os.path.split(path)
+
+    try:
+        return file_name in _manifest()[folder_path]
+    except KeyError:
+        return os.path.isfile(path)
+
+
+@functools.lru_cache(maxsize=None)
+def _num_args(func):
+    """Count the arguments that a function takes.
+
+    Args:
+        func (func): The function to inspect.
+
+    Returns:
+        int: The number of named arguments that the function takes.
+
+    """
+    return len(inspect.getfullargspec(func).args)
 
 
 def _ensure_portable_filepath(maybe_filepath):
@@ -519,13 +608,33 @@ def _ensure_portable_filepath(maybe_filepath):
     if not isinstance(maybe_filepath, str):
         raise TypeError('A filesystem path must be a string. The provided value is a {0}.'.format(type(maybe_filepath)))
 
-    path_components = maybe_filepath.split(os.path.sep)
+    problem_component = _non_portable_component(maybe_filepath)
+    if problem_component is not None:
+        raise ValueError('Each component in a permitted filepath must only include the following characters: A-Z a-z 0-9 . _ - (Problem component: {0} Actual path: {1})'.format(problem_component, maybe_filepath))
+
+
+@functools.lru_cache(maxsize=4096)
+def _non_portable_component(filepath):
+    """Locate the first component of a filepath that is not portable.
+
+    Args:
+        filepath (str): The filepath to check.
+
+    Returns:
+        str or None: The first component that is not portable. `None` if every component is portable.
+
+    Note:
+        The same paths are checked many times while locating resources, so the result for each path is cached.
+
+    """
+    path_components = filepath.split(os.path.sep)
 
-    # allow there to be a trailing folder separator on the input maybe_filepath
+    # allow there to be a trailing folder separator on the input filepath
     if len(path_components) > 1 and path_components[-1] == '':
         path_components.pop()
 
-    permitted_component_regex = re.compile('^[_.A-Za-z0-9][-_.A-Za-z0-9]*$')
     for component in path_components:
-        if re.match(permitted_component_regex, component) is None:
-            raise ValueError('Each component in a permitted filepath must only include the following characters: A-Z a-z 0-9 . _ - (Problem component: {0} Actual path: {1})'.format(component, maybe_filepath))
+        if _PORTABLE_COMPONENT.match(component) is None:
+            return component
+
+    return None
@@ -7,25 +7,250 @@ Todo:
 
 """
 # no-member errors are due to using `setattr()` # pylint: disable=no-member
-import collections
+import copy
 import decimal
+import functools
+import hashlib
+import itertools
 import json
+import math
+import pickle
 import re
 import sre_constants
+import threading
+import timeit
 from datetime import datetime
-import jsonschema
+from lxml import etree
+import iati.cache
 import iati.default
 import iati.utilities
 
 
+_NATIVE_SUM_MAX_VALUE_LENGTH = 15
+"""The maximum length of a value that a RuleSum will sum natively. An integer value of this length is exactly representable as a floating point number."""
+
+_NATIVE_SUM_MAX_VALUES = 9
+"""The maximum number of values that a RuleSum will sum natively. The total of this many integers of the maximum length is below 2 ** 53, so floating point addition is exact."""
+
+_INEXACT_SUM_VALUE_PREDICATE = 'node()[not(self::text())] or translate(normalize-space(.), "-0123456789", "") or string-length(normalize-space(.)) > {0}'.format(_NATIVE_SUM_MAX_VALUE_LENGTH)
+"""An XPath predicate matching values that a RuleSum cannot sum natively. These are values containing anything other than an integer that is short enough to be represented exactly as a floating point number."""
+
+_CONTEXT_FUNCTION_PATTERN = re.compile(r'\b(?:position|last)\s*\(')
+"""A pattern matching calls to the XPath functions that depend on the position of the context node within the node-set being evaluated."""
+
 _VALID_RULE_TYPES = ["atleast_one", "dependent", "sum", "date_order", "no_more_than_one", "regex_matches", "regex_no_matches", "startswith", "unique"]
 
 
+@functools.lru_cache(maxsize=1024)
+def _compiled_xpath(expression):
+    """Compile an XPath expression so that it may be evaluated against many elements without being parsed each time.
+
+    Args:
+        expression (str): An XPath expression.
+
+    Returns:
+        etree.XPath: The compiled expression. String results are returned as plain `str` values rather than smart strings.
+
+    Raises:
+        etree.XPathSyntaxError: When the expression is not valid XPath.
+
+    Note:
+        Compiled expressions cannot be copied or pickled, so are cached here against the expression rather than being stored on Rules.
+
+    """
+    return etree.XPath(expression, smart_strings=False)
+
+
+def _aggregate_xpath(function_template, operator, paths):
+    """Compile an XPath expression that combines the result of applying an XPath function to each of a number of paths.
+
+    Args:
+        function_template (str): A format string for the XPath function call to apply to each path, such as `'count({0})'`.
+        operator (str): The XPath operator to combine the function results with, such as `' + '`.
+        paths (iterable of str): The XPath expressions to apply the function to.
+
+    Returns:
+        etree.XPath: The compiled aggregate expression.
+
+    """
+    return _compiled_xpath(operator.join(function_template.format(path) for path in paths))
+
+
+_CUSTOM_RULE_TYPES = dict()
+"""The custom types of Rule that have been registered, mapped to their constructor and the JSONSchema for a single case.
+
+{
+    "rule_type": (constructor, case_schema)
+}
+
+"""
+
+
+def register_rule_type(rule_type, constructor, case_schema):
+    """Register a custom type of Rule so that it may be used within Rulesets alongside the types of Rule defined by the Standard.
+
+    Args:
+        rule_type (str): The name of the type of Rule, as used within a JSON Ruleset.
+        constructor (type): A subclass of Rule that sets its `_name` to `rule_type`. This may implement `check_batch()` to check all context elements at once.
+        case_schema (dict): A JSONSchema for a single case of the Rule. All properties other than `condition` are required. A `condition` property is added if not present.
+
+    Raises:
+        TypeError: When the constructor is not a subclass of Rule.
+        ValueError: When a type of Rule with the same name already exists.
+
+    """
+    if not isinstance(constructor, type) or not issubclass(constructor, Rule):
+        raise TypeError('Custom types of Rule must inherit from iati.Rule.')
+    if rule_type in _VALID_RULE_TYPES or rule_type in _CUSTOM_RULE_TYPES:
+        raise ValueError('A type of Rule called `{0}` already exists.'.format(rule_type))
+
+    case_schema = copy.deepcopy(case_schema)
+    case_schema.setdefault('properties', dict()).setdefault('condition', {'type': 'string'})
+
+    _CUSTOM_RULE_TYPES[rule_type] = (constructor, case_schema)
+
+
+def unregister_rule_type(rule_type):
+    """Remove a custom type of Rule that has been registered.
+
+    Args:
+        rule_type (str): The name of the type of Rule.
+
+    Raises:
+        KeyError: When no custom type of Rule with the given name has been registered.
+
+    """
+    del _CUSTOM_RULE_TYPES[rule_type]
+
+
+def _ruleset_schema():
+    """Return the Ruleset Schema, extended to permit any custom types of Rule that have been registered.
+
+    Returns:
+        dict: A dictionary representing the Ruleset Schema.
+
+    """
+    ruleset_schema = iati.default.ruleset_schema()
+    rule_type_schemas = ruleset_schema['patternProperties']['.+']['properties']
+
+    for rule_type, (_, case_schema) in _CUSTOM_RULE_TYPES.items():
+        rule_type_schemas[rule_type] = {
+            'type': 'object',
+            'additionalProperties': False,
+            'properties': {'cases': {'type': 'array', 'items': copy.deepcopy(case_schema)}}
+        }
+
+    return ruleset_schema
+
+
+def _combine_batch_results(results):
+    """Combine the results of checking a batch of context elements into a single result.
+
+    Args:
+        results (bool or None or iterable): Either a result for the whole batch, or a result for each context element in turn.
+
+    Returns:
+        bool or None: The result for the whole batch. This is the first result that is not `True`, or `True` when there is no such result.
+
+    """
+    if results is None or isinstance(results, bool):
+        return results
+
+    # NumPy arrays of booleans can be checked without iterating over them in Python
+    if getattr(results, 'dtype', None) == bool:
+        return bool(results.all())
+
+    for result in results:
+        if result is None:
+            return None
+        elif not result:
+            return False
+    return True
+
+
+class _DatasetQueries:
+    """The results of the XPath queries made while checking a single Dataset against Rules.
+
+    Rules within a Ruleset share many of the same contexts and conditions. Each distinct context and condition is evaluated once per Dataset, and the results shared between Rules.
+
+    Attributes:
+        dataset (iati.Dataset): The Dataset that queries are evaluated against.
+
+    """
+
+    def __init__(self, dataset):
+        """Initialise the results of queries against a Dataset.
+
+        Args:
+            dataset (iati.Dataset): The Dataset to evaluate queries against.
+
+        Raises:
+            TypeError: When a Dataset is not given as an argument.
+
+        """
+        if not hasattr(dataset, 'xml_tree'):
+            raise TypeError
+
+        self.dataset = dataset
+        self._context_elements = dict()
+        self._elements_meeting_condition = dict()
+
+    def context_elements(self, rule):
+        """Locate the context elements for a Rule.
+
+        Args:
+            rule (iati.Rule): The Rule to locate context elements for.
+
+        Returns:
+            list of etree._Element: The elements matched by the Rule context.
+
+        """
+        try:
+            return self._context_elements[rule.context]
+        except KeyError:
+            context_elements = rule._find_context_elements(self.dataset)  # pylint: disable=protected-access
+            self._context_elements[rule.context] = context_elements
+            return context_elements
+
+    def elements_meeting_condition(self, rule):
+        """Locate the context elements that meet the condition of a Rule.
+
+        Args:
+            rule (iati.Rule): The Rule to locate the context elements meeting the condition of.
+
+        Returns:
+            set of etree._Element: The context elements for which the condition is true.
+
+        Raises:
+            AttributeError: When the Rule does not have a condition.
+            etree.XPathEvalError: When the condition cannot be evaluated against a context element.
+
+        Note:
+            Every context element is normally filtered in a single XPath pass with `(context)[boolean(condition)]`.
+            Within that predicate, `position()` and `last()` refer to the position of the element among all context elements. Conditions that use either are instead evaluated against each context element alone, as when checking one element at a time.
+            lxml then raises an `etree.XPathEvalError` since a lone element has no context position or size.
+            The elements returned are the same objects as those returned by `context_elements()`, since lxml reuses the Python proxy for an element while a reference to it is held.
+
+        Warning:
+            Current implementation may be vulnerable to XPath injection vulnerabilities.
+
+        """
+        key = (rule.context, rule.condition)
+        if key not in self._elements_meeting_condition:
+            if _CONTEXT_FUNCTION_PATTERN.search(rule.condition):
+                condition_xpath = _compiled_xpath(rule.condition)
+                self._elements_meeting_condition[key] = set(context_element for context_element in self.context_elements(rule) if condition_xpath(context_element))
+            else:
+                self._elements_meeting_condition[key] = set(_compiled_xpath('({0})[boolean({1})]'.format(rule.context, rule.condition))(self.dataset.xml_tree))
+
+        return self._elements_meeting_condition[key]
+
+
 def constructor_for_rule_type(rule_type):
     """Locate the constructor for specific Rule types.
 
     Args:
-        rule_type (str): The name of the type of Rule to identify the class for.
+        rule_type (str): The name of the type of Rule to identify the class for. This may be a type of Rule defined by the Standard, or a custom type that has been registered using `register_rule_type()`.
 
     Returns:
         type: A constructor for a class that inherits from Rule.
@@ -34,6 +259,9 @@ def constructor_for_rule_type(rule_type):
         KeyError: When a non-permitted `rule_type` is provided.
 
     """
+    if rule_type in _CUSTOM_RULE_TYPES:
+        return _CUSTOM_RULE_TYPES[rule_type][0]
+
     possible_rule_types = {
         'atleast_one': RuleAtLeastOne,
         'date_order': RuleDateOrder,
@@ -49,11 +277,92 @@ def constructor_for_rule_type(rule_type):
     return possible_rule_types[rule_type]
 
 
+_PRECOMPILED_FORMAT = 2
+"""The version of the format that precompiled Rulesets are stored in. This should be incremented whenever the attributes of Rulesets or Rules change, so that Rulesets precompiled by an earlier format are not loaded from the cache."""
+
+
+def dump_precompiled(ruleset):
+    """Dump a Ruleset to a precompiled form that can be loaded without parsing or validating it again.
+
+    Args:
+        ruleset (iati.Ruleset): The Ruleset to dump.
+
+    Returns:
+        bytes: The precompiled Ruleset.
+
+    """
+    return pickle.dumps(ruleset, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_precompiled(precompiled_ruleset):
+    """Load a Ruleset from the precompiled form produced by `dump_precompiled()`.
+
+    Args:
+        precompiled_ruleset (bytes): The precompiled Ruleset.
+
+    Returns:
+        iati.Ruleset: The Ruleset. The Ruleset Schema is not checked, since the Ruleset was checked before it was dumped.
+
+    Raises:
+        ValueError: When the precompiled Ruleset cannot be loaded, or does not contain a Ruleset.
+
+    Warning:
+        Precompiled Rulesets are loaded using `pickle`. Only load precompiled Rulesets from trusted sources.
+
+    """
+    try:
+        ruleset = pickle.loads(precompiled_ruleset)
+    except Exception:  # pylint: disable=broad-except
+        # unpickling can raise almost any type of exception when given data that is corrupt or from an incompatible version
+        raise ValueError('Provided precompiled Ruleset could not be loaded.')
+
+    if not isinstance(ruleset, Ruleset):
+        raise ValueError('Provided precompiled Ruleset does not contain a Ruleset.')
+
+    return ruleset
+
+
+def cached_ruleset(ruleset_str):
+    """Create a Ruleset, loading a precompiled form from the on-disk cache where possible.
+
+    Args:
+        ruleset_str (str): A string that represents a Ruleset.
+
+    Returns:
+        iati.Ruleset: The Ruleset represented by `ruleset_str`.
+
+    Raises:
+        TypeError: When `ruleset_str` is not a string.
+        ValueError: When `ruleset_str` does not validate against the Ruleset Schema or cannot be correctly decoded.
+
+    Note:
+        Precompiled Rulesets are keyed by the content of `ruleset_str`, the custom types of Rule that are registered, the precompiled format, and the versions of pyIATI and Python. A change to any of these means that the Ruleset is built and stored again.
+
+    """
+    if not isinstance(ruleset_str, str):
+        raise TypeError('Provided Ruleset string is not a string.')
+
+    key = iati.cache.cache_key(ruleset_str, _PRECOMPILED_FORMAT, *sorted(_CUSTOM_RULE_TYPES))
+    precompiled_ruleset = iati.cache.load('rulesets', key)
+
+    if precompiled_ruleset is not None:
+        try:
+            return load_precompiled(precompiled_ruleset)
+        except ValueError:
+            pass
+
+    ruleset = Ruleset(ruleset_str)
+    iati.cache.store('rulesets', key, dump_precompiled(ruleset))
+
+    return ruleset
+
+
 class Ruleset:
     """Representation of a Ruleset as defined within the IATI SSOT.
 
     Attributes:
         rules (set): The Rules contained within this Ruleset.
+        statistics (iati.rulesets.RulesetStatistics): The time taken to check each Rule and how often each fails. This determines the order that Rules are checked in by `is_valid_for()`. Statistics are only recorded by checks that ask for them to be.
 
     """
 
@@ -69,6 +378,7 @@ class Ruleset:
 
         """
         self.rules = set()
+        self.statistics = RulesetStatistics()
 
         if ruleset_str is None:
             ruleset_str = ''
@@ -94,7 +404,7 @@ class Ruleset:
 
         This allows uniqueness to be correctly defined upon insertion into a set.
         """
-        return collections.Counter(self.rules) == collections.Counter(other.rules)
+        return set(self.rules) == set(other.rules)
 
     def __ne__(self, other):
         """Check Ruleset inequality."""
@@ -107,11 +417,40 @@ class Ruleset:
         """
         return hash(id(self))
 
-    def is_valid_for(self, dataset):
+    @property
+    def rules(self):
+        """:obj:`set` of :obj:`iati.Rule`: The Rules contained within this Ruleset.
+
+        Note:
+            A set of Rules that is assigned is copied, so that the Ruleset can detect when its Rules are modified.
+
+        """
+        return self._rules
+
+    @rules.setter
+    def rules(self, rules):
+        """Replace the Rules within the Ruleset with a copy of the given Rules."""
+        self._rules = _RuleSet(rules)
+
+    @property
+    def fingerprint(self):
+        """str: A SHA-256 hex digest of the Rules within the Ruleset.
+
+        Equal Rulesets have the same fingerprint. Unlike the hash of a Ruleset, the fingerprint depends on the content of the Ruleset, and is the same in every Python process.
+
+        Note:
+            The fingerprint is calculated once, and calculated again only when the Rules are modified.
+
+        """
+        return self.rules.derived('fingerprint', _fingerprint_rules)
+
+    def is_valid_for(self, dataset, now=None, record_statistics=False):
         """Validate a Dataset against the Ruleset.
 
         Args:
             Dataset (iati.Dataset): A Dataset to be checked for validity against the Ruleset.
+            now (datetime.datetime): The date and time to treat as the present for all Rules in the Ruleset. Defaults to the time at which the check starts.
+            record_statistics (bool): Whether the time taken to check each Rule, and whether the Dataset is valid against it, is recorded in `statistics`.
 
         Returns:
             bool:
@@ -119,19 +458,86 @@ class Ruleset:
 
                 `False` when part or all of the Dataset is not valid against the Ruleset.
 
+        Note:
+            Checking stops at the first Rule that the Dataset is not valid against. Rules are checked in the order given by `statistics`, so that Rules that are cheap to check and often fail are checked first.
+
         Todo:
             Better design how Skips and ValueErrors are treated. The current True/False/Skip/Error thing is a bit clunky.
 
         """
-        for rule in self.rules:
-            try:
-                if rule.is_valid_for(dataset) is False:
-                    return False
-            except ValueError:
+        if not self.rules:
+            return True
+
+        if now is None:
+            now = datetime.today()
+
+        queries = _DatasetQueries(dataset)
+
+        for rule in self.statistics.ordered(self.rules):
+            if self._timed_result_for(rule, queries, now, record_statistics=record_statistics) is False:
                 return False
 
         return True
 
+    def results_for(self, dataset, now=None, record_statistics=False):
+        """Check a Dataset against each Rule in the Ruleset.
+
+        Args:
+            dataset (iati.Dataset): A Dataset to be checked for validity against the Ruleset.
+            now (datetime.datetime): The date and time to treat as the present for all Rules in the Ruleset. Defaults to the time at which the check starts.
+            record_statistics (bool): Whether the time taken to check each Rule, and whether the Dataset is valid against it, is recorded in `statistics`.
+
+        Returns:
+            list of tuple: A `(rule, result)` tuple for each Rule in the Ruleset, where `result` is the value that `rule.is_valid_for()` returns for the Dataset.
+
+        Raises:
+            TypeError: When a Dataset is not given as an argument.
+            ValueError: When a Rule encounters a completely incorrect value that it is unable to recover from.
+
+        """
+        if now is None:
+            now = datetime.today()
+
+        queries = _DatasetQueries(dataset)
+
+        results = list()
+        for rule in self.rules:
+            result = self._timed_result_for(rule, queries, now, raise_errors=True, record_statistics=record_statistics)
+            results.append((rule, result))
+
+        return results
+
+    def _timed_result_for(self, rule, queries, now, raise_errors=False, record_statistics=False):
+        """Check a Dataset against a Rule, optionally recording the time taken and whether the Dataset is valid in `statistics`.
+
+        Args:
+            rule (iati.Rule): The Rule to check the Dataset against.
+            queries (_DatasetQueries): The results of queries against the Dataset, shared between Rules.
+            now (datetime.datetime): The date and time to treat as the present.
+            raise_errors (bool): Whether a ValueError raised by the Rule is passed on. When `False`, a result of `False` is given instead.
+            record_statistics (bool): Whether the check is recorded in `statistics`.
+
+        Returns:
+            bool or None: The value that `rule.is_valid_for()` returns for the Dataset.
+
+        Raises:
+            ValueError: When a Rule encounters a completely incorrect value and `raise_errors` is `True`.
+
+        """
+        start = timeit.default_timer()
+        try:
+            result = rule._result_for(queries, now)  # pylint: disable=protected-access
+        except ValueError:
+            if record_statistics:
+                self.statistics.record(rule, timeit.default_timer() - start, True)
+            if raise_errors:
+                raise
+            return False
+
+        if record_statistics:
+            self.statistics.record(rule, timeit.default_timer() - start, result is False)
+        return result
+
     def _validate_ruleset(self, ruleset_dict):
         """Validate a Ruleset against the Ruleset Schema.
 
@@ -142,8 +548,10 @@ class Ruleset:
             ValueError: When `ruleset_dict` does not validate against the Ruleset Schema.
 
         """
+        import jsonschema  # imported on first use since it is slow to import
+
         try:
-            jsonschema.validate(ruleset_dict, iati.default.ruleset_schema())
+            jsonschema.validate(ruleset_dict, _ruleset_schema())
         except jsonschema.ValidationError:
             raise ValueError('Provided Ruleset does not validate against the Ruleset Schema')
 
@@ -164,6 +572,290 @@ class Ruleset:
                     self.rules.add(new_rule)
 
 
+def _fingerprint_rules(rules):
+    """Calculate a SHA-256 hex digest of a set of Rules.
+
+    Args:
+        rules (iterable of iati.Rule): The Rules to fingerprint.
+
+    Returns:
+        str: The fingerprint of the Rules.
+
+    """
+    identities = sorted(rule._identify() for rule in rules)  # pylint: disable=protected-access
+
+    return hashlib.sha256(json.dumps(identities).encode('utf-8')).hexdigest()
+
+
+class _RuleSet(set):
+    """A set of Rules that discards values derived from its Rules whenever it is modified.
+
+    Note:
+        This is a built-in `set`, so may be used wherever the Rules of a Ruleset were previously a `set`. Operations that return a new set return a built-in `set`.
+
+    """
+
+    __slots__ = ('_derived',)
+
+    def __init__(self, rules=()):
+        """Initialise a set containing the given Rules.
+
+        Args:
+            rules (iterable of iati.Rule): The Rules in the set.
+
+        """
+        super(_RuleSet, self).__init__(rules)
+        self._derived = dict()
+
+    def derived(self, name, build_func):
+        """Return a value derived from the Rules in the set, building it where it has not been built since the set was last modified.
+
+        Args:
+            name (str): The name of the derived value.
+            build_func (func): A function that takes the Rules in the set and builds the derived value.
+
+        Returns:
+            object: The derived value.
+
+        """
+        try:
+            return self._derived[name]
+        except KeyError:
+            value = self._derived[name] = build_func(self)
+            return value
+
+    def add(self, element):
+        """Add a Rule to the set."""
+        self._derived = dict()
+        super(_RuleSet, self).add(element)
+
+    def discard(self, element):
+        """Remove a Rule from the set if it is present."""
+        self._derived = dict()
+        super(_RuleSet, self).discard(element)
+
+    def remove(self, element):
+        """Remove a Rule from the set, raising a KeyError if it is not present."""
+        self._derived = dict()
+        super(_RuleSet, self).remove(element)
+
+    def pop(self):
+        """Remove and return an arbitrary Rule from the set."""
+        self._derived = dict()
+        return super(_RuleSet, self).pop()
+
+    def clear(self):
+        """Remove all Rules from the set."""
+        self._derived = dict()
+        super(_RuleSet, self).clear()
+
+    def update(self, *others):
+        """Add the Rules from each of the other iterables to the set."""
+        self._derived = dict()
+        super(_RuleSet, self).update(*others)
+
+    def intersection_update(self, *others):
+        """Keep only the Rules that are also within each of the other iterables."""
+        self._derived = dict()
+        super(_RuleSet, self).intersection_update(*others)
+
+    def difference_update(self, *others):
+        """Remove the Rules that are within any of the other iterables."""
+        self._derived = dict()
+        super(_RuleSet, self).difference_update(*others)
+
+    def symmetric_difference_update(self, other):
+        """Keep the Rules that are within either the set or the other iterable, but not both."""
+        self._derived = dict()
+        super(_RuleSet, self).symmetric_difference_update(other)
+
+    def __ior__(self, other):
+        """Add the Rules from another set to the set."""
+        self._derived = dict()
+        return super(_RuleSet, self).__ior__(other)
+
+    def __iand__(self, other):
+        """Keep only the Rules that are also within another set."""
+        self._derived = dict()
+        return super(_RuleSet, self).__iand__(other)
+
+    def __isub__(self, other):
+        """Remove the Rules that are within another set."""
+        self._derived = dict()
+        return super(_RuleSet, self).__isub__(other)
+
+    def __ixor__(self, other):
+        """Keep the Rules that are within either the set or another set, but not both."""
+        self._derived = dict()
+        return super(_RuleSet, self).__ixor__(other)
+
+
+def _expected_cost(rule_statistics):
+    """Determine the expected time taken to locate a failure by checking a Rule, as described by `RulesetStatistics.expected_cost()`.
+
+    Args:
+        rule_statistics (list): The number of checks, failures and total seconds recorded for the Rule. None where nothing has been recorded.
+
+    Returns:
+        float: The expected cost of checking the Rule.
+
+    """
+    if rule_statistics is None:
+        return 0.0
+
+    checks, failures, seconds = rule_statistics
+    return (seconds / checks) / ((failures + 1) / (checks + 2))
+
+
+class RulesetStatistics:
+    """Representation of the time taken to check each Rule in a Ruleset and how often each fails.
+
+    The statistics are used to order Rules so that a Dataset that is not valid against a Ruleset is found to be invalid as quickly as possible.
+    They may be exported as JSON and loaded into another Ruleset, so that it starts with an order learned elsewhere.
+
+    Note:
+        Rules are identified by their type and string representation, in the same manner as Rule equality. Statistics therefore apply to equal Rules in any Ruleset.
+
+        Statistics may be recorded and read from many threads at once.
+
+    """
+
+    def __init__(self, statistics_str=None):
+        """Initialise RulesetStatistics.
+
+        Args:
+            statistics_str (str): A JSON string, as produced by `to_json()`, containing the statistics to start with. Defaults to no statistics.
+
+        Raises:
+            ValueError: When `statistics_str` is not a string or does not contain valid statistics.
+
+        """
+        self._statistics = dict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._ordered = None
+
+        if statistics_str is None:
+            return
+
+        try:
+            statistics_list = json.loads(statistics_str)
+        except TypeError:
+            raise ValueError('Provided statistics are not a string.')
+        except json.decoder.JSONDecodeError:
+            raise ValueError('Provided statistics are not valid JSON.')
+
+        try:
+            for rule_statistics in statistics_list:
+                checks, failures, seconds = int(rule_statistics['checks']), int(rule_statistics['failures']), float(rule_statistics['seconds'])
+                if checks < 1 or not 0 <= failures <= checks or seconds < 0:
+                    raise ValueError
+                self._statistics[(rule_statistics['rule_type'], rule_statistics['rule'])] = [checks, failures, seconds]
+        except (KeyError, TypeError, ValueError):
+            raise ValueError('Provided statistics are not in the expected format.')
+
+    def __len__(self):
+        """Return the number of Rules that statistics have been recorded for."""
+        with self._lock:
+            return len(self._statistics)
+
+    def __getstate__(self):
+        """Return the state of the statistics when they are copied or pickled, which excludes the lock."""
+        with self._lock:
+            return {'_statistics': {rule_id: list(rule_statistics) for rule_id, rule_statistics in self._statistics.items()}}
+
+    def __setstate__(self, state):
+        """Restore the state of copied or unpickled statistics, with a new lock."""
+        self._statistics = state['_statistics']
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._ordered = None
+
+    def record(self, rule, seconds, failed):
+        """Record a single check of a Dataset against a Rule.
+
+        Args:
+            rule (iati.Rule): The Rule that was checked.
+            seconds (float): The time taken to perform the check.
+            failed (bool): Whether the Dataset was not valid against the Rule.
+
+        """
+        rule_id = rule._identify()  # pylint: disable=protected-access
+
+        with self._lock:
+            rule_statistics = self._statistics.setdefault(rule_id, [0, 0, 0.0])
+            rule_statistics[0] += 1
+            rule_statistics[1] += int(failed)
+            rule_statistics[2] += seconds
+            self._generation += 1
+
+    def expected_cost(self, rule):
+        """Determine the expected time taken to locate a failure by checking a Rule.
+
+        Args:
+            rule (iati.Rule): The Rule to determine the cost of.
+
+        Returns:
+            float: The mean time taken to check the Rule, divided by the probability that it fails. Rules without statistics have a cost of `0.0`, so are checked first and their statistics learned.
+
+        Note:
+            The probability of failure is estimated with add-one smoothing, so Rules that have never failed are still checked eventually in a sensible order.
+
+        """
+        rule_id = rule._identify()  # pylint: disable=protected-access
+
+        with self._lock:
+            return _expected_cost(self._statistics.get(rule_id))
+
+    def ordered(self, rules):
+        """Order Rules by their expected cost, lowest first.
+
+        Args:
+            rules (iterable of iati.Rule): The Rules to order.
+
+        Returns:
+            list of iati.Rule: The Rules, ordered so that those that are cheap to check and often fail come first. Rules with the same cost are ordered by their type and string representation, so that the order is deterministic.
+
+        Note:
+            Where the Rules are those of a Ruleset, the order is calculated once, and calculated again only when statistics are recorded or the Rules are modified.
+
+        """
+        try:
+            rules_key = rules.derived('frozenset', frozenset)
+        except AttributeError:
+            rules_key = None
+
+        with self._lock:
+            if rules_key is not None and self._ordered is not None and self._ordered[0] is rules_key and self._ordered[1] == self._generation:
+                return list(self._ordered[2])
+
+            generation = self._generation
+            costed_rules = [(_expected_cost(self._statistics.get(rule._identify())), rule._identify(), rule) for rule in rules]  # pylint: disable=protected-access
+
+        ordered_rules = [rule for _, _, rule in sorted(costed_rules, key=lambda costed_rule: costed_rule[:2])]
+
+        if rules_key is not None:
+            with self._lock:
+                self._ordered = (rules_key, generation, ordered_rules)
+
+        return list(ordered_rules)
+
+    def to_json(self):
+        """Export the statistics as a JSON string.
+
+        Returns:
+            str: A JSON list containing an object for each Rule, with the `rule_type`, the `rule` string representation, and the number of `checks`, `failures` and total `seconds` taken.
+
+        """
+        with self._lock:
+            statistics = sorted((rule_id, tuple(rule_statistics)) for rule_id, rule_statistics in self._statistics.items())
+
+        return json.dumps([
+            {'rule_type': rule_type, 'rule': rule_str, 'checks': checks, 'failures': failures, 'seconds': seconds}
+            for (rule_type, rule_str), (checks, failures, seconds) in statistics
+        ], indent=2)
+
+
 class Rule:
     """Representation of a Rule contained within a Ruleset.
 
@@ -173,11 +865,18 @@ class Rule:
         context (str): An XPath expression to locate the elements that the Rule is to be checked against.
         case (dict): Specific configuration for this instance of the Rule.
 
+    Note:
+        Rules are immutable. Each attribute may be set once, while the Rule is initialised, after which the type and string representation that identify the Rule are cached along with its hash.
+
+        Attributes are stored in `__slots__`. Child classes should declare `__slots__` for any attributes that they add; custom types of Rule that do not are given a `__dict__` as normal.
+
     Todo:
         Determine whether this should be an Abstract Base Class.
 
     """
 
+    __slots__ = ('_case', '_context', '_name', '_identity', '_hash', 'normalized_paths', 'paths', 'condition')
+
     def __init__(self, context, case):
         """Initialise a Rule.
 
@@ -196,12 +895,42 @@ class Rule:
         """Return string to state what the Rule is checking."""
         return 'This is a Rule.'
 
+    def __setattr__(self, name, value):
+        """Set an attribute of the Rule, so long as it has not already been set.
+
+        Raises:
+            AttributeError: When the attribute has already been set, since Rules are immutable.
+
+        """
+        if hasattr(self, name):
+            raise AttributeError('Rules are immutable, so `{0}` cannot be changed.'.format(name))
+        super(Rule, self).__setattr__(name, value)
+
+    def __getstate__(self):
+        """Return the state of the Rule when it is copied or pickled.
+
+        Note:
+            The cached identity and hash are not included. The hash of a string differs between Python processes, so both are recalculated when next needed.
+
+        """
+        attribute_names = set(getattr(self, '__dict__', dict()))
+        for cls in type(self).__mro__:
+            attribute_names.update(cls.__dict__.get('__slots__', tuple()))
+        attribute_names.difference_update(['_identity', '_hash'])
+
+        return {name: getattr(self, name) for name in attribute_names if hasattr(self, name)}
+
+    def __setstate__(self, state):
+        """Restore the state of a copied or unpickled Rule."""
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+
     def __eq__(self, other):
         """Check Rule equality.
 
         This allows uniqueness to be correctly defined upon insertion into a set.
         """
-        return (self.name == other.name) and (str(self) == str(other))
+        return self._identify() == other._identify()  # pylint: disable=protected-access
 
     def __ne__(self, other):
         """Check Rule inequality."""
@@ -212,7 +941,24 @@ class Rule:
 
         This allows uniqueness to be correctly defined upon insertion into a set.
         """
-        return hash((self.name, str(self)))
+        try:
+            return self._hash
+        except AttributeError:
+            self._hash = hash(self._identify())
+            return self._hash
+
+    def _identify(self):
+        """Determine the type and string representation of the Rule, which together identify it.
+
+        Returns:
+            tuple of str: The name of the Rule, followed by its string representation. This is calculated once and cached.
+
+        """
+        try:
+            return self._identity
+        except AttributeError:
+            self._identity = (self.name, str(self))
+            return self._identity
 
     @property
     def context(self):
@@ -294,6 +1040,8 @@ class Rule:
             The `name` attribute on the class must be set to a valid rule_type before this function is called.
 
         """
+        import jsonschema  # imported on first use since it is slow to import
+
         try:
             jsonschema.validate(case, self._ruleset_schema_section())
         except jsonschema.ValidationError:
@@ -347,7 +1095,7 @@ class Rule:
             AttributeError: When the Rule name is unset or does not have the required attributes.
 
         """
-        ruleset_schema = iati.default.ruleset_schema()
+        ruleset_schema = _ruleset_schema()
         partial_schema = ruleset_schema['patternProperties']['.+']['properties'][self.name]['properties']['cases']['items']  # pylint: disable=E1101
         # make all attributes other than 'condition' in the partial schema required
         partial_schema['required'] = self._case_attributes(partial_schema)
@@ -387,43 +1135,29 @@ class Rule:
             `path` should be validated outside of this function to avoid unexpected errors.
 
         """
-        xpath_results = context.xpath(path)
+        xpath_results = _compiled_xpath(path)(context)
         results = [result if isinstance(result, str) else result.text for result in xpath_results]
         return ['' if result is None else result for result in results]
 
-    def _condition_met_for(self, context_element):
-        """Check for condtions of a given case.
+    def _extract_text_from_elements(self, context_elements, paths):
+        """Return a single list of strings containing the text found at each of the given `paths` within each of the `context_elements`.
 
         Args:
-            dataset (iati.Dataset): The Dataset to be checked for validity against a Rule.
+            context_elements (list of etree._Element): The XML Elements to locate text within.
+            paths (list of str): XPath query strings.
 
         Returns:
-            bool: Returns `False` when condition not met.
-                  Returns `True` when condition is met.
-            None: Returns `None` when condition met.
-
-        Warning:
-            Current implementation may be vulnerable to XPath injection vulnerabilities.
-
-        Todo:
-            Need to assess the possibility of risk and potential counter-measures/avoidance strategies if needed.
-            Need to decide whether the implementation of this in Rules should `return None` or `continue`.
-            Rename function to sound more truthy.
+            list of str: Text values from the XPath query results for all `context_elements`.
 
         """
-        try:
-            if context_element.xpath(self.condition):
-                return True
-        except AttributeError:
-            return False
+        return [text for context_element in context_elements for path in paths for text in self._extract_text_from_element_or_attribute(context_element, path)]
 
-        return False
-
-    def is_valid_for(self, dataset):
+    def is_valid_for(self, dataset, now=None):
         """Check whether a Dataset is valid against the Rule.
 
         Args:
             dataset (iati.Dataset): The Dataset to be checked for validity against the Rule.
+            now (datetime.datetime): The date and time to treat as the present. Defaults to the time at which the check starts.
 
         Returns:
             bool or None:
@@ -437,30 +1171,101 @@ class Rule:
             TypeError: When a Dataset is not given as an argument.
             ValueError: When a check encounters a completely incorrect value that it is unable to recover from within the definition of the Rule.
 
+        Todo:
+            Better design how Skips and ValueErrors are treated. The current True/False/Skip/Error thing is a bit clunky.
+
+        """
+        return self._result_for(_DatasetQueries(dataset), now)
+
+    def _result_for(self, queries, now=None):
+        """Check whether the Dataset that queries are made against is valid against the Rule.
+
+        Args:
+            queries (_DatasetQueries): The results of queries against the Dataset to be checked, which may be shared with other Rules.
+            now (datetime.datetime): The date and time to treat as the present. Defaults to the time at which the check starts.
+
+        Returns:
+            bool or None: The value that `is_valid_for()` returns for the Dataset.
+
+        Raises:
+            ValueError: When a check encounters a completely incorrect value that it is unable to recover from within the definition of the Rule.
+
         Note:
             May be overridden in child class that does not have the same return structure for boolean results.
 
         Todo:
-            Better design how Skips and ValueErrors are treated. The current True/False/Skip/Error thing is a bit clunky.
+            Need to decide whether the implementation of conditions in Rules should `return None` or `continue`.
 
         """
+        context_elements = queries.context_elements(self)
+
+        if context_elements == list():
+            return None
+
+        # the Rule is skipped from the first context element that meets the condition onwards, so only elements before that point are checked
         try:
-            context_elements = self._find_context_elements(dataset)
+            meeting_condition = queries.elements_meeting_condition(self)
         except AttributeError:
-            raise TypeError
+            elements_to_check = context_elements
+        else:
+            elements_to_check = list(itertools.takewhile(lambda context_element: context_element not in meeting_condition, context_elements))
 
-        if context_elements == list():
+        rule_check_result = self._check_batch_against_Rule(elements_to_check, now)
+        if rule_check_result is False:
+            return False
+        elif rule_check_result is None or len(elements_to_check) != len(context_elements):
             return None
 
-        for context_element in context_elements:
-            if self._condition_met_for(context_element):
-                return None
+        return True
+
+    def check_batch(self, context_elements):
+        """Check a batch of context elements against the Rule.
+
+        This is a hook for custom types of Rule, allowing them to check all context elements at once rather than one at a time.
+
+        Args:
+            context_elements (list of etree._Element): The XML Elements to check, in document order. Elements from the point at which the Rule `condition` is met onwards are not included.
+
+        Returns:
+            bool or None or iterable:
+                `True` when all `context_elements` are valid against the Rule.
+
+                `False` when a context element is not valid against the Rule.
+
+                `None` when a condition is met to skip validation.
+
+                Alternatively, a result for each context element in turn, such as a list of these values or a NumPy array of booleans. The first result that is not `True` is the result for the batch.
+
+                `NotImplemented` when the type of Rule does not implement this hook. Each context element is then checked using `_check_against_Rule()`.
+
+        """
+        return NotImplemented
+
+    def _check_batch_against_Rule(self, context_elements, now=None):  # pylint: disable=unused-argument
+        """Check a batch of context elements against the Rule.
+
+        Args:
+            context_elements (list of etree._Element): The XML Elements to check, in document order.
+            now (datetime.datetime): The date and time to treat as the present. Only used by Rules that deal with dates.
+
+        Returns:
+            bool: Return `True` when all `context_elements` are valid against the Rule.
+                  Return `False` when a context element is not valid against the Rule.
+            None: When a condition is met to skip validation.
 
+        Note:
+            By default, context elements are checked using `check_batch()` where a child class implements it, or otherwise each context element is checked in turn using `_check_against_Rule()`.
+            This may be overridden in child classes that are able to check all context elements in one go.
+
+        """
+        batch_results = self.check_batch(context_elements)
+        if batch_results is not NotImplemented:
+            return _combine_batch_results(batch_results)
+
+        for context_element in context_elements:
             rule_check_result = self._check_against_Rule(context_element)
-            if rule_check_result is False:
-                return False
-            elif rule_check_result is None:
-                return None
+            if rule_check_result is not True:
+                return rule_check_result
 
         return True
 
@@ -473,6 +1278,8 @@ class RuleAtLeastOne(Rule):
 
     """
 
+    __slots__ = ()
+
     def __init__(self, context, case):
         """Initialise an `atleast_one` rule."""
         self._name = 'atleast_one'
@@ -496,16 +1303,36 @@ class RuleAtLeastOne(Rule):
                   Return `True` when the case is not found in the Dataset.
 
         """
-        for path in self.paths:
-            if context_element.xpath(path):
+        return self._check_batch_against_Rule([context_element])
+
+    def _check_batch_against_Rule(self, context_elements, now=None):
+        """Check whether any of the `context_elements` has at least one specified Element or Attribute.
+
+        Args:
+            context_elements (list of etree._Element): The XML Elements to check, in document order.
+            now (datetime.datetime): The date and time to treat as the present. Not used by this type of Rule.
+
+        Returns:
+            bool: Return `False` when the case is found in the Dataset.
+                  Return `True` when the case is not found in the Dataset.
+
+        Note:
+            The existence of each path is tested with a single compiled XPath expression per context element, so the matched nodes are never returned to Python.
+
+        """
+        any_path_found = _aggregate_xpath('boolean({0})', ' or ', self.paths)
+
+        for context_element in context_elements:
+            if any_path_found(context_element):
                 return False
         return True
 
-    def is_valid_for(self, dataset):
-        """Check whether a Dataset is valid against the Rule.
+    def _result_for(self, queries, now=None):
+        """Check whether the Dataset that queries are made against is valid against the Rule.
 
         Args:
-            dataset (iati.Dataset): The Dataset to be checked for validity against the Rule.
+            queries (_DatasetQueries): The results of queries against the Dataset to be checked.
+            now (datetime.datetime): The date and time to treat as the present. Not used by this type of Rule.
 
         Returns:
             bool or None:
@@ -515,11 +1342,8 @@ class RuleAtLeastOne(Rule):
 
                 `None` when a condition is met to skip validation.
 
-        Raises:
-            TypeError: When a Dataset is not given as an argument.
-
         """
-        parent = super(RuleAtLeastOne, self).is_valid_for(dataset)
+        parent = super(RuleAtLeastOne, self)._result_for(queries, now)
 
         if parent is True:
             return False
@@ -538,6 +1362,8 @@ class RuleDateOrder(Rule):
 
     """
 
+    __slots__ = ('less', 'more', 'special_case')
+
     def __init__(self, context, case):
         """Initialise a `date_order` rule."""
         self._name = 'date_order'
@@ -569,12 +1395,13 @@ class RuleDateOrder(Rule):
 
         self._normalize_condition()
 
-    def _get_date(self, context_element, path):
+    def _get_date(self, context_element, path, now):
         """Retrieve datetime object from an XPath string.
 
         Args:
             context_element (etree._Element): An XML Element.
             path: (an XPath): The ultimate XPath query to find the desired elements.
+            now (datetime.datetime): The date and time to return when `path` is the special case.
 
         Returns:
             datetime.datetime: A datetime object.
@@ -582,36 +1409,54 @@ class RuleDateOrder(Rule):
         Raises:
             ValueError:
                 When a non-permitted number of unique dates are given for a `less` or `more` value.
-                When datetime cannot convert a string of non-permitted characters.
-                When non-permitted trailing characters are found after the core date string characters.
+                When a date is not a zero-padded `xsd:date` string with an optional permitted timezone.
 
         Note:
             Though technically permitted, any dates with a leading '-' character are almost certainly incorrect and are therefore treated as data errors.
 
-        Todo:
-            Consider breaking this function down further.
-
         """
         if path == self.special_case:
-            return datetime.today()
+            return now
 
         dates = self._extract_text_from_element_or_attribute(context_element, path)
         if dates == list() or not dates[0]:
             return None
-        # Checks that anything after the YYYY-MM-DD string is a permitted timezone character
-        pattern = re.compile(r'^([+-]([01][0-9]|2[0-3]):([0-5][0-9])|Z)?$')
-        if (len(set(dates)) == 1) and pattern.match(dates[0][10:]):
-            if len(dates[0]) < 10:
-                # '%d' and '%m' are documented as requiring zero-padded dates.as input. This is actually for output. As such, a separate length check is required to ensure zero-padded values.
-                raise ValueError
-            return datetime.strptime(dates[0][:10], '%Y-%m-%d')
+        if len(set(dates)) == 1:
+            return iati.utilities.convert_xsd_date_to_datetime(dates[0])
         raise ValueError
 
-    def _check_against_Rule(self, context_element):
+    def _check_batch_against_Rule(self, context_elements, now=None):
+        """Check a batch of context elements against the Rule, using the same value for `NOW` throughout.
+
+        Args:
+            context_elements (list of etree._Element): The XML Elements to check, in document order.
+            now (datetime.datetime): The date and time to treat as the present. Defaults to the time at which the check starts.
+
+        Returns:
+            bool: Return `True` when all `context_elements` are valid against the Rule.
+                  Return `False` when a context element is not valid against the Rule.
+            None: When a condition is met to skip validation.
+
+        Raises:
+            ValueError: When a date is given that is not in the correct xsd:date format.
+
+        """
+        if now is None:
+            now = datetime.today()
+
+        for context_element in context_elements:
+            rule_check_result = self._check_against_Rule(context_element, now)
+            if rule_check_result is not True:
+                return rule_check_result
+
+        return True
+
+    def _check_against_Rule(self, context_element, now=None):
         """Assert that the date value of `less` is chronologically before the date value of `more`.
 
         Args:
             context_element (etree._Element): An XML Element.
+            now (datetime.datetime): The date and time to treat as the present. Defaults to the current time.
 
         Return:
             bool: Return `True` when `less` is chronologically before `more`.
@@ -622,11 +1467,14 @@ class RuleDateOrder(Rule):
             ValueError: When a date is given that is not in the correct xsd:date format.
 
         Note:
-            `date` restricted to 10 characters in order to exclude possible timezone values.
+            Any timezone on a date is ignored.
 
         """
-        early_date = self._get_date(context_element, self.less)
-        later_date = self._get_date(context_element, self.more)
+        if now is None:
+            now = datetime.today()
+
+        early_date = self._get_date(context_element, self.less, now)
+        later_date = self._get_date(context_element, self.more, now)
 
         try:
             if early_date > later_date:
@@ -644,6 +1492,8 @@ class RuleDependent(Rule):
 
     """
 
+    __slots__ = ()
+
     def __init__(self, context, case):
         """Initialise a `dependent` rule."""
         self._name = 'dependent'
@@ -687,6 +1537,8 @@ class RuleNoMoreThanOne(Rule):
 
     """
 
+    __slots__ = ()
+
     def __init__(self, context, case):
         """Initialise a `no_more_than_one` rule."""
         self._name = 'no_more_than_one'
@@ -710,16 +1562,28 @@ class RuleNoMoreThanOne(Rule):
                   Return `False` when more than one result is found in the Dataset.
 
         """
-        unique_paths = set(self.paths)
+        return self._check_batch_against_Rule([context_element])
 
-        found_elements = 0
+    def _check_batch_against_Rule(self, context_elements, now=None):
+        """Check that none of the `context_elements` has more than one result for a specified Element or Attribute.
 
-        for path in unique_paths:
-            results = context_element.xpath(path)
-            found_elements += len(results)
+        Args:
+            context_elements (list of etree._Element): The XML Elements to check, in document order.
+            now (datetime.datetime): The date and time to treat as the present. Not used by this type of Rule.
 
-        if found_elements > 1:
-            return False
+        Returns:
+            bool: Return `True` when one result or no results are found in each context element.
+                  Return `False` when more than one result is found in a context element.
+
+        Note:
+            The results for each path are counted with a single compiled XPath expression per context element, so the matched nodes are never returned to Python.
+
+        """
+        count_found = _aggregate_xpath('count({0})', ' + ', sorted(set(self.paths)))
+
+        for context_element in context_elements:
+            if count_found(context_element) > 1:
+                return False
         return True
 
 
@@ -732,6 +1596,8 @@ class RuleRegexMatches(Rule):
 
     """
 
+    __slots__ = ('regex', '_pattern')
+
     def __init__(self, context, case):
         """Initialise a `regex_matches` Rule.
 
@@ -746,7 +1612,7 @@ class RuleRegexMatches(Rule):
         if self.regex == '':
             raise ValueError
         try:
-            re.compile(self.regex)
+            self._pattern = re.compile(self.regex)
         except sre_constants.error:
             raise ValueError
 
@@ -767,14 +1633,23 @@ class RuleRegexMatches(Rule):
                   Return `False` when the given `path` text does not match the given regex.
 
         """
-        pattern = re.compile(self.regex)
+        return self._check_batch_against_Rule([context_element])
 
-        for path in self.paths:
-            strings_to_check = self._extract_text_from_element_or_attribute(context_element, path)
-            for string_to_check in strings_to_check:
-                if not pattern.search(string_to_check):
-                    return False
-        return True
+    def _check_batch_against_Rule(self, context_elements, now=None):  # pylint: disable=unused-argument
+        """Assert that all the text of the given `paths` within all `context_elements` matches the regex value.
+
+        Args:
+            context_elements (list of etree._Element): The XML Elements to check.
+            now (datetime.datetime): Not used by this type of Rule.
+
+        Returns:
+            bool: Return `True` when all text at the given `paths` matches the given regex.
+                  Return `False` when some text at the given `paths` does not match the given regex.
+
+        """
+        strings_to_check = self._extract_text_from_elements(context_elements, self.paths)
+
+        return all(map(self._pattern.search, strings_to_check))
 
 
 class RuleRegexNoMatches(Rule):
@@ -786,6 +1661,8 @@ class RuleRegexNoMatches(Rule):
 
     """
 
+    __slots__ = ('regex', '_pattern')
+
     def __init__(self, context, case):
         """Initialise a `regex_no_matches` Rule.
 
@@ -800,7 +1677,7 @@ class RuleRegexNoMatches(Rule):
         if self.regex == '':
             raise ValueError
         try:
-            re.compile(self.regex)
+            self._pattern = re.compile(self.regex)
         except sre_constants.error:
             raise ValueError
 
@@ -821,14 +1698,23 @@ class RuleRegexNoMatches(Rule):
                   Return `False` when the given `path` text matches the given regex.
 
         """
-        pattern = re.compile(self.regex)
+        return self._check_batch_against_Rule([context_element])
 
-        for path in self.paths:
-            strings_to_check = self._extract_text_from_element_or_attribute(context_element, path)
-            for string_to_check in strings_to_check:
-                if pattern.search(string_to_check):
-                    return False
-        return True
+    def _check_batch_against_Rule(self, context_elements, now=None):  # pylint: disable=unused-argument
+        """Assert that no text of the given `paths` within any of the `context_elements` matches the regex value.
+
+        Args:
+            context_elements (list of etree._Element): The XML Elements to check.
+            now (datetime.datetime): Not used by this type of Rule.
+
+        Returns:
+            bool: Return `True` when no text at the given `paths` matches the given regex.
+                  Return `False` when some text at the given `paths` matches the given regex.
+
+        """
+        strings_to_check = self._extract_text_from_elements(context_elements, self.paths)
+
+        return not any(map(self._pattern.search, strings_to_check))
 
 
 class RuleStartsWith(Rule):
@@ -840,6 +1726,8 @@ class RuleStartsWith(Rule):
 
     """
 
+    __slots__ = ('start',)
+
     def __init__(self, context, case):
         """Initialise a `startswith` Rule."""
         self._name = 'startswith'
@@ -899,6 +1787,8 @@ class RuleSum(Rule):
 
     """
 
+    __slots__ = ('sum',)
+
     def __init__(self, context, case):
         """Initialise a `sum` rule."""
         self._name = 'sum'
@@ -924,7 +1814,67 @@ class RuleSum(Rule):
             ValueError: When the `path` value is not numeric.
 
         """
-        unique_paths = set(self.paths)
+        return self._check_batch_against_Rule([context_element])
+
+    def _check_batch_against_Rule(self, context_elements, now=None):
+        """Assert that the total of the values given in `paths` match the given `sum` value within each of the `context_elements`.
+
+        Args:
+            context_elements (list of etree._Element): The XML Elements to check, in document order.
+            now (datetime.datetime): The date and time to treat as the present. Not used by this type of Rule.
+
+        Returns:
+            bool: Return `True` when the `path` values total to the `sum` value in every context element.
+                  Return `False` when the `path` values do not total to the `sum` value in a context element.
+            None: When no elements are found for the specified `paths` in a context element.
+
+        Raises:
+            ValueError: When the `path` value is not numeric.
+
+        Note:
+            Values are counted and summed natively using XPath. XPath numbers are floating point, so the native total is only used when every value is a short integer, for which floating point addition is exact.
+            Other values, such as decimal or non-numeric values, are summed exactly using `decimal.Decimal`.
+
+        """
+        unique_paths = sorted(set(self.paths))
+        count_values = _aggregate_xpath('count({0})', ' + ', unique_paths)
+        sum_values = _aggregate_xpath('sum({0})', ' + ', unique_paths)
+        count_inexact_values = _aggregate_xpath('count(({0})[' + _INEXACT_SUM_VALUE_PREDICATE + '])', ' + ', unique_paths)
+        target = decimal.Decimal(str(self.sum))
+
+        for context_element in context_elements:
+            num_values = count_values(context_element)
+            if num_values == 0:
+                return None
+
+            total = sum_values(context_element)
+            if num_values <= _NATIVE_SUM_MAX_VALUES and not math.isnan(total) and not count_inexact_values(context_element):
+                # comparison between a float and a Decimal is exact
+                rule_check_result = total == target
+            else:
+                rule_check_result = self._check_sum_exactly(context_element, unique_paths, target)
+
+            if rule_check_result is not True:
+                return rule_check_result
+        return True
+
+    def _check_sum_exactly(self, context_element, unique_paths, target):
+        """Assert that the total of the values given in `unique_paths` match the `target` value, using exact decimal arithmetic.
+
+        Args:
+            context_element (etree._Element): An XML Element.
+            unique_paths (list of str): The paths to locate values at, with duplicates removed.
+            target (decimal.Decimal): The value that the located values must sum to.
+
+        Returns:
+            bool: Return `True` when the `path` values total to the `target` value.
+                  Return `False` when the `path` values do not total to the `target` value.
+            None: When no elements are found for the specified `paths`.
+
+        Raises:
+            ValueError: When the `path` value is not numeric.
+
+        """
         values_in_context = list()
 
         for path in unique_paths:
@@ -938,7 +1888,7 @@ class RuleSum(Rule):
         if values_in_context == list():
             return None
 
-        if sum(values_in_context) != decimal.Decimal(str(self.sum)):
+        if sum(values_in_context) != target:
             return False
         return True
 
@@ -951,6 +1901,8 @@ class RuleUnique(Rule):
 
     """
 
+    __slots__ = ()
+
     def __init__(self, context, case):
         """Initialise a `unique` rule."""
         self._name = 'unique'
@@ -1,10 +1,12 @@
 """A module containing a core representation of IATI Schemas."""
-import collections
+import copy
+import hashlib
 from lxml import etree
 import iati.codelists
 import iati.constants
 import iati.exceptions
 import iati.resources
+import iati.typeindex
 import iati.utilities
 
 
@@ -51,6 +53,8 @@ class Schema:
 
         """
         self._schema_base_tree = None
+        self._flattened_base_tree = None
+        self._type_index = None
         self._source_path = path
         self.codelists = set()
         self.rulesets = set()
@@ -72,24 +76,53 @@ class Schema:
         Todo:
             Utilise all attributes as part of the equality process.
 
-            Determine a better method of checking whether the contained Rulesets are equal.
-
         """
         # perform cheap checks first
         if (len(self.codelists) != len(other.codelists)) or (len(self.rulesets) != len(other.rulesets)):
             return False
 
-        # turn the tree into something that can be easily compared
-        self_tree_str = etree.tostring(self.flatten_includes(self._schema_base_tree), pretty_print=True)
-        other_tree_str = etree.tostring(other.flatten_includes(other._schema_base_tree), pretty_print=True)  # pylint: disable=protected-access
+        return self.fingerprint == other.fingerprint
+
+    @property
+    def fingerprint(self):
+        """str: A SHA-256 hex digest of the flattened XML Schema, along with the fingerprints of the Codelists and Rulesets within the Schema.
+
+        Equal Schemas have the same fingerprint, which is the same in every Python process.
+
+        Note:
+            The fingerprint of the flattened XML Schema is calculated once for each base tree.
+            The fingerprints of the Codelists and Rulesets are combined each time, since they may be added or removed in place, though each is itself calculated again only when it is modified.
+
+            Schemas are mutable, so are not hashable. The fingerprint is a snapshot of the content of the Schema when it is accessed.
+
+        """
+        _, tree_fingerprint = self._flattened()
+
+        digest = hashlib.sha256(tree_fingerprint.encode('ascii'))
+        for fingerprints in [[codelist.fingerprint for codelist in self.codelists], [ruleset.fingerprint for ruleset in self.rulesets]]:
+            digest.update(b'|' + ','.join(sorted(fingerprints)).encode('ascii'))
+
+        return digest.hexdigest()
+
+    def _flattened(self):
+        """Flatten the base XML Schema, along with the schemas that it includes.
+
+        Returns:
+            tuple of (etree._ElementTree, str): The flattened tree, and a SHA-256 hex digest of its canonical form. The tree must not be modified.
+
+        Note:
+            The base tree is copied before it is flattened, so is not modified. The result is calculated once, and calculated again only when the base tree is replaced.
 
-        # compare Rulesets - cannot use `collections.Counter` since it works on hash values, which differ between equal Rulesets
-        self_rulesets = list(self.rulesets)
-        other_rulesets = list(other.rulesets)
-        for self_rs in self_rulesets:
-            other_rulesets = [other_rs for other_rs in other_rulesets if other_rs != self_rs]
+        Warning:
+            Changes made to the base tree in place are not detected.
+
+        """
+        if self._flattened_base_tree is None or self._flattened_base_tree[0] is not self._schema_base_tree:
+            flattened_tree = self.flatten_includes(copy.deepcopy(self._schema_base_tree))
+            tree_fingerprint = hashlib.sha256(etree.tostring(flattened_tree, method='c14n')).hexdigest()
+            self._flattened_base_tree = (self._schema_base_tree, flattened_tree, tree_fingerprint)
 
-        return (self_tree_str == other_tree_str) and (collections.Counter(self.codelists) == collections.Counter(other.codelists)) and (len(other_rulesets) == 0)
+        return self._flattened_base_tree[1:]
 
     def _change_include_to_xinclude(self, tree):
         """Change the method in which common elements are included.
@@ -211,6 +244,30 @@ class Schema:
 
         return tree
 
+    def type_index(self):
+        """Return an index of the datatypes and cardinalities of the elements and attributes declared within the Schema.
+
+        Returns:
+            iati.typeindex.TypeIndex: The index, with a node for each element and attribute that may occur beneath the root element of the Schema. The index must not be modified.
+
+        Raises:
+            iati.exceptions.SchemaError: The XML Schema does not declare the root element of the Schema.
+
+        Note:
+            The index is built once from the flattened XML Schema, and built again only when the base tree is replaced.
+
+        """
+        flattened_tree, _ = self._flattened()
+
+        if self._type_index is None or self._type_index[0] is not flattened_tree:
+            try:
+                self._type_index = (flattened_tree, iati.typeindex.TypeIndex(flattened_tree, self.ROOT_ELEMENT_NAME))
+            except ValueError as err:
+                iati.utilities.log_error(err)
+                raise iati.exceptions.SchemaError('The Schema does not declare a `{0}` element.'.format(self.ROOT_ELEMENT_NAME))
+
+        return self._type_index[1]
+
     def validator(self):
         """Return a schema that can be used for validation.
 
@@ -1,7 +1,13 @@
 """Configuration to exist in the global scope for pytest."""
 import collections
+import logging.handlers
+import os
+import shutil
+import tempfile
 import pytest
+import iati.cache
 import iati.default
+import iati.logs
 import iati.resources
 import iati.tests.utilities
 import iati
@@ -31,6 +37,16 @@ def _check_latest_version_mark(item):
         assert latest_version == iati.version.STANDARD_VERSION_LATEST, help_msg
 
 
+def pytest_configure(config):  # pylint: disable=unused-argument
+    """Store the on-disk cache in a temporary directory, so that running the tests does not add entries to the user cache directory."""
+    os.environ[iati.cache.CACHE_DIR_ENV_VAR] = tempfile.mkdtemp(prefix='pyiati-test-cache-')
+
+
+def pytest_unconfigure(config):  # pylint: disable=unused-argument
+    """Remove the temporary cache directory."""
+    shutil.rmtree(os.environ.pop(iati.cache.CACHE_DIR_ENV_VAR), ignore_errors=True)
+
+
 def pytest_runtest_call(item):
     """Run operations that are called when tests are run."""
     _check_latest_version_mark(item)
@@ -73,3 +89,24 @@ def schema_ruleset(request):
     schema.rulesets.add(ruleset)
 
     return schema
+
+
+@pytest.fixture
+def log_records():
+    """Route logged records to a handler that keeps them in memory.
+
+    Returns:
+        function: A function that waits for queued records to be written, then returns them.
+
+    """
+    handler = logging.handlers.BufferingHandler(1000)
+    iati.logs.configure(filename=None, handlers=[handler])
+
+    def written_records():
+        """Wait for queued records to be written, then return them."""
+        iati.logs.shutdown()
+        return handler.buffer
+
+    yield written_records
+
+    iati.logs.shutdown()
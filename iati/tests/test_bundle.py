@@ -0,0 +1,159 @@
+"""A module containing tests for reading resources from a bundle."""
+import os
+import shutil
+import pytest
+from lxml import etree
+import iati.bundle
+import iati.resources
+import iati.tests.resources
+import iati.utilities
+
+
+@pytest.fixture
+def bundle_source(tmp_path):
+    """Return a folder containing a copy of the resources that are packed into a bundle, laid out as within the `iati` package."""
+    source_path = str(tmp_path / 'source')
+    for folder in iati.bundle.BUNDLE_FOLDERS:
+        shutil.copytree(iati.bundle.path_for_name(folder), os.path.join(source_path, *folder.split('/')), symlinks=True)
+
+    return source_path
+
+
+@pytest.fixture
+def use_bundle(bundle_source, tmp_path, monkeypatch):
+    """Return a function that builds a bundle from the copied resources and reads resources from it for the rest of the test."""
+    def build_and_use(compress=False):
+        path = str(tmp_path / 'resources.bundle')
+        iati.bundle.build(path, compress=compress, source_path=bundle_source)
+        monkeypatch.setenv(iati.bundle.BUNDLE_ENV_VAR, path)
+        return path
+
+    return build_and_use
+
+
+def source_path_for(bundle_source, path):
+    """Return the path that a resource within the `iati` package has within the copied resources."""
+    return os.path.join(bundle_source, *iati.bundle.name_for_path(path).split('/'))
+
+
+class TestBundle:
+    """A container for tests relating to the bundle format."""
+
+    @pytest.mark.parametrize('compress', [True, False])
+    def test_bundle_contains_resources(self, bundle_source, tmp_path, compress):
+        """Check that each resource is read from a bundle with the same content as the file it was packed from."""
+        path = str(tmp_path / 'resources.bundle')
+        num_resources = iati.bundle.build(path, compress=compress, source_path=bundle_source)
+        bundle = iati.bundle.Bundle(path)
+
+        assert len(bundle.names()) == num_resources
+        assert bundle.names() == sorted(bundle.names())
+        for name in bundle.names():
+            with open(os.path.join(bundle_source, *name.split('/')), 'rb') as resource_file:
+                assert bundle.read(name) == resource_file.read()
+
+    def test_bundle_compressed_smaller(self, bundle_source, tmp_path):
+        """Check that compressing a bundle makes it smaller."""
+        path = str(tmp_path / 'resources.bundle')
+        compressed_path = str(tmp_path / 'compressed.bundle')
+        iati.bundle.build(path, source_path=bundle_source)
+        iati.bundle.build(compressed_path, compress=True, source_path=bundle_source)
+
+        assert os.path.getsize(compressed_path) < os.path.getsize(path)
+
+    def test_bundle_stores_identical_content_once(self, bundle_source, tmp_path):
+        """Check that resources with identical content, such as Codelists shared between versions, are only stored once."""
+        path = str(tmp_path / 'resources.bundle')
+        iati.bundle.build(path, source_path=bundle_source)
+        bundle = iati.bundle.Bundle(path)
+
+        assert os.path.getsize(path) < sum(len(bundle.read(name)) for name in bundle.names())
+
+    def test_bundle_missing_resource(self, use_bundle):
+        """Check that a KeyError is raised when reading a resource that a bundle does not contain."""
+        bundle = iati.bundle.Bundle(use_bundle())
+
+        assert 'not-a-resource.xml' not in bundle
+        with pytest.raises(KeyError):
+            bundle.read('not-a-resource.xml')
+
+    @pytest.mark.parametrize('content', [b'', b'not a bundle', iati.bundle.BUNDLE_MAGIC + b'\xff\xff' + bytes(8)])
+    def test_bundle_invalid_file(self, tmp_path, monkeypatch, content):
+        """Check that a ValueError is raised when opening something that is not a bundle of a supported format, and that resources are then read from the file system."""
+        path = str(tmp_path / 'resources.bundle')
+        with open(path, 'wb') as bundle_file:
+            bundle_file.write(content)
+        monkeypatch.setenv(iati.bundle.BUNDLE_ENV_VAR, path)
+
+        with pytest.raises(ValueError):
+            iati.bundle.Bundle(path)
+        assert iati.bundle.current_bundle() is None
+        assert iati.utilities.load_as_tree(iati.resources.create_codelist_path('Country', '2.03')) is not None
+
+
+class TestBundleResources:
+    """A container for tests relating to loading resources from a bundle."""
+
+    @pytest.fixture
+    def codelist_path(self):
+        """Return the path of a Codelist that is packed into a bundle."""
+        return iati.resources.create_codelist_path('ActivityDateType', '2.03')
+
+    @pytest.mark.parametrize('compress', [True, False])
+    def test_resource_read_from_bundle(self, bundle_source, use_bundle, codelist_path, compress):
+        """Check that resources within a bundle are read from the bundle rather than the file system."""
+        with open(source_path_for(bundle_source, codelist_path), 'ab') as resource_file:
+            resource_file.write(b'<!-- from the bundle -->')
+        use_bundle(compress)
+
+        assert iati.utilities.load_as_string(codelist_path).endswith('<!-- from the bundle -->')
+        assert iati.utilities.load_as_tree(codelist_path).getroot().tail is None
+        assert iati.utilities.load_as_tree(codelist_path).getroot().getnext().text == ' from the bundle '
+
+    def test_resource_not_in_bundle(self, use_bundle):
+        """Check that resources that are not within a bundle, such as test data, are read from the file system."""
+        use_bundle()
+        path = iati.tests.resources.get_test_data_path('invalid')
+
+        assert iati.bundle.read_resource(path) is None
+        assert iati.utilities.load_as_bytes(path)
+
+    def test_bundle_disabled(self, use_bundle, monkeypatch, codelist_path):
+        """Check that resources are read from the file system when bundles are disabled."""
+        use_bundle()
+        monkeypatch.setenv(iati.bundle.BUNDLE_ENV_VAR, '')
+
+        assert iati.bundle.current_bundle() is None
+        assert iati.bundle.read_resource(codelist_path) is None
+
+    def test_included_schema_read_from_bundle(self, bundle_source, use_bundle):
+        """Check that schemas included by a schema within a bundle are also read from the bundle."""
+        path = iati.resources.create_schema_path('iati-activities-schema', '2.03')
+        common_path = iati.resources.create_schema_path('iati-common', '2.03')
+        iati.utilities.convert_tree_to_schema(iati.utilities.load_as_tree(path))
+
+        with open(source_path_for(bundle_source, common_path), 'wb') as resource_file:
+            resource_file.write(b'<xsd:schema xmlns:xsd="http://www.w3.org/2001/XMLSchema"/>')
+        use_bundle()
+
+        with pytest.raises(etree.XMLSchemaParseError):
+            iati.utilities.convert_tree_to_schema(iati.utilities.load_as_tree(path))
+
+    def test_xinclude_read_from_bundle(self, bundle_source, use_bundle):
+        """Check that schemas flattened by a Schema within a bundle are read from the bundle."""
+        common_path = iati.resources.create_schema_path('iati-common', '2.03')
+        with open(source_path_for(bundle_source, common_path), 'wb') as resource_file:
+            resource_file.write(b'<xsd:schema xmlns:xsd="http://www.w3.org/2001/XMLSchema"><xsd:element name="from-the-bundle"/></xsd:schema>')
+        use_bundle()
+
+        schema = iati.ActivitySchema(iati.resources.create_schema_path('iati-activities-schema', '2.03'))
+
+        assert schema.flatten_includes(schema._schema_base_tree).getroot().find('{http://www.w3.org/2001/XMLSchema}element[@name="from-the-bundle"]') is not None  # pylint: disable=protected-access
+
+    def test_manifest_built_from_bundle(self, bundle_source, use_bundle, codelist_path):
+        """Check that resources relating to the Standard are located using the index of a bundle."""
+        os.remove(source_path_for(bundle_source, codelist_path))
+        use_bundle()
+
+        assert codelist_path not in iati.resources.get_codelist_paths('2.03')
+        assert iati.resources.create_codelist_path('Country', '2.03') in iati.resources.get_codelist_paths('2.03')
@@ -0,0 +1,200 @@
+"""A module containing tests for the on-disk cache of precompiled resources."""
+import os
+import pickle
+import pytest
+import iati.cache
+
+
+class TestCache:
+    """A container for tests relating to the on-disk cache."""
+
+    @pytest.fixture
+    def cache_directory(self, tmpdir, monkeypatch):
+        """Store the cache in a temporary directory for the duration of a test."""
+        monkeypatch.setenv(iati.cache.CACHE_DIR_ENV_VAR, str(tmpdir))
+        return tmpdir
+
+    def test_store_and_load(self, cache_directory):
+        """Check that a stored entry can be loaded from within the cache directory."""
+        key = iati.cache.cache_key('some content')
+
+        iati.cache.store('namespace', key, b'an entry')
+
+        assert iati.cache.load('namespace', key) == b'an entry'
+        assert cache_directory.join('namespace', key).check(file=True)
+
+    def test_load_missing_entry(self, cache_directory):  # pylint: disable=unused-argument
+        """Check that `None` is given when loading an entry that has not been stored."""
+        assert iati.cache.load('namespace', iati.cache.cache_key('some content')) is None
+
+    @pytest.mark.parametrize('parts, other_parts', [
+        (('some content',), ('some other content',)),
+        (('some content', 1), ('some content', 2)),
+        (('ab', 'c'), ('a', 'bc'))
+    ])
+    def test_cache_key_differs_with_content(self, parts, other_parts):
+        """Check that keys differ when the content that an entry is built from differs."""
+        assert iati.cache.cache_key(*parts) != iati.cache.cache_key(*other_parts)
+
+    def test_cache_key_same_for_same_content(self):
+        """Check that the same key is given each time for the same content."""
+        assert iati.cache.cache_key('some content', b'bytes') == iati.cache.cache_key('some content', b'bytes')
+
+    def test_cache_disabled(self, monkeypatch, tmpdir):
+        """Check that nothing is stored or loaded when the cache directory is set to an empty string."""
+        monkeypatch.setenv(iati.cache.CACHE_DIR_ENV_VAR, '')
+        monkeypatch.chdir(tmpdir)
+        key = iati.cache.cache_key('some content')
+
+        iati.cache.store('namespace', key, b'an entry')
+
+        assert iati.cache.cache_directory() is None
+        assert iati.cache.load('namespace', key) is None
+        assert tmpdir.listdir() == []
+
+    def test_default_cache_directory(self, monkeypatch, tmpdir):
+        """Check that the cache is stored within the user cache directory by default."""
+        monkeypatch.delenv(iati.cache.CACHE_DIR_ENV_VAR, raising=False)
+        monkeypatch.setenv('XDG_CACHE_HOME', str(tmpdir))
+
+        assert iati.cache.cache_directory() == os.path.join(str(tmpdir), 'pyiati')
+
+    def test_store_unwritable_directory(self, cache_directory):
+        """Check that failing to store an entry does not raise an error."""
+        cache_directory.join('namespace').write('a file where the namespace directory should be')
+        key = iati.cache.cache_key('some content')
+
+        iati.cache.store('namespace', key, b'an entry')
+
+        assert iati.cache.load('namespace', key) is None
+
+    def test_cached_object_built_once(self, cache_directory):  # pylint: disable=unused-argument
+        """Check that an object is built and stored when first requested, then loaded from the cache."""
+        key = iati.cache.cache_key('some content')
+        builds = list()
+
+        def build():
+            """Build an object, recording that it was built."""
+            builds.append(True)
+            return {'an': 'object'}
+
+        built_object = iati.cache.cached_object('namespace', key, build, dict)
+        cached_object = iati.cache.cached_object('namespace', key, build, dict)
+
+        assert cached_object == built_object == {'an': 'object'}
+        assert cached_object is not built_object
+        assert len(builds) == 1
+
+    @pytest.mark.parametrize('entry', [b'not a pickle', pickle.dumps(['not', 'a', 'dict'])])
+    def test_cached_object_unusable_entry(self, cache_directory, entry):  # pylint: disable=unused-argument
+        """Check that an object is built again and replaces its entry when the entry is corrupt or contains the wrong type of object."""
+        key = iati.cache.cache_key('some content')
+        iati.cache.store('namespace', key, entry)
+
+        built_object = iati.cache.cached_object('namespace', key, lambda: {'an': 'object'}, dict)
+
+        assert built_object == {'an': 'object'}
+        assert pickle.loads(iati.cache.load('namespace', key)) == built_object
+
+
+class TestLRUCache:
+    """A container for tests relating to the bounded in-memory cache."""
+
+    def test_items_held_and_counted(self):
+        """Check that items may be added and found, with each lookup counted as a hit or a miss."""
+        cache = iati.cache.LRUCache()
+        cache['a'] = 1
+
+        assert cache['a'] == 1
+        assert cache.get('b') is None
+        with pytest.raises(KeyError):
+            cache['b']  # pylint: disable=pointless-statement
+
+        assert 'a' in cache
+        assert len(cache) == 1
+        assert (cache.hits, cache.misses, cache.evictions) == (1, 2, 0)
+
+    def test_least_recently_used_evicted(self):
+        """Check that the least recently used item is evicted once the maximum number of entries is exceeded."""
+        cache = iati.cache.LRUCache(max_entries=2)
+        cache['a'] = 1
+        cache['b'] = 2
+        cache.get('a')
+
+        cache['c'] = 3
+
+        assert list(cache) == ['a', 'c']
+        assert cache.evictions == 1
+
+    def test_contains_does_not_mark_as_used(self):
+        """Check that checking whether an item is held does not count as a lookup or prevent the item being evicted."""
+        cache = iati.cache.LRUCache(max_entries=2)
+        cache['a'] = 1
+        cache['b'] = 2
+        assert 'a' in cache
+
+        cache['c'] = 3
+
+        assert 'a' not in cache
+        assert (cache.hits, cache.misses) == (0, 0)
+
+    def test_evicted_by_bytes(self):
+        """Check that items are evicted once their approximate size exceeds the maximum number of bytes."""
+        cache = iati.cache.LRUCache(max_bytes=250, sizeof=len)
+        cache['a'] = 'x' * 100
+        cache['b'] = 'x' * 100
+        assert cache.size_bytes == 200
+
+        cache['c'] = 'x' * 100
+
+        assert list(cache) == ['b', 'c']
+        assert cache.size_bytes == 200
+
+    def test_item_larger_than_budget_not_held(self):
+        """Check that an item that exceeds the budget by itself is evicted immediately."""
+        cache = iati.cache.LRUCache(max_bytes=10, sizeof=len)
+
+        cache['a'] = 'x' * 100
+
+        assert len(cache) == 0
+        assert cache.evictions == 1
+
+    def test_resize(self):
+        """Check that reducing the budget evicts the least recently used items, and that sizes are determined once a maximum number of bytes is set."""
+        cache = iati.cache.LRUCache(sizeof=len)
+        for key in 'abcd':
+            cache[key] = 'x' * 10
+        assert cache.size_bytes is None
+
+        cache.resize(max_entries=3)
+        assert list(cache) == ['b', 'c', 'd']
+
+        cache.resize(max_bytes=15)
+        assert list(cache) == ['d']
+        assert cache.size_bytes == 10
+        assert cache.max_entries is None
+
+    @pytest.mark.parametrize('budget', [{'max_entries': -1}, {'max_bytes': -1}])
+    def test_negative_budget(self, budget):
+        """Check that a ValueError is raised when the budget is negative."""
+        with pytest.raises(ValueError):
+            iati.cache.LRUCache(**budget)
+
+    def test_clear(self):
+        """Check that clearing the cache removes every item without resetting the counters."""
+        cache = iati.cache.LRUCache(max_bytes=1000, sizeof=len)
+        cache['a'] = 'x'
+        cache.get('a')
+
+        cache.clear()
+
+        assert cache.statistics() == {'hits': 1, 'misses': 0, 'evictions': 0, 'entries': 0, 'bytes': 0, 'max_entries': None, 'max_bytes': 1000}
+
+    def test_approximate_size(self):
+        """Check that the approximate size of an object includes the objects it refers to, counting shared objects once."""
+        shared_str = 'x' * 1000
+        codelist = iati.Codelist('a name')
+        codelist.codes.add(iati.Code(shared_str, shared_str))
+
+        assert iati.cache.approximate_size([shared_str, shared_str]) < 2 * len(shared_str)
+        assert iati.cache.approximate_size(codelist) > len(shared_str)
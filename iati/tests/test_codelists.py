@@ -1,8 +1,13 @@
 """A module containing tests for the library representation of Codelists."""
+import concurrent.futures
 import copy
+import pickle
 import pytest
 from lxml import etree
 import iati.codelists
+import iati.default
+import iati.resources
+import iati.utilities
 
 
 class TestCodelistsNonClass:
@@ -123,6 +128,357 @@ class TestCodelists:
         assert type_tree[0][0].nsmap == iati.constants.NSMAP
 
 
+class TestParsedCodelists:
+    """A container for tests relating to Codelists read in columnar form."""
+
+    @pytest.fixture
+    def codelist_path(self):
+        """Return the path of a Codelist whose Codes have categories."""
+        return iati.resources.create_codelist_path('Sector', '2.03')
+
+    @pytest.fixture
+    def parsed_codelist(self, codelist_path):
+        """Return a Codelist read in columnar form."""
+        return iati.codelists.parse_codelist(iati.utilities.load_as_bytes(codelist_path))
+
+    @pytest.mark.parametrize('name, version', [('Country', '1.05'), ('Sector', '2.03'), ('Version', '2.03'), ('ActivityStatus', '2.02')])
+    def test_parsed_codelist_equal_to_codelist_from_xml(self, name, version):
+        """Check that a Codelist read in columnar form is equal to one created from the same XML."""
+        path = iati.resources.create_codelist_path(name, version)
+        codelist = iati.Codelist(name, xml=iati.utilities.load_as_string(path))
+        parsed_codelist = iati.codelists.parse_codelist(iati.utilities.load_as_bytes(path))
+
+        assert parsed_codelist == codelist
+        assert hash(parsed_codelist) == hash(codelist)
+        assert (parsed_codelist.name, parsed_codelist.complete) == (codelist.name, codelist.complete)
+
+    def test_parsed_codelist_variations(self):
+        """Check that Codes with empty, missing or unnarrated elements are read in the same way as by a Codelist created from XML."""
+        codelist_xml = """<codelist name="variations">
+            <codelist-items>
+                <codelist-item><code>1</code><name><narrative>one</narrative><narrative xml:lang="fr">un</narrative></name></codelist-item>
+                <codelist-item><code>2</code><name>two</name></codelist-item>
+                <codelist-item><code>3</code><name><narrative/></name></codelist-item>
+                <codelist-item><!-- a comment --><code/></codelist-item>
+                <codelist-item/>
+            </codelist-items>
+        </codelist>"""
+        parsed_codelist = iati.codelists.parse_codelist(codelist_xml.encode('utf-8'))
+
+        assert parsed_codelist == iati.Codelist('variations', xml=codelist_xml)
+        assert parsed_codelist.complete is None
+        assert iati.Code('1', 'one') in parsed_codelist.codes
+        assert iati.Code('2', 'two') in parsed_codelist.codes
+
+    def test_parsed_codelist_codes_created_on_access(self, parsed_codelist):
+        """Check that the Codes within a Codelist read in columnar form are created when first accessed, after which the columns are discarded."""
+        assert parsed_codelist._codes is None  # pylint: disable=protected-access
+        assert '111' in parsed_codelist._code_columns.categories  # pylint: disable=protected-access
+
+        assert iati.Code('11110', 'Education policy and administrative management') in parsed_codelist.codes
+        assert parsed_codelist._code_columns is None  # pylint: disable=protected-access
+
+    def test_parsed_codelist_shared_copy(self, parsed_codelist):
+        """Check that a shared copy of a Codelist read in columnar form may be modified without affecting the original."""
+        codelist_copy = parsed_codelist.shared_copy()
+        codelist_copy.codes.add(iati.Code('new', 'a new Code'))
+
+        assert 'new' not in parsed_codelist.codes
+        assert len(codelist_copy.codes) == len(parsed_codelist.codes) + 1
+
+    def test_parsed_codelist_shared_copies_share_codes(self, parsed_codelist):
+        """Check that the Codes within a Codelist read in columnar form are created once, rather than by each shared copy."""
+        first_copy = parsed_codelist.shared_copy()
+        second_copy = parsed_codelist.shared_copy()
+
+        assert {id(code) for code in first_copy.codes} == {id(code) for code in second_copy.codes}
+
+    def test_parsed_codelist_pickle(self, parsed_codelist, codelist_path):
+        """Check that a Codelist read in columnar form may be pickled before its Codes are created."""
+        unpickled_codelist = pickle.loads(pickle.dumps(parsed_codelist))
+
+        assert unpickled_codelist == iati.Codelist('Sector', xml=iati.utilities.load_as_string(codelist_path))
+
+
+class TestCodelistSharedCopies:
+    """A container for tests relating to copies of Codelists that share their Codes."""
+
+    @pytest.fixture
+    def codelist(self):
+        """Return a Codelist containing two Codes."""
+        codelist = iati.Codelist('test Codelist name')
+        codelist.codes.update([iati.Code('1', 'one'), iati.Code('2', 'two')])
+        return codelist
+
+    @pytest.mark.parametrize('modify', [
+        lambda codes: codes.add(iati.Code('3', 'three')),
+        lambda codes: codes.discard(iati.Code('1', 'one')),
+        lambda codes: codes.remove(iati.Code('1', 'one')),
+        lambda codes: codes.pop(),
+        lambda codes: codes.clear(),
+        lambda codes: codes.update([iati.Code('3', 'three')]),
+        lambda codes: codes.__ior__({iati.Code('3', 'three')}),
+        lambda codes: codes.__isub__({iati.Code('1', 'one')})
+    ])
+    def test_shared_copies_modified_independently(self, codelist, modify):
+        """Check that modifying the Codes of either a Codelist or its shared copy does not affect the other."""
+        original_codes = set(codelist.codes)
+        codelist_copy = codelist.shared_copy()
+        second_copy = codelist_copy.shared_copy()
+
+        modify(codelist_copy.codes)
+
+        assert set(codelist.codes) == original_codes
+        assert set(second_copy.codes) == original_codes
+        assert set(codelist_copy.codes) != original_codes
+
+        modify(codelist.codes)
+
+        assert set(second_copy.codes) == original_codes
+
+    def test_shared_copy_equal(self, codelist):
+        """Check that a shared copy is equal to, and has the same hash as, the original Codelist."""
+        codelist_copy = codelist.shared_copy()
+
+        assert codelist_copy == codelist
+        assert hash(codelist_copy) == hash(codelist)
+        assert codelist_copy.codes == set(codelist.codes)
+        assert iati.Code('1', 'one') in codelist_copy.codes
+
+    def test_shared_copy_does_not_copy_codes(self, codelist):
+        """Check that a shared copy contains the same Code objects, rather than copies of them."""
+        codelist_copy = codelist.shared_copy()
+
+        assert {id(code) for code in codelist_copy.codes} == {id(code) for code in codelist.codes}
+
+    def test_shared_copy_attributes_independent(self, codelist):
+        """Check that attributes other than the Codes may be changed on a shared copy without affecting the original Codelist."""
+        codelist_copy = codelist.shared_copy()
+
+        codelist_copy.name = 'a different name'
+        codelist_copy.complete = True
+
+        assert codelist.name == 'test Codelist name'
+        assert codelist.complete is None
+
+    @pytest.mark.parametrize('operation', [
+        lambda codes: codes.union({iati.Code('3', 'three')}),
+        lambda codes: codes.intersection({iati.Code('1', 'one')}),
+        lambda codes: codes.difference({iati.Code('1', 'one')}),
+        lambda codes: codes.symmetric_difference({iati.Code('1', 'one'), iati.Code('3', 'three')}),
+        lambda codes: codes | {iati.Code('3', 'three')},
+        lambda codes: {iati.Code('3', 'three')} | codes,
+        lambda codes: codes - {iati.Code('1', 'one')},
+        lambda codes: codes.issubset({iati.Code('1', 'one')}),
+        lambda codes: codes.issuperset({iati.Code('1', 'one')}),
+        lambda codes: codes.isdisjoint({iati.Code('1', 'one')}),
+        lambda codes: codes <= {iati.Code('1', 'one')},
+        lambda codes: codes == {iati.Code('1', 'one'), iati.Code('2', 'two')},
+        lambda codes: codes.copy()
+    ])
+    def test_shared_copy_set_api(self, codelist, operation):
+        """Check that the Codes of a shared copy support the same operations, with the same results, as a built-in set."""
+        expected = operation(set(codelist.codes))
+
+        result = operation(codelist.shared_copy().codes)
+
+        assert result == expected
+        assert type(result) is type(expected)  # pylint: disable=unidiomatic-typecheck
+
+    @pytest.mark.parametrize('modify', [
+        lambda codes: codes.intersection_update({iati.Code('1', 'one')}),
+        lambda codes: codes.difference_update({iati.Code('1', 'one')}),
+        lambda codes: codes.symmetric_difference_update({iati.Code('1', 'one'), iati.Code('3', 'three')}),
+        lambda codes: codes.__iand__({iati.Code('1', 'one')})
+    ])
+    def test_shared_copy_set_api_modifications(self, codelist, modify):
+        """Check that the in-place operations of a built-in set modify only the Codes of the Codelist they are applied to."""
+        original_codes = set(codelist.codes)
+        expected_codes = set(original_codes)
+        modify(expected_codes)
+        codelist_copy = codelist.shared_copy()
+
+        modify(codelist_copy.codes)
+
+        assert set(codelist_copy.codes) == expected_codes
+        assert set(codelist.codes) == original_codes
+
+    def test_shared_copy_does_not_take_ownership(self, codelist):
+        """Check that a set of Codes assigned to a Codelist is not modified by changes to a shared copy."""
+        codes = {iati.Code('1', 'one')}
+        codelist.codes = codes
+        codelist_copy = codelist.shared_copy()
+
+        codelist.codes.add(iati.Code('2', 'two'))
+        codelist_copy.codes.add(iati.Code('3', 'three'))
+
+        assert codes == {iati.Code('1', 'one')}
+
+    def test_default_codes_set_api(self):
+        """Check that the Codes of a default Codelist may be combined with other sets."""
+        codes = iati.default.codelist('Country', '2.03').codes
+        other_code = iati.Code('not a country', '')
+
+        assert codes.union({other_code}) == set(codes) | {other_code}
+        assert codes.issuperset(list(codes)[:5])
+
+    def test_shared_copies_from_many_threads(self, codelist):
+        """Check that a Codelist may be copied from many threads at once, with each copy modified independently."""
+        original_codes = set(codelist.codes)
+
+        def copy_and_modify(idx):
+            """Take a shared copy of the Codelist and add a Code to it."""
+            codelist_copy = codelist.shared_copy()
+            codelist_copy.codes.add(iati.Code(str(idx)))
+            return codelist_copy
+
+        with concurrent.futures.ThreadPoolExecutor(8) as executor:
+            copies = list(executor.map(copy_and_modify, range(100, 200)))
+
+        assert set(codelist.codes) == original_codes
+        assert all(len(codelist_copy.codes) == len(original_codes) + 1 for codelist_copy in copies)
+
+    def test_shared_copy_deepcopy_and_pickle(self, codelist):
+        """Check that shared copies may be deep copied and pickled."""
+        codelist_copy = codelist.shared_copy()
+
+        assert copy.deepcopy(codelist_copy) == codelist
+        assert pickle.loads(pickle.dumps(codelist_copy)) == codelist
+
+
+class TestCodelistFingerprint:
+    """A container for tests relating to the fingerprint of a Codelist."""
+
+    @pytest.fixture
+    def codelist(self):
+        """Return a Codelist containing some Codes."""
+        codelist = iati.Codelist('a-codelist')
+        codelist.codes.update([iati.Code('1', 'one'), iati.Code('2', 'two')])
+        return codelist
+
+    def test_codelist_fingerprint_equal(self, codelist):
+        """Check that equal Codelists have the same fingerprint."""
+        assert codelist.fingerprint == copy.deepcopy(codelist).fingerprint
+        assert codelist.fingerprint == codelist.shared_copy().fingerprint
+        assert len(codelist.fingerprint) == 64
+
+    @pytest.mark.parametrize('modify', [
+        lambda codelist: setattr(codelist, 'name', 'another-name'),
+        lambda codelist: setattr(codelist, 'complete', True),
+        lambda codelist: codelist.codes.add(iati.Code('3', 'three')),
+        lambda codelist: codelist.codes.discard(iati.Code('1', 'one')),
+        lambda codelist: codelist.codes.discard(iati.Code('1', 'one')) or codelist.codes.add(iati.Code('1', 'one with a difference'))
+    ])
+    def test_codelist_fingerprint_changes_when_modified(self, codelist, modify):
+        """Check that the fingerprint of a Codelist changes when it is modified, including after it has been calculated."""
+        fingerprint = codelist.fingerprint
+        modify(codelist)
+
+        assert codelist.fingerprint != fingerprint
+        assert codelist.fingerprint == copy.deepcopy(codelist).fingerprint
+
+    def test_codelist_fingerprint_memoised(self, codelist, monkeypatch):
+        """Check that the fingerprint of the Codes within a Codelist is calculated once while they are not modified, and shared with shared copies."""
+        fingerprint = codelist.fingerprint
+        monkeypatch.setattr(iati.codelists, '_fingerprint_code_pairs', pytest.fail)
+
+        assert codelist.fingerprint == fingerprint
+        assert codelist.shared_copy().fingerprint == fingerprint
+
+    def test_parsed_codelist_fingerprint_without_codes(self, monkeypatch):
+        """Check that a Codelist created by `parse_codelist()` is fingerprinted without creating its Codes, with the same fingerprint as once they are created."""
+        data = iati.utilities.load_as_bytes(iati.resources.create_codelist_path('Country', '2.03'))
+        parsed_codelist = iati.codelists.parse_codelist(data)
+
+        with monkeypatch.context() as patch:
+            patch.setattr(iati, 'Code', pytest.fail)
+            fingerprint = parsed_codelist.fingerprint
+
+        assert fingerprint == iati.Codelist('Country', xml=data.decode('utf-8')).fingerprint
+        assert len(parsed_codelist.codes) > 0
+        assert parsed_codelist.fingerprint == fingerprint
+
+
+class TestCodelistIndex:
+    """A container for tests relating to looking up and checking values against the index of a Codelist."""
+
+    @pytest.fixture
+    def codelist(self):
+        """Return a Codelist containing three Codes, two of which have the same name."""
+        codelist = iati.Codelist('test Codelist name')
+        codelist.codes.update([iati.Code('1', 'odd'), iati.Code('2', 'even'), iati.Code('3', 'odd')])
+        return codelist
+
+    def test_codelist_code_for_value(self, codelist):
+        """Check that the Code with a value is located."""
+        assert codelist.code_for_value('2') == iati.Code('2', 'even')
+        assert codelist.code_for_value('4') is None
+
+    def test_codelist_values_for_name(self, codelist):
+        """Check that the values of the Codes with a name are located."""
+        assert codelist.values_for_name('odd') == frozenset(['1', '3'])
+        assert codelist.values_for_name('prime') == frozenset()
+
+    @pytest.mark.parametrize('values, expected_invalid_values', [
+        ([], set()),
+        (['1', '2', '2'], set()),
+        (['1', '4', '4', '', None], {'4', '', None}),
+        (iter(['5']), {'5'})
+    ])
+    def test_codelist_batch_checks(self, codelist, values, expected_invalid_values):
+        """Check that values that are not on a Codelist are identified, however many times they occur."""
+        values = list(values)
+
+        assert codelist.invalid_values(values) == expected_invalid_values
+        assert codelist.contains_all(values) == (not expected_invalid_values)
+
+    def test_codelist_isin(self, codelist):
+        """Check that values within lists and NumPy arrays of strings are checked against a Codelist, in the manner of `numpy.isin()`."""
+        numpy = pytest.importorskip('numpy')
+
+        for values in [['1', '4', '3'], numpy.array(['1', '4', '3']), numpy.array(['1', '4', '3'], dtype=object)]:
+            assert codelist.isin(values).tolist() == [True, False, True]
+        assert codelist.isin(numpy.array([['1', '2'], ['4', '']])).tolist() == [[True, True], [False, False]]
+        assert codelist.isin([]).shape == (0,)
+
+    @pytest.mark.parametrize('modify', [
+        lambda codes: codes.add(iati.Code('4', 'even')),
+        lambda codes: codes.discard(iati.Code('2', 'even')),
+        lambda codes: codes.clear(),
+        lambda codes: codes.__ior__({iati.Code('4', 'even')})
+    ])
+    def test_codelist_index_updated_when_modified(self, codelist, modify):
+        """Check that the index reflects changes to the Codes, both before and after it is first used."""
+        assert codelist.contains_all(['2'])
+        modify(codelist.codes)
+
+        assert codelist.values_for_name('even') == frozenset(code.value for code in codelist.codes if code.name == 'even')
+
+        codelist.codes = set([iati.Code('5', 'odd')])
+
+        assert codelist.values_for_name('odd') == frozenset(['5'])
+
+    def test_codelist_index_shared_with_shared_copies(self, codelist):
+        """Check that shared copies of a Codelist share its index until either is modified."""
+        codelist.contains_all([])
+        codelist_copy = codelist.shared_copy()
+
+        assert codelist_copy._index() is codelist._index()  # pylint: disable=protected-access
+
+        codelist_copy.codes.add(iati.Code('4', 'even'))
+
+        assert codelist_copy.contains_all(['4'])
+        assert not codelist.contains_all(['4'])
+
+    def test_codelist_index_not_pickled(self, codelist):
+        """Check that a Codelist is pickled without its index, which is built again when needed."""
+        codelist.contains_all([])
+        pickled_codelist = pickle.dumps(codelist)
+
+        assert b'values_by_name' not in pickled_codelist
+        assert pickle.loads(pickled_codelist).values_for_name('odd') == frozenset(['1', '3'])
+
+
 class TestCodes:
     """A container for tests relating to Codes."""
 
@@ -165,6 +521,30 @@ class TestCodes:
         assert enum_el.attrib['value'] == value_to_set
         assert enum_el.nsmap == iati.constants.NSMAP
 
+    @pytest.mark.parametrize('attribute', ['name', 'value', '_description'])
+    def test_code_cannot_be_modified(self, attribute):
+        """Check that the attributes of a Code cannot be changed once it has been instantiated."""
+        code = iati.Code('test Code value', 'test Code name')
+
+        with pytest.raises(AttributeError):
+            setattr(code, attribute, 'a new value')
+
+    def test_code_has_no_instance_dict(self):
+        """Check that Codes store their attributes without a per-instance dictionary."""
+        code = iati.Code('test Code value')
+
+        assert not hasattr(code, '__dict__')
+
+    def test_code_pickle_round_trip(self):
+        """Check that an unpickled Code is equal to, and has the same hash as, the original."""
+        code = iati.Code('test Code value', 'test Code name')
+
+        unpickled_code = pickle.loads(pickle.dumps(code))
+
+        assert unpickled_code == code
+        assert hash(unpickled_code) == hash(code)
+        assert unpickled_code.name == code.name
+
 
 class TestCodelistEquality:
     """A container for tests relating to Codelist equality - both direct and via hashing."""
@@ -222,8 +602,7 @@ class TestCodelistEquality:
         """
         codelist_copy = copy.deepcopy(codelist)
         code = codelist_copy.codes.pop()
-        code.name = code.name + 'with a difference'
-        codelist_copy.codes.add(code)
+        codelist_copy.codes.add(iati.Code(code.value, code.name + 'with a difference'))
 
         assert cmp_func_different_val(codelist, codelist_copy)
 
@@ -237,8 +616,7 @@ class TestCodelistEquality:
         """
         codelist_copy = copy.deepcopy(codelist)
         code = codelist_copy.codes.pop()
-        code.name = code.name + 'with a difference'
-        codelist_copy.codes.add(code)
+        codelist_copy.codes.add(iati.Code(code.value, code.name + 'with a difference'))
 
         assert cmp_func_equal_hash(codelist, codelist_copy)
 
@@ -250,7 +628,6 @@ class TestCodelistEquality:
         """
         codelist_copy = copy.deepcopy(codelist)
         code = codelist_copy.codes.pop()
-        code.value = code.value + 'with a difference'
-        codelist_copy.codes.add(code)
+        codelist_copy.codes.add(iati.Code(code.value + 'with a difference', code.name))
 
         assert cmp_func_different_val_and_hash(codelist, codelist_copy)
@@ -1,10 +1,26 @@
 """A module containing tests for the library representation of default values."""
+import collections
+import gc
+import threading
+import weakref
 import pytest
+import iati.cache
 import iati.codelists
 import iati.constants
 import iati.default
+import iati.resources
 import iati.schemas
 import iati.tests.utilities
+import iati.utilities
+
+
+@pytest.fixture
+def empty_caches(monkeypatch):
+    """Empty the caches of default data for the duration of a test."""
+    monkeypatch.setattr(iati.default, '_CODELISTS', iati.cache.LRUCache())
+    monkeypatch.setattr(iati.default, '_CODELISTS_BY_CONTENT', weakref.WeakValueDictionary())
+    monkeypatch.setattr(iati.default, '_CODELIST_MAPPINGS', iati.cache.LRUCache())
+    monkeypatch.setattr(iati.default, '_SCHEMAS', iati.cache.LRUCache())
 
 
 class TestDefault:
@@ -362,6 +378,17 @@ class TestDefaultModifications:
         assert len(default_codelist.codes) == base_default_codelist_length + 1
         assert len(unmodified_codelist.codes) == base_default_codelist_length
 
+    def test_default_codelist_removal(self, codelist_name, std_ver_minor_mixedinst_valid_fullsupport):
+        """Check that a default Codelist cannot be modified by removing Codes from returned lists."""
+        default_codelist = iati.default.codelist(codelist_name, std_ver_minor_mixedinst_valid_fullsupport)
+        base_default_codelist_length = len(default_codelist.codes)
+
+        default_codelist.codes.clear()
+        unmodified_codelist = iati.default.codelist(codelist_name, std_ver_minor_mixedinst_valid_fullsupport)
+
+        assert len(default_codelist.codes) == 0
+        assert len(unmodified_codelist.codes) == base_default_codelist_length
+
     def test_default_codelists_modification(self, codelist_name, new_code, std_ver_minor_mixedinst_valid_fullsupport):
         """Check that default Codelists cannot be modified by adding Codes to returned lists with default parameters."""
         default_codelists = iati.default.codelists(std_ver_minor_mixedinst_valid_fullsupport)
@@ -414,3 +441,280 @@ class TestDefaultModifications:
 
         assert len(default_schema.codelists) == base_codelist_count + 1
         assert len(unmodified_schema.codelists) == base_codelist_count
+
+    @pytest.mark.parametrize("default_call", [
+        iati.default.activity_schema,
+        iati.default.organisation_schema
+    ])
+    def test_default_x_schema_modification_contents(self, default_call, new_code, std_ver_minor_mixedinst_valid_fullsupport):
+        """Check that the Codelists and Rulesets within populated default Schemas cannot be modified."""
+        default_schema = default_call(std_ver_minor_mixedinst_valid_fullsupport, True)
+        base_code_counts = {codelist.name: len(codelist.codes) for codelist in default_schema.codelists}
+        base_rule_counts = [len(ruleset.rules) for ruleset in default_schema.rulesets]
+
+        for codelist in default_schema.codelists:
+            codelist.codes.add(new_code)
+        for ruleset in default_schema.rulesets:
+            ruleset.rules.clear()
+        unmodified_schema = default_call(std_ver_minor_mixedinst_valid_fullsupport, True)
+
+        assert {codelist.name: len(codelist.codes) for codelist in unmodified_schema.codelists} == base_code_counts
+        assert [len(ruleset.rules) for ruleset in unmodified_schema.rulesets] == base_rule_counts
+
+    def test_default_codelist_mapping_cached_on_disk(self, tmpdir, monkeypatch):
+        """Check that the Codelist Mapping File is parsed once, then loaded from the on-disk cache in new processes."""
+        monkeypatch.setenv(iati.cache.CACHE_DIR_ENV_VAR, str(tmpdir))
+        monkeypatch.setattr(iati.default, '_CODELIST_MAPPINGS', iati.cache.LRUCache())
+        mapping = iati.default.codelist_mapping('2.02')
+
+        monkeypatch.setattr(iati.default, '_CODELIST_MAPPINGS', iati.cache.LRUCache())
+        monkeypatch.setattr(iati.utilities, 'convert_xml_to_tree', pytest.fail)
+
+        assert iati.default.codelist_mapping('2.02') == mapping
+        assert len(tmpdir.join('codelist_mappings').listdir()) == 1
+
+    def test_default_codelist_mapping_modification(self, std_ver_minor_mixedinst_valid_fullsupport):
+        """Check that the default Codelist Mapping cannot be modified."""
+        default_mapping = iati.default.codelist_mapping(std_ver_minor_mixedinst_valid_fullsupport)
+        base_mapping_length = len(default_mapping['Country'])
+
+        default_mapping['Country'][0]['condition'] = 'modified'
+        default_mapping['Country'].clear()
+        unmodified_mapping = iati.default.codelist_mapping(std_ver_minor_mixedinst_valid_fullsupport)
+
+        assert len(unmodified_mapping['Country']) == base_mapping_length
+        assert all(mapping['condition'] != 'modified' for mapping in unmodified_mapping['Country'])
+
+
+class TestDefaultPreload:
+    """A container for tests relating to loading default data ahead of time."""
+
+    @pytest.mark.fixed_to_202
+    def test_preload_populates_caches(self, empty_caches):  # pylint: disable=unused-argument
+        """Check that preloading a version of the Standard fills each cache of default data for that version."""
+        iati.default.preload(['2.02'])
+        version = iati.Version('2.02')
+
+        assert (version, 'Country') in iati.default._CODELISTS  # pylint: disable=protected-access
+        assert version in iati.default._CODELIST_MAPPINGS  # pylint: disable=protected-access
+        assert (version, 'populated', 'iati-activities') in iati.default._SCHEMAS  # pylint: disable=protected-access
+        assert (version, 'populated', 'iati-organisations') in iati.default._SCHEMAS  # pylint: disable=protected-access
+
+    @pytest.mark.fixed_to_202
+    def test_preload_reports_load_times(self, empty_caches):  # pylint: disable=unused-argument
+        """Check that the time taken to load each component for each version is reported."""
+        components = ['codelists', 'codelist_mapping']
+
+        load_times = iati.default.preload(['2.01', '2.02'], components)
+
+        assert set(load_times.keys()) == {(version, component) for version in ['2.01', '2.02'] for component in components}
+        assert all(load_time >= 0 for load_time in load_times.values())
+
+    def test_preload_defaults_to_all_supported_versions_and_components(self, monkeypatch):
+        """Check that every component is loaded for every fully supported version when nothing is specified."""
+        monkeypatch.setattr(iati.default, 'PRELOAD_COMPONENTS', {'component': lambda version: None})
+
+        load_times = iati.default.preload()
+
+        assert set(load_times.keys()) == {(version, 'component') for version in iati.version.STANDARD_VERSIONS_SUPPORTED}
+
+    def test_preload_unknown_component(self):
+        """Check that a ValueError is raised when an unknown component is specified."""
+        with pytest.raises(ValueError):
+            iati.default.preload(['2.02'], ['not a component'])
+
+    def test_preload_invalid_version(self, std_ver_minor_uninst_valueerr_str_decimal):
+        """Check that a ValueError is raised when an invalid version is specified."""
+        with pytest.raises(ValueError):
+            iati.default.preload([std_ver_minor_uninst_valueerr_str_decimal], ['codelist_mapping'])
+
+    def test_preload_freeze(self, monkeypatch):
+        """Check that the garbage collector is frozen once default data is loaded, where this is supported."""
+        frozen = list()
+        monkeypatch.setattr(iati.default.gc, 'freeze', lambda: frozen.append(True), raising=False)
+
+        iati.default.preload(['2.02'], ['codelist_mapping'], freeze=True)
+
+        assert frozen == [True]
+
+
+class TestDefaultConcurrency:
+    """A container for stress tests relating to loading defaults from multiple threads at once."""
+
+    num_threads = 16
+
+    @pytest.fixture
+    def load_counts(self, monkeypatch):
+        """Count the number of times that each Codelist is loaded."""
+        counts = collections.Counter()
+        counts_lock = threading.Lock()
+
+        def counting(load_func):
+            """Wrap a function that loads a Codelist so that each call is counted against the name of the Codelist."""
+            def counted(*args, **kwargs):
+                """Load the Codelist, then count the call."""
+                codelist = load_func(*args, **kwargs)
+                with counts_lock:
+                    counts[codelist.name] += 1
+                return codelist
+            return counted
+
+        monkeypatch.setattr(iati.codelists, 'parse_codelist', counting(iati.codelists.parse_codelist))
+        return counts
+
+    def run_concurrently(self, func):
+        """Call a function from many threads at once, returning the results and raising the first error."""
+        barrier = threading.Barrier(self.num_threads)
+        results = [None] * self.num_threads
+        errors = list()
+
+        def run(idx):
+            """Wait for all threads to be ready, then call the function."""
+            barrier.wait()
+            try:
+                results[idx] = func()
+            except Exception as err:  # pylint: disable=broad-except
+                errors.append(err)
+
+        threads = [threading.Thread(target=run, args=(idx,)) for idx in range(self.num_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if errors:
+            raise errors[0]
+        return results
+
+    @pytest.mark.fixed_to_202
+    def test_concurrent_codelist_loaded_once(self, empty_caches, load_counts):  # pylint: disable=unused-argument
+        """Check that a Codelist requested by many threads at once is only loaded once, with each thread given an equal copy."""
+        results = self.run_concurrently(lambda: iati.default.codelist('Country', '2.02'))
+
+        assert load_counts['Country'] == 1
+        assert all(result == results[0] for result in results)
+        assert len(set(id(result) for result in results)) == self.num_threads
+
+    @pytest.mark.fixed_to_202
+    def test_concurrent_cached_codelists_loaded_once(self, empty_caches, load_counts):  # pylint: disable=unused-argument
+        """Check that every Codelist is only loaded once when all Codelists are requested from the cache by many threads at once."""
+        results = self.run_concurrently(lambda: iati.default._codelists('2.02', use_cache=True))  # pylint: disable=protected-access
+
+        assert set(load_counts.values()) == {1}
+        assert len(load_counts) == len(results[0])
+        assert all(result == results[0] for result in results)
+
+    @pytest.mark.fixed_to_202
+    def test_concurrent_uncached_codelists_loaded_by_each_caller(self, empty_caches, load_counts):  # pylint: disable=unused-argument
+        """Check that Codelists requested without using the cache are loaded by each thread, so that no thread is given a shared object."""
+        results = self.run_concurrently(lambda: iati.default.codelists('2.02')['Country'])
+
+        assert load_counts['Country'] == self.num_threads
+        assert len(set(id(result) for result in results)) == self.num_threads
+
+    @pytest.mark.fixed_to_202
+    def test_concurrent_cached_schema_loaded_once(self, empty_caches):  # pylint: disable=unused-argument
+        """Check that a Schema requested from the cache by many threads at once is only loaded once, with each thread given the same Schema."""
+        schema_paths = list()
+
+        class CountedActivitySchema(iati.ActivitySchema):
+            """An Activity Schema that records the path of each Schema that is loaded."""
+
+            def __init__(self, path):
+                """Record the path, then load the Schema."""
+                schema_paths.append(path)
+                super(CountedActivitySchema, self).__init__(path)
+
+        results = self.run_concurrently(lambda: iati.default._schema(iati.resources.get_activity_schema_paths, CountedActivitySchema, iati.Version('2.02'), True, True))  # pylint: disable=protected-access
+
+        assert len(schema_paths) == 1
+        assert all(result is results[0] for result in results)
+
+    @pytest.mark.fixed_to_202
+    def test_concurrent_loads_removed_once_finished(self, empty_caches):  # pylint: disable=unused-argument
+        """Check that no record of a load is kept once every thread has loaded the item, so that the records do not grow with the number of items loaded."""
+        self.run_concurrently(lambda: iati.default._codelists('2.02', use_cache=True))  # pylint: disable=protected-access
+
+        assert iati.default._LOADS == {}  # pylint: disable=protected-access
+
+    def test_failed_loads_removed(self, empty_caches):  # pylint: disable=unused-argument
+        """Check that no record of a load is kept when loading the item raises an error, and that the item may be loaded again afterwards."""
+        def fail_to_load():
+            """Fail to load an item."""
+            raise ValueError
+
+        with pytest.raises(ValueError):
+            self.run_concurrently(lambda: iati.default._load_into_cache(iati.default._SCHEMAS, 'item', fail_to_load, True))  # pylint: disable=protected-access
+
+        assert iati.default._LOADS == {}  # pylint: disable=protected-access
+        assert iati.default._load_into_cache(iati.default._SCHEMAS, 'item', lambda: 'loaded', True) == 'loaded'  # pylint: disable=protected-access
+
+
+class TestDefaultCaches:
+    """A container for tests relating to the caches of default data."""
+
+    def test_caches(self, empty_caches):  # pylint: disable=unused-argument
+        """Check that the cache for each type of default data is given."""
+        assert iati.default.caches() == {
+            'codelists': iati.default._CODELISTS,  # pylint: disable=protected-access
+            'codelist_mappings': iati.default._CODELIST_MAPPINGS,  # pylint: disable=protected-access
+            'schemas': iati.default._SCHEMAS  # pylint: disable=protected-access
+        }
+
+    @pytest.mark.fixed_to_202
+    def test_cache_hits_and_misses(self, empty_caches):  # pylint: disable=unused-argument
+        """Check that loading a default Codelist counts a miss the first time and a hit thereafter."""
+        codelists_cache = iati.default.caches()['codelists']
+
+        iati.default.codelist('Country', '2.02')
+        iati.default.codelist('Country', '2.02')
+
+        assert codelists_cache.statistics()['misses'] >= 1
+        assert codelists_cache.statistics()['hits'] >= 1
+
+    @pytest.mark.fixed_to_202
+    def test_bounded_cache(self, empty_caches):  # pylint: disable=unused-argument
+        """Check that the number of default Codelists held is bounded, and that Codelists are still given when evicted."""
+        codelists_cache = iati.default.caches()['codelists']
+        codelists_cache.resize(max_entries=5)
+
+        codelists = iati.default.codelists('2.02')
+        country_codelist = iati.default.codelist('Country', '2.02')
+
+        assert len(codelists_cache) == 5
+        assert codelists_cache.evictions >= len(codelists) - 5
+        assert country_codelist == codelists['Country']
+
+    @pytest.mark.fixed_to_202
+    def test_clear_caches(self, empty_caches):  # pylint: disable=unused-argument
+        """Check that clearing the caches removes every item of default data."""
+        iati.default.preload(['2.02'], ['codelists', 'codelist_mapping'])
+
+        iati.default.clear_caches()
+
+        assert all(len(cache) == 0 for cache in iati.default.caches().values())
+
+    @pytest.mark.fixed_to_202
+    def test_identical_codelists_shared_across_versions(self, empty_caches):  # pylint: disable=unused-argument
+        """Check that cached Codelists created from identical XML at different versions are the same instance, while those that differ are not."""
+        codelists_202 = iati.default._codelists('2.02', use_cache=True)  # pylint: disable=protected-access
+        codelists_203 = iati.default._codelists('2.03', use_cache=True)  # pylint: disable=protected-access
+        shared_names = set(codelists_202.keys()) & set(codelists_203.keys())
+
+        for name in shared_names:
+            xml_202 = iati.utilities.load_as_string(iati.resources.create_codelist_path(name, '2.02'))
+            xml_203 = iati.utilities.load_as_string(iati.resources.create_codelist_path(name, '2.03'))
+            assert (codelists_202[name] is codelists_203[name]) is (xml_202 == xml_203)
+
+        assert len(iati.default._CODELISTS_BY_CONTENT) < len(codelists_202) + len(codelists_203)  # pylint: disable=protected-access
+
+    @pytest.mark.fixed_to_202
+    def test_shared_codelists_released_when_evicted(self, empty_caches):  # pylint: disable=unused-argument
+        """Check that Codelists shared across versions are no longer held once they are evicted from the cache for every version."""
+        iati.default._codelists('2.02', use_cache=True)  # pylint: disable=protected-access
+        iati.default._codelists('2.03', use_cache=True)  # pylint: disable=protected-access
+
+        iati.default.clear_caches()
+        gc.collect()
+
+        assert len(iati.default._CODELISTS_BY_CONTENT) == 0  # pylint: disable=protected-access
@@ -0,0 +1,65 @@
+"""A module containing tests for the top-level `iati` package."""
+import subprocess
+import sys
+import pytest
+import iati
+import iati.codelists
+import iati.data
+import iati.rulesets
+import iati.schemas
+import iati.version
+
+
+class TestLazyAttributes:
+    """A container for tests relating to importing the public classes when first accessed."""
+
+    @pytest.mark.parametrize('name, module', [
+        ('Version', iati.version),
+        ('Codelist', iati.codelists),
+        ('Dataset', iati.data),
+        ('RuleUnique', iati.rulesets),
+        ('ActivitySchema', iati.schemas)
+    ])
+    def test_public_class_from_module(self, name, module):
+        """Check that each public class is the class defined within its module."""
+        assert getattr(iati, name) is getattr(module, name)
+
+    def test_public_classes_listed(self):
+        """Check that every public class is listed as an attribute of the package."""
+        assert set(iati.__all__) <= set(dir(iati))
+        assert 'Dataset' in iati.__all__
+
+    def test_submodules_listed(self):
+        """Check that submodules are listed as attributes of the package, whether or not they have been imported."""
+        assert {'default', 'utilities', 'validator'} <= set(dir(iati))
+
+    @pytest.mark.parametrize('statement', [
+        'import iati; iati.default.codelist("Country", "2.03")',
+        'import iati; iati.validator.is_xml("<iati-activities/>")',
+        'import iati; iati.utilities.log_warning; iati.resources.get_codelist_paths; iati.codelists.Codelist; iati.constants.NSMAP'
+    ])
+    def test_submodule_from_package(self, statement):
+        """Check that submodules may be accessed as attributes of the package after `import iati`."""
+        subprocess.run([sys.executable, '-c', statement], check=True)
+
+    def test_unknown_attribute(self):
+        """Check that an AttributeError is raised when accessing something that is not part of the package."""
+        with pytest.raises(AttributeError):
+            iati.NotAClass  # pylint: disable=pointless-statement
+
+    @pytest.mark.skipif(sys.version_info < (3, 7), reason='public classes are imported immediately before Python 3.7')
+    def test_import_does_not_import_dependencies(self):
+        """Check that importing the package does not import its modules, or dependencies that are slow to import."""
+        check = 'import sys, iati; print(" ".join(sorted(name for name in sys.modules if name.startswith(("chardet", "jsonschema", "pkg_resources", "yaml", "iati.")))))'
+
+        imported = subprocess.run([sys.executable, '-c', check], stdout=subprocess.PIPE, check=True).stdout.decode('utf-8').split()
+
+        assert imported == []
+
+    @pytest.mark.parametrize('statement', [
+        'import iati.default; iati.default.activity_schema("2.03")',
+        'import iati.validator; iati.validator.full_validation(iati.Dataset("<iati-activities version=\'2.03\'/>"), iati.default.activity_schema("2.03"))'
+    ])
+    def test_module_imports_its_dependencies(self, statement):
+        """Check that modules import the other modules that they use, rather than relying on `import iati` to do so."""
+        subprocess.run([sys.executable, '-c', statement], check=True)
@@ -0,0 +1,210 @@
+"""A module containing tests for the logging subsystem."""
+import json
+import logging
+import os
+import sys
+import pytest
+import iati.constants
+import iati.logs
+import iati.utilities
+
+
+class FakeClock:
+    """A clock that only moves when told to."""
+
+    def __init__(self):
+        """Initialise a FakeClock at time zero."""
+        self.now = 0.0
+
+    def __call__(self):
+        """Return the current time."""
+        return self.now
+
+
+def make_record(msg, *args):
+    """Create a warning record from the primary IATI Logger."""
+    return logging.LogRecord(iati.constants.LOGGER_NAME, logging.WARNING, __file__, 1, msg, args, None)
+
+
+class TestRateLimitFilter:
+    """A container for tests relating to rate limiting and de-duplicating records."""
+
+    @pytest.fixture
+    def clock(self):
+        """Return a clock that only moves when told to."""
+        return FakeClock()
+
+    def test_duplicate_messages_dropped(self, clock):
+        """Check that identical messages pass the filter once within each period."""
+        rate_filter = iati.logs.RateLimitFilter(rate_limit=10, period=60, clock=clock)
+
+        assert rate_filter.filter(make_record('Message %s', 1))
+        assert not rate_filter.filter(make_record('Message %s', 1))
+        assert rate_filter.filter(make_record('Message %s', 2))
+
+    def test_template_rate_limited(self, clock):
+        """Check that at most the rate limit of records from a single template pass within each period."""
+        rate_filter = iati.logs.RateLimitFilter(rate_limit=3, period=60, clock=clock)
+
+        passed = [rate_filter.filter(make_record('Message %s', idx)) for idx in range(5)]
+
+        assert passed == [True, True, True, False, False]
+        assert rate_filter.filter(make_record('Another message'))
+
+    def test_suppressed_records_counted(self, clock):
+        """Check that the first record to pass in a later period states how many records were dropped."""
+        rate_filter = iati.logs.RateLimitFilter(rate_limit=1, period=60, clock=clock)
+        records = [make_record('Message %s', idx) for idx in range(4)]
+
+        assert [rate_filter.filter(record) for record in records[:3]] == [True, False, False]
+        clock.now = 60
+        assert rate_filter.filter(records[3])
+        assert records[0].suppressed == 0
+        assert records[3].suppressed == 2
+
+    def test_groups_bounded(self, clock):
+        """Check that the least recently seen groups are forgotten once there are too many."""
+        rate_filter = iati.logs.RateLimitFilter(rate_limit=1, period=60, max_groups=2, clock=clock)
+
+        for msg in ['first', 'second', 'third']:
+            assert rate_filter.filter(make_record(msg))
+
+        assert rate_filter.filter(make_record('first'))
+        assert not rate_filter.filter(make_record('third'))
+
+
+class TestJSONFormatter:
+    """A container for tests relating to structured records."""
+
+    def test_record_formatted_as_json(self):
+        """Check that a record is formatted as a single-line JSON object, including values given with `extra`."""
+        record = make_record('Message %s', 1)
+        record.path = 'a/path'
+        record.suppressed = 3
+
+        formatted = iati.logs.JSONFormatter().format(record)
+        structured = json.loads(formatted)
+
+        assert '\n' not in formatted
+        assert structured['level'] == 'WARNING'
+        assert structured['logger'] == iati.constants.LOGGER_NAME
+        assert structured['message'] == 'Message 1'
+        assert structured['suppressed'] == 3
+        assert structured['path'] == 'a/path'
+        assert structured['time'].endswith('Z')
+
+    def test_exception_included(self):
+        """Check that the traceback of an exception is included."""
+        try:
+            raise ValueError('A problem')
+        except ValueError as err:
+            record = logging.LogRecord(iati.constants.LOGGER_NAME, logging.ERROR, __file__, 1, 'Message', None, (type(err), err, err.__traceback__))
+
+        structured = json.loads(iati.logs.JSONFormatter().format(record))
+
+        assert 'ValueError: A problem' in structured['exception']
+
+
+class TestLoggingConfiguration:
+    """A container for tests relating to configuring the logging subsystem."""
+
+    def test_records_routed_to_handlers(self, log_records):
+        """Check that records are written to the configured handlers, with repeated messages dropped."""
+        for _ in range(3):
+            iati.utilities.log_warning('A warning about %s', 'something')
+
+        records = log_records()
+
+        assert [record.getMessage() for record in records] == ['A warning about something']
+
+    def test_exception_formatted_before_queueing(self, log_records):
+        """Check that the exception of a record is formatted before the record is queued."""
+        try:
+            raise ValueError('A problem')
+        except ValueError:
+            iati.utilities.log_exception('An exception')
+
+        record = log_records()[0]
+
+        assert record.exc_info is None
+        assert 'ValueError: A problem' in record.exc_text
+
+    def test_structured_log_file(self, tmpdir):
+        """Check that records are written to the log file as JSON objects, one per line."""
+        path = str(tmpdir.join('iati.log'))
+        iati.logs.configure(filename=path)
+
+        iati.utilities.log_error('An error')
+        iati.utilities.log_warning('A warning')
+        iati.logs.shutdown()
+
+        with open(path) as log_file:
+            lines = [json.loads(line) for line in log_file]
+
+        assert [(line['level'], line['message']) for line in lines] == [('ERROR', 'An error'), ('WARNING', 'A warning')]
+
+    def test_log_file_from_environment(self, tmpdir, monkeypatch):
+        """Check that the log file is located using the `IATI_LOG_FILE` environment variable."""
+        path = tmpdir.join('from-env.log')
+        monkeypatch.setenv(iati.logs.LOG_FILE_ENV_VAR, str(path))
+        iati.logs.shutdown()
+
+        iati.utilities.log_error('An error')
+        iati.logs.shutdown()
+
+        assert 'An error' in path.read()
+
+    def test_log_file_not_created_until_written(self, tmpdir):
+        """Check that configuring the logging subsystem does not create the log file."""
+        path = tmpdir.join('unused.log')
+        iati.logs.configure(filename=str(path))
+        iati.logs.shutdown()
+
+        assert not path.exists()
+
+    def test_disable(self, log_records):
+        """Check that a disabled logging subsystem does not create records."""
+        iati.logs.disable()
+
+        iati.utilities.log_error('An error')
+
+        assert not iati.logs.get_logger().isEnabledFor(logging.CRITICAL)
+        assert log_records() == []
+
+    @pytest.mark.skipif(sys.version_info < (3, 8), reason='records are attributed to the caller from Python 3.8')
+    @pytest.mark.parametrize('log_func', [
+        lambda msg: iati.utilities.log(logging.WARNING, msg),
+        iati.utilities.log_error,
+        iati.utilities.log_exception,
+        iati.utilities.log_warning
+    ])
+    def test_records_attributed_to_caller(self, log_records, log_func):
+        """Check that the source location of a record is the code that logged it, rather than the logging functions within `iati.utilities`."""
+        log_func('A message')
+
+        record = log_records()[0]
+
+        assert record.module == 'test_logs'
+        assert record.funcName in ['<lambda>', 'test_records_attributed_to_caller']
+
+    @pytest.mark.skipif(not hasattr(os, 'fork'), reason='os.fork() is not available')
+    def test_records_written_from_forked_process(self, tmpdir):
+        """Check that records logged within a forked process are written, even though the background thread of the parent does not exist within the child."""
+        path = tmpdir.join('forked.log')
+        iati.logs.configure(filename=str(path))
+        iati.utilities.log_warning('From the parent')
+
+        pid = os.fork()
+        if pid == 0:  # pragma: no cover
+            try:
+                iati.utilities.log_warning('From the child')
+                iati.logs.shutdown()
+            finally:
+                os._exit(0)  # pylint: disable=protected-access
+
+        os.waitpid(pid, 0)
+        iati.logs.shutdown()
+
+        messages = sorted(json.loads(line)['message'] for line in path.readlines())
+
+        assert messages == ['From the child', 'From the parent']
@@ -660,6 +660,39 @@ class TestResourceGetPathsNotAVersion:
             func_to_test(std_ver_all_uninst_typeerr)
 
 
+class TestResourceManifest:
+    """A container for tests relating to the manifest of resources relating to the Standard."""
+
+    def test_manifest_matches_file_system(self, std_ver_minor_inst_valid_fullsupport):
+        """Check that the manifest lists the same Codelist files as the file system."""
+        folder_path = iati.resources.path_for_version(iati.resources.PATH_CODELISTS, std_ver_minor_inst_valid_fullsupport)
+
+        assert list(iati.resources._manifest()[folder_path]) == sorted(os.listdir(folder_path))  # pylint: disable=protected-access
+
+    def test_codelist_paths_sorted(self, std_ver_minor_inst_valid_fullsupport):
+        """Check that Codelist paths are given in a consistent order."""
+        paths = iati.resources.get_codelist_paths(std_ver_minor_inst_valid_fullsupport)
+
+        assert paths == sorted(paths)
+
+    def test_get_paths_does_not_access_file_system(self, std_ver_minor_inst_valid_fullsupport, monkeypatch):
+        """Check that locating resources relating to the Standard does not access the file system once the manifest is built."""
+        iati.resources._manifest()  # pylint: disable=protected-access
+        monkeypatch.setattr(os.path, 'isfile', pytest.fail)
+        monkeypatch.setattr(os, 'listdir', pytest.fail)
+
+        assert iati.resources.get_codelist_paths(std_ver_minor_inst_valid_fullsupport)
+        assert iati.resources.get_ruleset_paths(std_ver_minor_inst_valid_fullsupport)
+        assert iati.resources.get_all_schema_paths(std_ver_minor_inst_valid_fullsupport)
+
+    def test_resource_exists_outside_manifest(self):
+        """Check that files outside the Standard resources are located on the file system."""
+        path = iati.resources.create_lib_data_path('README.md')
+
+        assert iati.resources._resource_exists(path) is os.path.isfile(path)  # pylint: disable=protected-access
+        assert iati.resources._resource_exists(path + '-missing') is False  # pylint: disable=protected-access
+
+
 class TestResourceTestDataFolders:
     """A container for tests relating to resource folders."""
 
@@ -7,14 +7,38 @@ Todo:
 
 """
 # pylint: disable=protected-access,too-many-lines
+import concurrent.futures
 from copy import deepcopy
+from datetime import datetime
+from lxml import etree
+import json
+import pickle
 import pytest
+import iati.cache
 import iati.default
 import iati.rulesets
 import iati.resources
 import iati.tests.utilities
 
 
+def copy_rule_with(rule, **changes):
+    """Copy a Rule, changing some of its attributes.
+
+    Rules are immutable, so the copy is created from the state of the Rule in the same manner as when a Rule is unpickled.
+
+    Args:
+        rule (iati.Rule): The Rule to copy.
+        **changes: The attributes to change, with their new values.
+
+    Returns:
+        iati.Rule: A copy of the Rule with the specified attributes changed.
+
+    """
+    rule_copy = type(rule).__new__(type(rule))
+    rule_copy.__setstate__(dict(rule.__getstate__(), **changes))
+    return rule_copy
+
+
 class RulesetFixtures:
     """A base class for fixtures to use in Ruleset tests."""
 
@@ -184,6 +208,20 @@ class TestRulesetValidityChecks(RulesetFixtures):
         ruleset = iati.tests.utilities.RULESET_FOR_TESTING
         assert not ruleset.is_valid_for(invalid_dataset)
 
+    @pytest.mark.parametrize('not_a_dataset', [None, 'a string', iati.Dataset('<a/>').xml_tree])
+    def test_empty_ruleset_is_valid_for_non_dataset(self, ruleset_empty, not_a_dataset):
+        """Check that a Ruleset without Rules is valid for any value, since there are no Rules to check it against."""
+        assert ruleset_empty.is_valid_for(not_a_dataset) is True
+
+    @pytest.mark.parametrize('not_a_dataset', [None, 'a string', iati.Dataset('<a/>').xml_tree])
+    def test_ruleset_is_valid_for_non_dataset(self, not_a_dataset):
+        """Check that a TypeError is raised when a Ruleset containing Rules is given a value that is not a Dataset."""
+        ruleset = iati.Ruleset('')
+        ruleset.rules.add(iati.RuleAtLeastOne('//root_element', {'paths': ['element']}))
+
+        with pytest.raises(TypeError):
+            ruleset.is_valid_for(not_a_dataset)
+
     @pytest.mark.parametrize("dataset_name, rule_type, case", [
         ('ruleset/invalid_format_dateorder', 'date_order', {'less': 'element1', 'more': 'element2'}),
         ('ruleset/invalid_startswith', 'startswith', {'start': 'duplicateprefix', 'paths': ['element12']}),
@@ -203,6 +241,38 @@ class TestRulesetValidityChecks(RulesetFixtures):
 
         assert not ruleset.is_valid_for(invalid_dataset)
 
+    @pytest.mark.parametrize('condition', ['count(recipient-region) > 0', 'count(recipient-region) > 1', 'recipient-country'])
+    def test_ruleset_conditions_evaluated_once(self, monkeypatch, condition):
+        """Check that a condition shared by Rules with the same context is evaluated once when checking a Ruleset, with the same results as when each Rule is checked individually."""
+        dataset = iati.Dataset('<iati-activities><iati-activity><recipient-country/></iati-activity><iati-activity><recipient-region/></iati-activity></iati-activities>')
+        ruleset = iati.Ruleset('')
+        ruleset.rules = {
+            iati.RuleAtLeastOne('//iati-activity', {'paths': [path], 'condition': condition})
+            for path in ['recipient-country', 'recipient-region']
+        }
+        condition_xpaths = list()
+        compiled_xpath = iati.rulesets._compiled_xpath
+        monkeypatch.setattr(iati.rulesets, '_compiled_xpath', lambda expression: condition_xpaths.append(expression) or compiled_xpath(expression))
+
+        results = dict(ruleset.results_for(dataset))
+
+        assert condition_xpaths.count('(//iati-activity)[boolean({0})]'.format(condition)) == 1
+        assert results == {rule: rule.is_valid_for(dataset) for rule in ruleset.rules}
+
+    @pytest.mark.parametrize('condition', ['position() = 2', 'last() > 1', 'position( ) != last()'])
+    def test_ruleset_conditions_using_position_evaluated_per_element(self, condition):
+        """Check that a condition using `position()` or `last()` is evaluated against each context element alone, rather than against its position among all context elements.
+
+        A lone context element has no position or size, so the condition cannot be evaluated, as when each Rule is checked one element at a time.
+
+        """
+        dataset = iati.Dataset('<iati-activities><iati-activity><recipient-country/></iati-activity><iati-activity><recipient-region/></iati-activity></iati-activities>')
+        ruleset = iati.Ruleset('')
+        ruleset.rules.add(iati.RuleAtLeastOne('//iati-activity', {'paths': ['recipient-country'], 'condition': condition}))
+
+        with pytest.raises(etree.XPathEvalError):
+            ruleset.is_valid_for(dataset)
+
 
 class TestRulesetEquality(RulesetFixtures):
     """A container for tests relating to checking the equality of Rulesets."""
@@ -241,12 +311,261 @@ class TestRulesetEquality(RulesetFixtures):
         ruleset = ruleset_non_empty
         ruleset_copy = deepcopy(ruleset)
         rule = ruleset_copy.rules.pop()
-        rule._name = rule._name + 'with-a-difference'
-        ruleset_copy.rules.add(rule)
+        ruleset_copy.rules.add(copy_rule_with(rule, _name=rule.name + 'with-a-difference'))
 
         assert cmp_func_different_val_and_hash(ruleset, ruleset_copy)
 
 
+class TestRulesetFingerprint(RulesetFixtures):
+    """A container for tests relating to the fingerprint of a Ruleset."""
+
+    def test_ruleset_fingerprint_equal(self, ruleset_non_empty):
+        """Check that equal Rulesets have the same fingerprint, even though their hashes differ."""
+        assert ruleset_non_empty.fingerprint == deepcopy(ruleset_non_empty).fingerprint
+
+    def test_ruleset_fingerprint_changes_when_modified(self, ruleset_non_empty):
+        """Check that the fingerprint of a Ruleset changes when its Rules are modified after it has been calculated."""
+        fingerprint = ruleset_non_empty.fingerprint
+        rule = ruleset_non_empty.rules.pop()
+        ruleset_non_empty.rules.add(copy_rule_with(rule, _name=rule.name + 'with-a-difference'))
+
+        assert ruleset_non_empty.fingerprint != fingerprint
+
+    @pytest.mark.parametrize('modify', [
+        lambda rules, rule: rules.discard(rule),
+        lambda rules, rule: rules.remove(rule),
+        lambda rules, rule: rules.clear(),
+        lambda rules, rule: rules.difference_update({rule}),
+        lambda rules, rule: rules.intersection_update(set()),
+        lambda rules, rule: rules.symmetric_difference_update({rule}),
+        lambda rules, rule: rules.__isub__({rule}),
+        lambda rules, rule: rules.__iand__(set()),
+        lambda rules, rule: rules.__ixor__({rule})
+    ])
+    def test_ruleset_fingerprint_changes_for_each_modification(self, ruleset_non_empty, modify):
+        """Check that each way of modifying the Rules of a Ruleset in place is detected by the fingerprint."""
+        fingerprint = ruleset_non_empty.fingerprint
+        rules_before = set(ruleset_non_empty.rules)
+
+        modify(ruleset_non_empty.rules, next(iter(ruleset_non_empty.rules)))
+
+        assert set(ruleset_non_empty.rules) != rules_before
+        assert ruleset_non_empty.fingerprint != fingerprint
+        assert isinstance(ruleset_non_empty.rules, set)
+
+    def test_ruleset_fingerprint_memoised(self, ruleset_non_empty, monkeypatch):
+        """Check that the fingerprint of a Ruleset is calculated once while its Rules are not modified."""
+        fingerprint = ruleset_non_empty.fingerprint
+        monkeypatch.setattr(iati.rulesets, '_fingerprint_rules', pytest.fail)
+
+        assert ruleset_non_empty.fingerprint == fingerprint
+
+    def test_assigned_rules_copied(self, ruleset_non_empty):
+        """Check that a set of Rules assigned to a Ruleset is copied, so that later changes to it do not affect the Ruleset."""
+        rules = set(ruleset_non_empty.rules)
+        ruleset = iati.Ruleset()
+        ruleset.rules = rules
+
+        rules.clear()
+
+        assert ruleset.rules == ruleset_non_empty.rules
+
+
+class TestRulesetStatistics:
+    """A container for tests relating to the statistics used to order the Rules in a Ruleset."""
+
+    @pytest.fixture
+    def dataset(self):
+        """Return a Dataset containing an activity without an identifier."""
+        return iati.Dataset('<iati-activities><iati-activity><title/></iati-activity></iati-activities>')
+
+    @pytest.fixture
+    def passing_rule(self):
+        """Return a Rule that the Dataset is valid against."""
+        return iati.RuleAtLeastOne('//iati-activity', {'paths': ['title']})
+
+    @pytest.fixture
+    def failing_rule(self):
+        """Return a Rule that the Dataset is not valid against."""
+        return iati.RuleAtLeastOne('//iati-activity', {'paths': ['iati-identifier']})
+
+    @pytest.fixture
+    def ruleset(self, passing_rule, failing_rule):
+        """Return a Ruleset containing a Rule that passes and a Rule that fails."""
+        ruleset = iati.Ruleset()
+        ruleset.rules = {passing_rule, failing_rule}
+        return ruleset
+
+    def test_statistics_recorded(self, ruleset, dataset, failing_rule):
+        """Check that the number of checks and failures of each Rule are recorded when a Dataset is checked against a Ruleset and statistics are asked for."""
+        ruleset.results_for(dataset, record_statistics=True)
+        ruleset.results_for(dataset, record_statistics=True)
+
+        statistics = {rule_statistics['rule']: rule_statistics for rule_statistics in json.loads(ruleset.statistics.to_json())}
+
+        assert len(ruleset.statistics) == 2
+        assert all(rule_statistics['checks'] == 2 for rule_statistics in statistics.values())
+        assert [rule for rule, rule_statistics in statistics.items() if rule_statistics['failures']] == [str(failing_rule)]
+
+    def test_failing_rules_ordered_first(self, ruleset, dataset, passing_rule, failing_rule):
+        """Check that once statistics have been learned, a Rule that often fails is ordered before a Rule that always passes, so is checked first."""
+        for _ in range(3):
+            ruleset.statistics.record(passing_rule, 0.001, False)
+            ruleset.statistics.record(failing_rule, 0.001, True)
+
+        assert ruleset.statistics.ordered(ruleset.rules) == [failing_rule, passing_rule]
+
+        assert not ruleset.is_valid_for(dataset, record_statistics=True)
+        assert {rule_statistics['rule']: rule_statistics['checks'] for rule_statistics in json.loads(ruleset.statistics.to_json())} == {str(passing_rule): 3, str(failing_rule): 4}
+
+    def test_statistics_not_recorded_by_default(self, ruleset, dataset):
+        """Check that checking a Dataset against a Ruleset does not record statistics unless they are asked for."""
+        ruleset.is_valid_for(dataset)
+        ruleset.results_for(dataset)
+
+        assert len(ruleset.statistics) == 0
+
+    def test_statistics_recorded_from_many_threads(self, ruleset, dataset):
+        """Check that statistics may be recorded and exported from many threads at once without losing checks."""
+        def check_and_export(_):
+            """Check the Dataset against the Ruleset, then export the statistics."""
+            ruleset.results_for(dataset, record_statistics=True)
+            return ruleset.statistics.to_json()
+
+        with concurrent.futures.ThreadPoolExecutor(8) as executor:
+            list(executor.map(check_and_export, range(200)))
+
+        assert all(rule_statistics['checks'] == 200 for rule_statistics in json.loads(ruleset.statistics.to_json()))
+
+    def test_statistics_copied(self, ruleset, dataset):
+        """Check that statistics may be deep copied and pickled, with the copy recorded independently."""
+        ruleset.results_for(dataset, record_statistics=True)
+
+        for statistics_copy in [deepcopy(ruleset.statistics), pickle.loads(pickle.dumps(ruleset.statistics))]:
+            statistics_copy.record(next(iter(ruleset.rules)), 0.001, False)
+
+            assert statistics_copy.to_json() != ruleset.statistics.to_json()
+
+    def test_rules_without_statistics_ordered_first(self, ruleset, passing_rule, failing_rule):
+        """Check that Rules without statistics are ordered before those with statistics, so that their cost is learned."""
+        ruleset.statistics.record(failing_rule, 0.001, True)
+
+        assert ruleset.statistics.expected_cost(passing_rule) == 0.0
+        assert ruleset.statistics.ordered(ruleset.rules) == [passing_rule, failing_rule]
+
+    def test_order_cached_until_statistics_recorded(self, ruleset, passing_rule, failing_rule, monkeypatch):
+        """Check that the order of the Rules in a Ruleset is calculated once, and calculated again once statistics are recorded."""
+        ordered_rules = ruleset.statistics.ordered(ruleset.rules)
+        with monkeypatch.context() as patch:
+            patch.setattr(iati.rulesets, '_expected_cost', pytest.fail)
+
+            assert ruleset.statistics.ordered(ruleset.rules) == ordered_rules
+
+        for _ in range(3):
+            ruleset.statistics.record(passing_rule, 0.001, False)
+            ruleset.statistics.record(failing_rule, 0.001, True)
+
+        assert ruleset.statistics.ordered(ruleset.rules) == [failing_rule, passing_rule]
+
+    def test_order_calculated_again_when_rules_modified(self, ruleset, passing_rule, failing_rule):
+        """Check that the cached order of the Rules in a Ruleset is discarded when its Rules are modified."""
+        ruleset.statistics.record(failing_rule, 0.001, True)
+        assert ruleset.statistics.ordered(ruleset.rules) == [passing_rule, failing_rule]
+
+        ruleset.rules.discard(passing_rule)
+
+        assert ruleset.statistics.ordered(ruleset.rules) == [failing_rule]
+
+    def test_statistics_round_trip(self, ruleset, dataset):
+        """Check that exported statistics may be loaded into another Ruleset, giving the same order for equal Rules."""
+        ruleset.results_for(dataset, record_statistics=True)
+        other_ruleset = deepcopy(ruleset)
+        other_ruleset.statistics = iati.rulesets.RulesetStatistics(ruleset.statistics.to_json())
+
+        assert other_ruleset.statistics.to_json() == ruleset.statistics.to_json()
+        assert [str(rule) for rule in other_ruleset.statistics.ordered(other_ruleset.rules)] == [str(rule) for rule in ruleset.statistics.ordered(ruleset.rules)]
+
+    @pytest.mark.parametrize('statistics_str', [
+        5,
+        'not JSON',
+        '{"rule_type": "atleast_one"}',
+        '[{"rule_type": "atleast_one", "rule": "A Rule."}]',
+        '[{"rule_type": "atleast_one", "rule": "A Rule.", "checks": 0, "failures": 0, "seconds": 0.0}]',
+        '[{"rule_type": "atleast_one", "rule": "A Rule.", "checks": 1, "failures": 2, "seconds": 0.0}]'
+    ])
+    def test_invalid_statistics_raise_error(self, statistics_str):
+        """Check that a ValueError is raised when statistics cannot be loaded."""
+        with pytest.raises(ValueError):
+            iati.rulesets.RulesetStatistics(statistics_str)
+
+
+class TestPrecompiledRulesets:
+    """A container for tests relating to dumping and loading Rulesets in a precompiled form."""
+
+    ruleset_str = '{"//iati-activity": {"atleast_one": {"cases": [{"paths": ["iati-identifier"]}]}, "regex_matches": {"cases": [{"regex": "^AA", "paths": ["iati-identifier"]}]}}}'
+
+    @pytest.fixture
+    def cache_directory(self, tmpdir, monkeypatch):
+        """Store the cache in a temporary directory for the duration of a test."""
+        monkeypatch.setenv(iati.cache.CACHE_DIR_ENV_VAR, str(tmpdir))
+        return tmpdir
+
+    def test_precompiled_round_trip(self):
+        """Check that a Ruleset loaded from its precompiled form is equal to the original and gives the same results."""
+        ruleset = iati.Ruleset(self.ruleset_str)
+        dataset = iati.Dataset('<iati-activities><iati-activity><iati-identifier>BB-1</iati-identifier></iati-activity></iati-activities>')
+
+        loaded_ruleset = iati.rulesets.load_precompiled(iati.rulesets.dump_precompiled(ruleset))
+
+        assert loaded_ruleset == ruleset
+        assert {str(rule): result for rule, result in loaded_ruleset.results_for(dataset)} == {str(rule): result for rule, result in ruleset.results_for(dataset)}
+
+    @pytest.mark.parametrize('precompiled_ruleset', [b'not a precompiled Ruleset', pickle.dumps({'not': 'a Ruleset'})])
+    def test_load_precompiled_invalid(self, precompiled_ruleset):
+        """Check that a ValueError is raised when loading something that is not a precompiled Ruleset."""
+        with pytest.raises(ValueError):
+            iati.rulesets.load_precompiled(precompiled_ruleset)
+
+    def test_cached_ruleset_skips_validation(self, cache_directory, monkeypatch):
+        """Check that a Ruleset is stored in the cache when first created, then loaded from the cache without checking it against the Ruleset Schema."""
+        ruleset = iati.rulesets.cached_ruleset(self.ruleset_str)
+        assert len(cache_directory.join('rulesets').listdir()) == 1
+
+        monkeypatch.setattr(iati.Ruleset, '_validate_ruleset', pytest.fail)
+        cached_ruleset = iati.rulesets.cached_ruleset(self.ruleset_str)
+
+        assert cached_ruleset == ruleset
+        assert cached_ruleset is not ruleset
+
+    def test_cached_ruleset_invalidated_when_json_changes(self, cache_directory):
+        """Check that a changed Ruleset is not loaded from the entry for the original Ruleset."""
+        ruleset = iati.rulesets.cached_ruleset(self.ruleset_str)
+        changed_ruleset = iati.rulesets.cached_ruleset(self.ruleset_str.replace('^AA', '^BB'))
+
+        assert changed_ruleset != ruleset
+        assert len(cache_directory.join('rulesets').listdir()) == 2
+
+    def test_cached_ruleset_corrupt_entry(self, cache_directory):
+        """Check that a Ruleset is created again when its entry in the cache cannot be loaded."""
+        ruleset = iati.rulesets.cached_ruleset(self.ruleset_str)
+        entry = cache_directory.join('rulesets').listdir()[0]
+        entry.write_binary(b'not a precompiled Ruleset')
+
+        assert iati.rulesets.cached_ruleset(self.ruleset_str) == ruleset
+        assert entry.read_binary() != b'not a precompiled Ruleset'
+
+    @pytest.mark.parametrize('ruleset_str, error_type', [
+        (b'{}', TypeError),
+        ('{"//iati-activity": {"not_a_rule_type": {"cases": []}}}', ValueError)
+    ])
+    def test_cached_ruleset_invalid(self, cache_directory, ruleset_str, error_type):
+        """Check that invalid Rulesets raise an error and are not stored in the cache."""
+        with pytest.raises(error_type):
+            iati.rulesets.cached_ruleset(ruleset_str)
+
+        assert not cache_directory.join('rulesets').check()
+
+
 class TestRule:
     """A container for tests relating to Rules."""
 
@@ -268,6 +587,112 @@ class TestRule:
             iati.Rule(name, context, case)  # pylint: disable=too-many-function-args
 
 
+class RuleMaxLength(iati.Rule):
+    """A custom type of Rule that checks that text is no longer than a given length, used to test the registration of custom types of Rule."""
+
+    def __init__(self, context, case):
+        """Initialise a `max_length` rule."""
+        self._name = 'max_length'
+
+        super(RuleMaxLength, self).__init__(context, case)
+
+    def __str__(self):
+        """Return string stating what RuleMaxLength is checking."""
+        return 'Each instance of `{0}` within each `{self.context}` must be no longer than {self.length} characters.'.format('` and `'.join(self.paths), **locals())
+
+    def check_batch(self, context_elements):
+        """Check the length of the text at each path within each context element, giving a result for each context element."""
+        return [all(len(text) <= self.length for text in self._extract_text_from_elements([context_element], self.paths)) for context_element in context_elements]
+
+
+class TestCustomRuleTypes:
+    """A container for tests relating to registering custom types of Rule."""
+
+    max_length_case_schema = {
+        'type': 'object',
+        'properties': {
+            'paths': {'type': 'array', 'items': {'type': 'string'}},
+            'length': {'type': 'integer'}
+        }
+    }
+
+    @pytest.fixture
+    def max_length_rule_type(self):
+        """Register the `max_length` type of Rule for the duration of a test."""
+        iati.rulesets.register_rule_type('max_length', RuleMaxLength, self.max_length_case_schema)
+        yield 'max_length'
+        iati.rulesets.unregister_rule_type('max_length')
+
+    @pytest.fixture
+    def dataset(self):
+        """Return a Dataset containing an activity with a short identifier and an activity with a long identifier."""
+        return iati.Dataset('<iati-activities><iati-activity><iati-identifier>AA-1</iati-identifier></iati-activity><iati-activity><iati-identifier>AA-123456</iati-identifier></iati-activity></iati-activities>')
+
+    @pytest.mark.parametrize('length, expected_result', [(10, True), (5, False)])
+    def test_custom_rule_from_ruleset_json(self, max_length_rule_type, dataset, length, expected_result):
+        """Check that a registered type of Rule may be loaded from a JSON Ruleset and checked against a Dataset."""
+        ruleset = iati.Ruleset('{{"//iati-activity": {{"{0}": {{"cases": [{{"paths": ["iati-identifier"], "length": {1}}}]}}}}}}'.format(max_length_rule_type, length))
+        rule = ruleset.rules.pop()
+
+        assert isinstance(rule, RuleMaxLength)
+        assert rule.length == length
+        assert rule.is_valid_for(dataset) is expected_result
+
+    def test_custom_rule_condition(self, max_length_rule_type, dataset):
+        """Check that the context elements from the point at which a condition is met are not passed to `check_batch()`."""
+        rule = iati.rulesets.constructor_for_rule_type(max_length_rule_type)('//iati-activity', {'paths': ['iati-identifier'], 'length': 5, 'condition': 'string-length(iati-identifier) > 5'})
+
+        assert rule.is_valid_for(dataset) is None
+
+    @pytest.mark.parametrize('batch_results, expected_result', [
+        ([True, True], True),
+        ([True, False, None], False),
+        ([True, None, False], None),
+        ([], True),
+        (False, False)
+    ])
+    def test_check_batch_results_combined(self, max_length_rule_type, dataset, monkeypatch, batch_results, expected_result):
+        """Check that the results for a batch of context elements are combined into a single result, with the first that is not `True` taken."""
+        rule = RuleMaxLength('//iati-activity', {'paths': ['iati-identifier'], 'length': 5})
+        monkeypatch.setattr(RuleMaxLength, 'check_batch', lambda self, context_elements: batch_results)
+
+        assert rule.is_valid_for(dataset) is expected_result
+
+    @pytest.mark.parametrize('batch_results, expected_result', [
+        ([True, True], True),
+        ([True, False], False)
+    ])
+    def test_check_batch_numpy_results_combined(self, max_length_rule_type, dataset, monkeypatch, batch_results, expected_result):
+        """Check that a NumPy array of booleans may be given as the results for a batch of context elements."""
+        numpy = pytest.importorskip('numpy')
+        rule = RuleMaxLength('//iati-activity', {'paths': ['iati-identifier'], 'length': 5})
+        monkeypatch.setattr(RuleMaxLength, 'check_batch', lambda self, context_elements: numpy.array(batch_results))
+
+        assert rule.is_valid_for(dataset) is expected_result
+
+    def test_custom_rule_invalid_case(self, max_length_rule_type):
+        """Check that a case for a registered type of Rule is validated against the schema it was registered with."""
+        with pytest.raises(ValueError):
+            RuleMaxLength('//iati-activity', {'paths': ['iati-identifier'], 'length': 'five'})
+
+    def test_unregistered_rule_type_not_permitted(self):
+        """Check that a type of Rule cannot be loaded from a Ruleset until it has been registered."""
+        with pytest.raises(ValueError):
+            iati.Ruleset('{"//iati-activity": {"max_length": {"cases": [{"paths": ["iati-identifier"], "length": 5}]}}}')
+
+    @pytest.mark.parametrize('rule_type', ['max_length', 'atleast_one'])
+    def test_register_existing_rule_type_raises_error(self, max_length_rule_type, rule_type):
+        """Check that a type of Rule cannot be registered with the same name as an existing type of Rule."""
+        with pytest.raises(ValueError):
+            iati.rulesets.register_rule_type(rule_type, RuleMaxLength, self.max_length_case_schema)
+
+    @pytest.mark.parametrize('constructor', [dict, 'max_length'])
+    def test_register_non_rule_raises_error(self, constructor):
+        """Check that a type of Rule must be registered with a constructor that inherits from Rule."""
+        with pytest.raises(TypeError):
+            iati.rulesets.register_rule_type('not_a_rule', constructor, self.max_length_case_schema)
+
+
 class TestRuleSubclasses:
     """A container for tests relating to all Rule subclasses."""
 
@@ -455,6 +880,24 @@ class RuleSubclassTestsGeneral(RuleSubclassFixtures):  # pylint: disable=too-man
         with pytest.raises(AttributeError):
             rule.context = 'a-new-context'
 
+    def test_rule_attributes_cannot_be_set(self, rule):
+        """Check that a Rule subclass cannot have any attribute changed after instantiation, including those set from its case."""
+        with pytest.raises(AttributeError):
+            rule._context = 'a-new-context'
+        with pytest.raises(AttributeError):
+            rule.normalized_paths = list()
+
+    def test_rule_pickle_round_trip(self, rule):
+        """Check that an unpickled Rule is equal to, and has the same hash as, the original, without relying on the hash cached by the original."""
+        hash(rule)
+        state = rule.__getstate__()
+
+        unpickled_rule = pickle.loads(pickle.dumps(rule))
+
+        assert '_hash' not in state and '_identity' not in state
+        assert unpickled_rule == rule
+        assert hash(unpickled_rule) == hash(rule)
+
     def test_rule_string_output_general(self, rule_instantiating):
         """Check that the string format of the Rule has been customised and variables formatted."""
         assert 'iati.rulesets' not in str(rule_instantiating)
@@ -519,6 +962,18 @@ class RuleSubclassTestsGeneral(RuleSubclassFixtures):  # pylint: disable=too-man
         rule = rule_constructor(non_existent_context, invalid_nest_case)
         assert rule.is_valid_for(invalid_dataset) is None
 
+    def test_batch_check_matches_individual_checks(self, rule_constructor, valid_multiple_context, valid_nest_case, valid_dataset, invalid_dataset):
+        """Check that checking all context elements in one batch gives the same result as checking each context element in turn."""
+        rule = rule_constructor(valid_multiple_context, valid_nest_case)
+
+        for dataset in [valid_dataset, invalid_dataset]:
+            context_elements = rule._find_context_elements(dataset)
+            individual_results = [rule._check_against_Rule(context_element) for context_element in context_elements]
+            expected_result = False if False in individual_results else (None if None in individual_results else True)
+
+            assert len(context_elements) > 1
+            assert rule._check_batch_against_Rule(context_elements) is expected_result
+
     def test_condition_case_is_True_for_valid_dataset(self, valid_condition_rule, valid_dataset):
         """Check that if a condition is `True`, the rule returns None which is considered equivalent to skipping."""
         assert valid_condition_rule.is_valid_for(valid_dataset) is None
@@ -568,8 +1023,7 @@ class RuleSubclassEquality(RuleSubclassFixtures):
 
         The two Rules have different names, but are otherwise identical.
         """
-        rule_copy = deepcopy(rule)
-        rule_copy._name = rule.name + 'with-a-difference'
+        rule_copy = copy_rule_with(rule, _name=rule.name + 'with-a-difference')
 
         assert cmp_func_different_val_and_hash(rule, rule_copy)
 
@@ -578,8 +1032,7 @@ class RuleSubclassEquality(RuleSubclassFixtures):
 
         The two Rules have different contexts, but are otherwise identical.
         """
-        rule_copy = deepcopy(rule)
-        rule_copy._context = rule.context + 'with-a-difference'
+        rule_copy = copy_rule_with(rule, _context=rule.context + 'with-a-difference')
 
         assert cmp_func_different_val_and_hash(rule, rule_copy)
 
@@ -857,6 +1310,15 @@ class TestRuleDateOrder(RuleSubclassTestBase):
         with pytest.raises(ValueError):
             rule.is_valid_for(iati.tests.resources.load_as_dataset('ruleset/invalid_format_dateorder'))
 
+    @pytest.mark.parametrize("date_str", ['2016-08-17\n', '2016-08-17Z\n', '2016-08-17+01:00\n'])
+    def test_date_with_trailing_newline_raises_error(self, date_str, rule_constructor):
+        """Check that a date followed by a newline is treated as being in an incorrect format, rather than as the date before the newline."""
+        rule = rule_constructor('//root_element', {'less': 'element1', 'more': 'element2'})
+        dataset = iati.Dataset('<root_element><element1>{0}</element1><element2>2017-08-17</element2></root_element>'.format(date_str))
+
+        with pytest.raises(ValueError):
+            rule.is_valid_for(dataset)
+
     @pytest.mark.parametrize("case", [
         {'less': 'element39', 'more': 'element40'},  # `less` date missing
         {'less': 'element43', 'more': 'element44'},
@@ -872,6 +1334,26 @@ class TestRuleDateOrder(RuleSubclassTestBase):
         """Check that the string format of the Rule contains some relevant information."""
         assert any(needle in str(rule_instantiating) for needle in ['must be chronologically', 'in the future', 'in the past'])
 
+    @pytest.mark.parametrize("case, now, expected", [
+        ({'less': 'element3', 'more': 'NOW'}, datetime(1970, 1, 1), False),
+        ({'less': 'element3', 'more': 'NOW'}, datetime(3000, 1, 1), True),
+        ({'less': 'NOW', 'more': 'element4'}, datetime(1970, 1, 1), True),
+        ({'less': 'NOW', 'more': 'element4'}, datetime(9999, 12, 31), False)
+    ])
+    def test_now_can_be_fixed(self, valid_single_context, case, now, expected, rule_constructor, valid_dataset):
+        """Check that the value used for `NOW` may be specified, making the result deterministic."""
+        rule = rule_constructor(valid_single_context, case)
+
+        assert rule.is_valid_for(valid_dataset, now) is expected
+
+    def test_now_fixed_for_ruleset(self, valid_single_context, rule_constructor, valid_dataset):
+        """Check that the value used for `NOW` by a Ruleset is passed to the Rules it contains."""
+        ruleset = iati.Ruleset('')
+        ruleset.rules.add(rule_constructor(valid_single_context, {'less': 'element3', 'more': 'NOW'}))
+
+        assert ruleset.is_valid_for(valid_dataset)
+        assert not ruleset.is_valid_for(valid_dataset, datetime(1970, 1, 1))
+
 
 class TestRuleDependent(RuleSubclassTestBase):
     """A container for tests relating to RuleDependent."""
@@ -1152,6 +1634,10 @@ class TestRuleRegexMatches(RuleSubclassTestBase):
         """Check that the string format of the Rule contains some relevant information."""
         assert 'must match the regular expression' in str(rule_instantiating)
 
+    def test_regex_compiled_on_init(self, rule_instantiating):
+        """Check that the regex is compiled when the Rule is instantiated rather than when it is checked."""
+        assert rule_instantiating._pattern.pattern == rule_instantiating.regex
+
 
 class TestRuleRegexNoMatches(RuleSubclassTestBase):
     """A container for tests relating to RuleRegexNoMatches."""
@@ -1250,6 +1736,10 @@ class TestRuleRegexNoMatches(RuleSubclassTestBase):
         """Check that the string format of the Rule contains some relevant information."""
         assert 'must not match the regular expression' in str(rule_instantiating)
 
+    def test_regex_compiled_on_init(self, rule_instantiating):
+        """Check that the regex is compiled when the Rule is instantiated rather than when it is checked."""
+        assert rule_instantiating._pattern.pattern == rule_instantiating.regex
+
 
 class TestRuleStartsWith(RuleSubclassTestBase):
     """A container for tests relating to RuleStartsWith."""
@@ -1513,6 +2003,28 @@ class TestRuleSum(RuleSubclassTestBase):
         rule = rule_constructor(valid_single_context, no_values_case)
         assert rule.is_valid_for(valid_dataset) is None
 
+    @pytest.mark.parametrize("values, total, expected", [
+        (['50', '50'], 100, True),  # integer values
+        ([' 150 ', '-50'], 100, True),
+        (['50', '49'], 100, False),
+        (['50', '50'], 100.5, False),
+        (['10'] * 10, 100, True),  # more integer values than may be summed natively
+        (['10'] * 9 + ['11'], 100, False),
+        (['33.33', '33.33', '33.34'], 100, True),  # decimal values that do not sum exactly using floating point arithmetic
+        (['33.33', '33.33', '33.33'], 100, False),
+        (['0.1', '0.2'], 0.3, True),
+        (['99999999999999999', '2'], 100000000000000000, False),  # integers too long to represent exactly using floating point
+        (['99999999999999999', '2'], 100000000000000001, True),
+        (['1e2'], 100, True),  # exponential value
+        (['5<!--comment-->0'], 5, True)  # mixed content, where only the leading text is the value of the element
+    ])
+    def test_sum_is_exact(self, rule_constructor, values, total, expected):
+        """Check that values are summed exactly, regardless of whether they may be summed natively using XPath."""
+        dataset = iati.Dataset('<root><parent>{0}</parent></root>'.format(''.join('<value>{0}</value>'.format(value) for value in values)))
+        rule = rule_constructor('//parent', {'paths': ['value'], 'sum': total})
+
+        assert rule.is_valid_for(dataset) is expected
+
 
 class TestRuleUnique(RuleSubclassTestBase):
     """A container for tests relating to RuleUnique."""
@@ -365,8 +365,106 @@ class TestSchemaEquality(SchemaTestsBase):
 
         ruleset = schema_copy.rulesets.pop()
         rule = ruleset.rules.pop()
-        rule._name = rule.name + 'with-a-difference'
-        ruleset.rules.add(rule)
+        ruleset.rules.add(iati.RuleAtLeastOne(rule.context + 'with-a-difference', {'paths': ['with-a-difference']}))
         schema_copy.rulesets.add(ruleset)
 
         assert cmp_func_different_val(schema_initialised, schema_copy)
+
+
+class TestSchemaFingerprint(SchemaTestsBase):
+    """A container for tests relating to the fingerprint used to compare Schemas."""
+
+    def test_schema_equal_same_fingerprint(self, schema_initialised):
+        """Check that equal Schemas have the same fingerprint."""
+        schema_copy = copy.deepcopy(schema_initialised)
+
+        assert schema_initialised.fingerprint == schema_copy.fingerprint
+
+    def test_schema_not_hashable(self, schema_initialised):
+        """Check that Schemas are not hashable, since they are mutable and compared by their content."""
+        with pytest.raises(TypeError):
+            hash(schema_initialised)
+
+    def test_schema_equality_does_not_modify_base_tree(self, schema_initialised):
+        """Check that comparing Schemas does not flatten the includes within the base tree."""
+        tree_str = etree.tostring(schema_initialised._schema_base_tree)
+
+        assert schema_initialised == copy.deepcopy(schema_initialised)
+        assert etree.tostring(schema_initialised._schema_base_tree) == tree_str
+
+    def test_schema_flattened_once(self, schema_initialised, monkeypatch):
+        """Check that the includes within a Schema are flattened once, rather than each time Schemas are compared."""
+        flattened_trees = list()
+        flatten_includes = iati.schemas.Schema.flatten_includes
+
+        def counting_flatten_includes(schema, tree):
+            """Flatten includes, recording that they have been flattened."""
+            flattened_trees.append(tree)
+            return flatten_includes(schema, tree)
+
+        monkeypatch.setattr(iati.schemas.Schema, 'flatten_includes', counting_flatten_includes)
+
+        for _ in range(3):
+            assert schema_initialised == schema_initialised
+        assert len(flattened_trees) == 1
+
+        schema_initialised._schema_base_tree = copy.deepcopy(schema_initialised._schema_base_tree)
+        schema_initialised.fingerprint  # pylint: disable=pointless-statement
+        assert len(flattened_trees) == 2
+
+    def test_schema_fingerprint_codelist_modified_in_place(self, schema_initialised):
+        """Check that the fingerprint of a Schema changes when a Codelist within it is modified in place."""
+        codelist = iati.Codelist('a-codelist')
+        codelist.codes.add(iati.Code('1', 'one'))
+        schema_initialised.codelists.add(codelist)
+        fingerprint = schema_initialised.fingerprint
+
+        codelist.codes.pop()
+        codelist.codes.add(iati.Code('1', 'one with a difference'))
+
+        assert schema_initialised.fingerprint != fingerprint
+
+    def test_schema_fingerprint_ruleset_modified_in_place(self, schema_initialised):
+        """Check that the fingerprint of a Schema changes when a Ruleset within it is modified in place."""
+        ruleset = iati.Ruleset()
+        schema_initialised.rulesets.add(ruleset)
+        fingerprint = schema_initialised.fingerprint
+
+        ruleset.rules.add(iati.RuleAtLeastOne('//context', {'paths': ['path']}))
+
+        assert schema_initialised.fingerprint != fingerprint
+
+    def test_default_schema_fingerprint_differs_between_versions(self):
+        """Check that the default Schemas at different versions of the Standard have different fingerprints."""
+        assert iati.default.activity_schema('2.02').fingerprint != iati.default.activity_schema('2.03').fingerprint
+        assert iati.default.activity_schema('2.03').fingerprint == iati.default.activity_schema('2.03').fingerprint
+
+
+class TestSchemaTypeIndex(SchemaTestsBase):
+    """A container for tests relating to the index of the datatypes declared within a Schema."""
+
+    def test_schema_type_index_root(self, schema_initialised):
+        """Check that the index of a Schema is rooted at the root element of the Schema."""
+        assert schema_initialised.type_index().root.name == schema_initialised.ROOT_ELEMENT_NAME
+
+    def test_schema_type_index_built_once(self, schema_initialised):
+        """Check that the index is built once, and built again when the base tree is replaced."""
+        type_index = schema_initialised.type_index()
+
+        assert schema_initialised.type_index() is type_index
+
+        schema_initialised._schema_base_tree = copy.deepcopy(schema_initialised._schema_base_tree)
+        assert schema_initialised.type_index() is not type_index
+
+    def test_schema_type_index_shared_with_default_copy(self, schema_initialised):
+        """Check that a copy of a Schema made for `iati.default` shares the index that has already been built."""
+        type_index = schema_initialised.type_index()
+
+        assert iati.default._copy_of_schema(schema_initialised).type_index() is type_index
+
+    def test_schema_type_index_root_not_declared(self, schema_initialised):
+        """Check that a SchemaError is raised when the XML Schema does not declare the root element of the Schema."""
+        schema_initialised._schema_base_tree = etree.ElementTree(etree.fromstring('<xsd:schema xmlns:xsd="http://www.w3.org/2001/XMLSchema"/>'))
+
+        with pytest.raises(iati.exceptions.SchemaError):
+            schema_initialised.type_index()
@@ -0,0 +1,215 @@
+"""A module containing tests for the index of the datatypes of elements and attributes declared within a Schema."""
+from lxml import etree
+import pytest
+import iati.default
+import iati.typeindex
+
+
+def type_index_for(xsd_content, root_name='root'):
+    """Build a TypeIndex from the content of an XML Schema, wrapped in an `xsd:schema` element."""
+    xsd_str = '<xsd:schema xmlns:xsd="http://www.w3.org/2001/XMLSchema" xmlns:xml="http://www.w3.org/XML/1998/namespace">{0}</xsd:schema>'.format(xsd_content)
+    return iati.typeindex.TypeIndex(etree.ElementTree(etree.fromstring(xsd_str)), root_name)
+
+
+class TestTypeIndex:
+    """A container for tests relating to building a TypeIndex from an XML Schema."""
+
+    def test_type_index_root_not_declared(self):
+        """Check that a ValueError is raised when the XML Schema does not declare the root element."""
+        with pytest.raises(ValueError):
+            type_index_for('<xsd:element name="not-the-root"/>')
+
+    def test_type_index_simple_content(self):
+        """Check that elements and attributes are given the datatypes that they are declared with, whatever the prefix used for XSD datatypes."""
+        type_index = iati.typeindex.TypeIndex(etree.ElementTree(etree.fromstring("""
+            <xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+                <xs:element name="root">
+                    <xs:complexType>
+                        <xs:simpleContent>
+                            <xs:extension base="xs:decimal">
+                                <xs:attribute name="date" type="xs:date" use="required"/>
+                                <xs:attribute name="note"/>
+                            </xs:extension>
+                        </xs:simpleContent>
+                    </xs:complexType>
+                </xs:element>
+            </xs:schema>
+        """)), 'root')
+
+        assert type_index.root.datatype == 'xsd:decimal'
+        assert type_index.lookup('root/@date').datatype == 'xsd:date'
+        assert type_index.lookup('root/@date').min_occurs == 1
+        assert type_index.lookup('root/@note').datatype == 'xsd:anySimpleType'
+        assert type_index.lookup('root/@note').min_occurs == 0
+
+    def test_type_index_references_and_named_types(self):
+        """Check that referenced elements, attributes and named types are resolved."""
+        type_index = type_index_for("""
+            <xsd:element name="root">
+                <xsd:complexType>
+                    <xsd:sequence>
+                        <xsd:element ref="child" minOccurs="0" maxOccurs="unbounded"/>
+                    </xsd:sequence>
+                    <xsd:attribute ref="code"/>
+                </xsd:complexType>
+            </xsd:element>
+            <xsd:element name="child" type="childType"/>
+            <xsd:complexType name="childType">
+                <xsd:simpleContent>
+                    <xsd:extension base="percentageType"/>
+                </xsd:simpleContent>
+            </xsd:complexType>
+            <xsd:simpleType name="percentageType">
+                <xsd:restriction base="xsd:decimal"/>
+            </xsd:simpleType>
+            <xsd:attribute name="code" type="codeType"/>
+            <xsd:simpleType name="codeType">
+                <xsd:restriction base="xsd:NMTOKEN"/>
+            </xsd:simpleType>
+        """)
+        child = type_index.root.child('child')
+
+        assert type_index.root.datatype is None
+        assert child.datatype == 'xsd:decimal'
+        assert (child.min_occurs, child.max_occurs) == (0, None)
+        assert type_index.root.attribute('code').datatype == 'xsd:NMTOKEN'
+
+    def test_type_index_choice_and_nested_groups(self):
+        """Check that the cardinality of elements accounts for the groups that contain them."""
+        type_index = type_index_for("""
+            <xsd:element name="root">
+                <xsd:complexType>
+                    <xsd:sequence maxOccurs="2">
+                        <xsd:element name="first" type="xsd:string"/>
+                        <xsd:choice>
+                            <xsd:element name="second" type="xsd:string"/>
+                            <xsd:element name="third" type="xsd:string" maxOccurs="unbounded"/>
+                        </xsd:choice>
+                    </xsd:sequence>
+                </xsd:complexType>
+            </xsd:element>
+        """)
+
+        assert (type_index.lookup('root/first').min_occurs, type_index.lookup('root/first').max_occurs) == (1, 2)
+        assert (type_index.lookup('root/second').min_occurs, type_index.lookup('root/second').max_occurs) == (0, 2)
+        assert (type_index.lookup('root/third').min_occurs, type_index.lookup('root/third').max_occurs) == (0, None)
+
+    def test_type_index_recursive_type(self):
+        """Check that a recursive type is expanded once, rather than indefinitely."""
+        type_index = type_index_for("""
+            <xsd:element name="root" type="nodeType"/>
+            <xsd:complexType name="nodeType">
+                <xsd:sequence>
+                    <xsd:element name="node" type="nodeType" minOccurs="0"/>
+                </xsd:sequence>
+            </xsd:complexType>
+        """)
+
+        assert type_index.lookup('root/node') is not None
+        assert type_index.lookup('root/node/node') is None
+
+    def test_type_index_xml_attributes(self):
+        """Check that attributes within the XML namespace are indexed by their lxml names."""
+        type_index = type_index_for("""
+            <xsd:element name="root">
+                <xsd:complexType mixed="true">
+                    <xsd:attribute ref="xml:lang"/>
+                </xsd:complexType>
+            </xsd:element>
+        """)
+        lang = type_index.root.attribute('{http://www.w3.org/XML/1998/namespace}lang')
+
+        assert type_index.root.datatype == 'xsd:string'
+        assert lang.datatype == 'xsd:language'
+        assert lang.is_attribute
+        assert type_index.lookup('root/@xml:lang') is lang
+
+    def test_type_index_attribute_group(self):
+        """Check that attributes within referenced attribute groups are indexed."""
+        type_index = type_index_for("""
+            <xsd:element name="root">
+                <xsd:complexType>
+                    <xsd:attributeGroup ref="outerAtts"/>
+                </xsd:complexType>
+            </xsd:element>
+            <xsd:attributeGroup name="outerAtts">
+                <xsd:attribute name="outer" type="xsd:string"/>
+                <xsd:attributeGroup ref="innerAtts"/>
+            </xsd:attributeGroup>
+            <xsd:attributeGroup name="innerAtts">
+                <xsd:attribute name="inner" type="xsd:boolean"/>
+                <xsd:attribute name="excluded" use="prohibited"/>
+            </xsd:attributeGroup>
+        """)
+
+        assert sorted(type_index.root.attributes) == ['inner', 'outer']
+        assert type_index.lookup('root/@inner').datatype == 'xsd:boolean'
+
+    def test_type_index_iterates_over_all_nodes(self):
+        """Check that iterating over an index visits each node once, with elements before their attributes and children."""
+        type_index = type_index_for("""
+            <xsd:element name="root">
+                <xsd:complexType>
+                    <xsd:sequence>
+                        <xsd:element name="child" type="xsd:date"/>
+                    </xsd:sequence>
+                    <xsd:attribute name="date" type="xsd:date"/>
+                </xsd:complexType>
+            </xsd:element>
+        """)
+
+        assert [node.path for node in type_index] == ['root', 'root/@date', 'root/child']
+        assert len(type_index) == 3
+        assert type_index.paths_of_type('xsd:date') == ['root/@date', 'root/child']
+        assert type_index.lookup('/root/child') is type_index.lookup('root/child')
+
+
+class TestTypeIndexDefaultSchemas:
+    """A container for tests relating to the TypeIndex of the default Schemas."""
+
+    @pytest.fixture
+    def activity_type_index(self):
+        """Return the TypeIndex of the 2.03 Activity Schema."""
+        return iati.default.activity_schema('2.03').type_index()
+
+    @pytest.mark.parametrize('path, datatype, min_occurs, max_occurs', [
+        ('iati-activities/@generated-datetime', 'xsd:dateTime', 0, 1),
+        ('iati-activities/iati-activity', None, 1, None),
+        ('iati-activities/iati-activity/@xml:lang', 'xsd:language', 0, 1),
+        ('iati-activities/iati-activity/iati-identifier', 'xsd:string', 1, 1),
+        ('iati-activities/iati-activity/activity-date/@iso-date', 'xsd:date', 1, 1),
+        ('iati-activities/iati-activity/budget/value', 'xsd:decimal', 1, 1),
+        ('iati-activities/iati-activity/budget/value/@value-date', 'xsd:date', 1, 1),
+        ('iati-activities/iati-activity/document-link/@url', 'xsd:anyURI', 1, 1),
+        ('iati-activities/iati-activity/title/narrative', 'xsd:string', 1, None)
+    ])
+    def test_default_activity_schema_types(self, activity_type_index, path, datatype, min_occurs, max_occurs):
+        """Check that nodes within the 2.03 Activity Schema have the expected datatypes and cardinalities."""
+        node = activity_type_index.lookup(path)
+
+        assert (node.datatype, node.min_occurs, node.max_occurs) == (datatype, min_occurs, max_occurs)
+
+    def test_default_schemas_fully_resolved(self, std_ver_minor_inst_valid_fullsupport):
+        """Check that the datatype of every attribute within the default Schemas is resolved."""
+        for schema in [iati.default.activity_schema(std_ver_minor_inst_valid_fullsupport), iati.default.organisation_schema(std_ver_minor_inst_valid_fullsupport)]:
+            type_index = schema.type_index()
+
+            assert type_index.root.name == schema.ROOT_ELEMENT_NAME
+            assert all(node.datatype != 'xsd:anySimpleType' for node in type_index if node.is_attribute)
+
+    def test_node_for_dataset_element(self, activity_type_index):
+        """Check that the nodes for elements and attributes within a Dataset are located."""
+        dataset = iati.Dataset("""
+            <iati-activities version="2.03">
+                <iati-activity>
+                    <iati-identifier>AA-AAA-123456789-ABC123</iati-identifier>
+                    <budget><value value-date="2018-01-01">100</value></budget>
+                    <not-in-the-schema/>
+                </iati-activity>
+            </iati-activities>
+        """)
+        value = dataset.xml_tree.find('iati-activity/budget/value')
+
+        assert activity_type_index.node_for(value) is activity_type_index.lookup('iati-activities/iati-activity/budget/value')
+        assert activity_type_index.node_for(value, 'value-date').datatype == 'xsd:date'
+        assert activity_type_index.node_for(dataset.xml_tree.find('iati-activity/not-in-the-schema')) is None
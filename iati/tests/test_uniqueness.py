@@ -0,0 +1,195 @@
+"""A module containing tests for the library representation of an index of values that must be unique across many files."""
+import os
+import pytest
+import iati.uniqueness
+import iati.utilities
+import iati.validator
+
+
+ACTIVITIES_TEMPLATE = """<?xml version="1.0"?>
+<iati-activities version="2.03">
+{0}
+</iati-activities>"""
+
+ACTIVITY_TEMPLATE = """  <iati-activity>
+    <iati-identifier>{0}</iati-identifier>
+  </iati-activity>"""
+
+
+def write_activities_file(directory, name, identifiers):
+    """Write a file containing an activity for each of the given identifiers.
+
+    Args:
+        directory (py.path.local): The directory to write the file to.
+        name (str): The name of the file.
+        identifiers (list of str): The identifiers of the activities within the file.
+
+    Returns:
+        str: The path to the written file. Each activity is three lines long, and the identifier of the first is on line 4.
+
+    """
+    new_file = directory.join(name)
+    new_file.write(ACTIVITIES_TEMPLATE.format('\n'.join(ACTIVITY_TEMPLATE.format(identifier) for identifier in identifiers)))
+    return str(new_file)
+
+
+class TestUniquenessIndex:
+    """A container for tests relating to UniquenessIndex."""
+
+    @pytest.fixture(params=['//iati-activity', '//iati-activities/iati-activity'])
+    def identifier_rule(self, request):
+        """Return a Rule stating that activity identifiers must be unique, with a context that may or may not allow files to be streamed."""
+        return iati.RuleUnique(request.param, {'paths': ['iati-identifier']})
+
+    @pytest.fixture
+    def activity_files(self, tmpdir):
+        """Return paths to files where `AA-1` is used in both files and `AA-3` is repeated within the second file."""
+        return [
+            write_activities_file(tmpdir, 'first.xml', ['AA-1', 'AA-2']),
+            write_activities_file(tmpdir, 'second.xml', ['AA-3', 'AA-1', 'AA-3'])
+        ]
+
+    def test_collisions_across_files(self, identifier_rule, activity_files):
+        """Check that values repeated within and across files are located, along with the file and line they are found at."""
+        first_file, second_file = activity_files
+
+        with iati.uniqueness.UniquenessIndex(identifier_rule) as index:
+            for file_path in activity_files:
+                index.add_file(file_path)
+
+            assert len(index) == 5
+            assert list(index.collisions()) == [
+                ('AA-1', [(first_file, 4), (second_file, 7)]),
+                ('AA-3', [(second_file, 4), (second_file, 10)])
+            ]
+
+    def test_no_collisions(self, identifier_rule, tmpdir):
+        """Check that no collisions are found when every value is unique."""
+        with iati.uniqueness.UniquenessIndex(identifier_rule) as index:
+            index.add_file(write_activities_file(tmpdir, 'first.xml', ['AA-1', 'AA-2']))
+            index.add_file(write_activities_file(tmpdir, 'second.xml', ['AA-3']))
+
+            assert list(index.collisions()) == []
+
+    def test_add_dataset(self, identifier_rule):
+        """Check that values may be added from a Dataset, with the given source reported for collisions."""
+        dataset = iati.Dataset(ACTIVITIES_TEMPLATE.format(ACTIVITY_TEMPLATE.format('AA-1')))
+
+        with iati.uniqueness.UniquenessIndex(identifier_rule) as index:
+            index.add_dataset(dataset, 'first')
+            index.add_dataset(dataset, 'second')
+
+            assert list(index.collisions()) == [('AA-1', [('first', 4), ('second', 4)])]
+
+    def test_attribute_values_are_indexed(self, tmpdir):
+        """Check that values in attributes are indexed, with the line of the element containing the attribute."""
+        rule = iati.RuleUnique('//iati-activity', {'paths': ['reporting-org/@ref']})
+        xml_path = tmpdir.join('attributes.xml')
+        xml_path.write(ACTIVITIES_TEMPLATE.format('<iati-activity>\n<reporting-org ref="AA"/></iati-activity>\n<iati-activity>\n<reporting-org ref="AA"/></iati-activity>'))
+
+        with iati.uniqueness.UniquenessIndex(rule) as index:
+            index.add_file(str(xml_path))
+
+            assert list(index.collisions()) == [('AA', [(str(xml_path), 4), (str(xml_path), 6)])]
+
+    def test_persistent_index(self, identifier_rule, activity_files, tmpdir):
+        """Check that an index stored at a specified location is kept once closed, so values may be added to it later."""
+        first_file, second_file = activity_files
+        index_path = str(tmpdir.join('index.sqlite'))
+
+        with iati.uniqueness.UniquenessIndex(identifier_rule, index_path) as index:
+            index.add_file(first_file)
+
+        assert os.path.exists(index_path)
+
+        with iati.uniqueness.UniquenessIndex(identifier_rule, index_path) as index:
+            index.add_file(second_file)
+
+            assert len(index) == 5
+            assert [value for value, _ in index.collisions()] == ['AA-1', 'AA-3']
+
+    def test_temporary_index_removed_when_closed(self, identifier_rule):
+        """Check that a temporary index is removed once it is closed."""
+        index = iati.uniqueness.UniquenessIndex(identifier_rule)
+        assert os.path.exists(index.path)
+
+        index.close()
+
+        assert not os.path.exists(index.path)
+
+    def test_non_unique_rule_raises_error(self):
+        """Check that an index may only be created for a `unique` Rule."""
+        rule = iati.RuleAtLeastOne('//iati-activity', {'paths': ['iati-identifier']})
+
+        with pytest.raises(TypeError):
+            iati.uniqueness.UniquenessIndex(rule)
+
+    @pytest.mark.parametrize('rule_path', [
+        '../@version',
+        '/iati-activities/@version',
+        'ancestor::iati-activities/@version',
+        'parent::*/@version',
+        'preceding-sibling::iati-activity/iati-identifier',
+        'following-sibling::iati-activity[1]/iati-identifier',
+        'iati-identifier[. = /iati-activities/iati-activity[1]/iati-identifier]'
+    ])
+    def test_file_not_streamed_when_path_looks_outside_context(self, rule_path, activity_files, monkeypatch):
+        """Check that a file is loaded in full, with the same values located as for a Dataset, when a Rule path may look outside the context element."""
+        rule = iati.RuleUnique('//iati-activity', {'paths': [rule_path]})
+        monkeypatch.setattr(iati.uniqueness, '_stream_elements_called', pytest.fail)
+
+        with iati.uniqueness.UniquenessIndex(rule) as file_index, iati.uniqueness.UniquenessIndex(rule) as dataset_index:
+            for file_path in activity_files:
+                file_index.add_file(file_path)
+                dataset_index.add_dataset(iati.utilities.load_as_dataset(file_path), file_path)
+
+            assert len(file_index) == len(dataset_index) > 0
+            assert list(file_index.collisions()) == list(dataset_index.collisions())
+
+    @pytest.mark.parametrize('rule_path', ['iati-identifier', './/iati-identifier', '*[1]', 'iati-identifier[. != ""]'])
+    def test_file_streamed_when_path_looks_within_context(self, rule_path, activity_files, monkeypatch):
+        """Check that a file is streamed when the Rule context selects elements by name and each path only looks within the context element."""
+        rule = iati.RuleUnique('//iati-activity', {'paths': [rule_path]})
+        monkeypatch.setattr(iati.utilities, 'load_as_dataset', pytest.fail)
+
+        with iati.uniqueness.UniquenessIndex(rule) as index:
+            index.add_file(activity_files[1])
+
+            assert [value for value, _ in index.collisions()] == ['AA-3']
+
+    def test_add_dataset_raises_error_when_not_dataset(self, identifier_rule):
+        """Check that an error is raised when something other than a Dataset is added."""
+        with iati.uniqueness.UniquenessIndex(identifier_rule) as index:
+            with pytest.raises(TypeError):
+                index.add_dataset('not a Dataset')
+
+
+class TestValidateUniquenessAcrossFiles:
+    """A container for tests relating to checking uniqueness across files as part of validation."""
+
+    def test_error_for_each_repeated_value(self, tmpdir):
+        """Check that an error is logged for each place a value is found after the first, stating where it was found."""
+        rule = iati.RuleUnique('//iati-activity', {'paths': ['iati-identifier']})
+        file_paths = [
+            write_activities_file(tmpdir, 'first.xml', ['AA-1', 'AA-2']),
+            write_activities_file(tmpdir, 'second.xml', ['AA-1', 'AA-1'])
+        ]
+
+        error_log = iati.validator.validate_uniqueness_across_files(file_paths, rule)
+
+        assert len(error_log) == 2
+        assert all(error.name == 'err-rule-unique-across-files-conformance-fail' for error in error_log)
+        assert [error.line_number for error in error_log] == [4, 7]
+        assert all(file_paths[1] in error.info and file_paths[0] in error.info for error in error_log)
+
+    def test_no_errors_when_values_unique(self, tmpdir):
+        """Check that no errors are logged when every value is unique across files."""
+        rule = iati.RuleUnique('//iati-activity', {'paths': ['iati-identifier']})
+        file_paths = [
+            write_activities_file(tmpdir, 'first.xml', ['AA-1']),
+            write_activities_file(tmpdir, 'second.xml', ['AA-2'])
+        ]
+
+        error_log = iati.validator.validate_uniqueness_across_files(file_paths, rule)
+
+        assert not error_log.contains_errors()
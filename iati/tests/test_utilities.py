@@ -1,4 +1,6 @@
 """A module containing tests for the library implementation of accessing utilities."""
+from datetime import datetime
+import logging
 from lxml import etree
 import pytest
 import iati.resources
@@ -175,21 +177,113 @@ class TestUtilities:
 
         assert 'To parse XML into a tree, the XML must be a string, not a' in str(excinfo.value)
 
-    def test_log(self):
-        """TODO: Implement testing for logging."""
-        pass
+    @pytest.mark.parametrize("date_str, expected", [
+        ('2016-08-17', datetime(2016, 8, 17)),
+        ('2016-08-17Z', datetime(2016, 8, 17)),
+        ('2016-08-17+01:00', datetime(2016, 8, 17)),
+        ('2016-08-17-13:30', datetime(2016, 8, 17)),
+        ('2016-02-29', datetime(2016, 2, 29))
+    ])
+    def test_convert_xsd_date_to_datetime(self, date_str, expected):
+        """Check that a permitted xsd:date string is converted to the start of the relevant day."""
+        assert iati.utilities.convert_xsd_date_to_datetime(date_str) == expected
+
+    @pytest.mark.parametrize("date_str", [
+        '17-08-2016',  # Euro-date
+        '2016-8-17',  # month not zero-padded
+        '2016-08-5',  # day not zero-padded
+        ' 2016-08-17',  # leading whitespace
+        '2016-08-17 ',  # trailing whitespace
+        '2016-08-17\n',  # trailing newline
+        '2016-08-17+1:00',  # timezone not zero-padded
+        '2016-08-17:01:00',  # non-permitted leading timezone character
+        '2016-08-17+24:00',  # timezone out of range
+        '-2016-08-17',  # leading hyphen
+        '2016-08-17T13:19:05',  # xsd:dateTime
+        '2017-02-29',  # not a real date
+        '2016-13-01',  # not a real month
+        '\u0662\u0660\u0661\u0666-08-17',  # non-ASCII digits
+        ''
+    ])
+    def test_convert_xsd_date_to_datetime_invalid(self, date_str):
+        """Check that a string that is not a permitted xsd:date raises a ValueError."""
+        with pytest.raises(ValueError):
+            iati.utilities.convert_xsd_date_to_datetime(date_str)
 
-    def test_log_error(self):
-        """TODO: Implement testing for logging."""
-        pass
+    @pytest.mark.parametrize("datetime_str, expected", [
+        ('2017-07-26T13:19:05', datetime(2017, 7, 26, 13, 19, 5)),
+        ('2017-07-26T13:19:05Z', datetime(2017, 7, 26, 13, 19, 5)),
+        ('2017-07-26T13:19:05.493Z', datetime(2017, 7, 26, 13, 19, 5, 493000)),
+        ('2017-07-26T13:19:05.1234567-05:00', datetime(2017, 7, 26, 13, 19, 5, 123456))
+    ])
+    def test_convert_xsd_datetime_to_datetime(self, datetime_str, expected):
+        """Check that a permitted xsd:dateTime string is converted to a datetime."""
+        assert iati.utilities.convert_xsd_datetime_to_datetime(datetime_str) == expected
+
+    @pytest.mark.parametrize("datetime_str", [
+        '2017-07-26',  # xsd:date
+        '2017-07-26T13:19',  # missing seconds
+        '2017-07-26T3:19:05',  # hour not zero-padded
+        '2017-07-26T24:19:05',  # hour out of range
+        '2017-07-26 13:19:05',  # space separator
+        '2017-07-26T13:19:05.',  # missing fractional seconds
+        '2017-07-26T13:19:05\n',  # trailing newline
+        '2017-07-26T13:19:05Z\n'  # trailing newline after timezone
+    ])
+    def test_convert_xsd_datetime_to_datetime_invalid(self, datetime_str):
+        """Check that a string that is not a permitted xsd:dateTime raises a ValueError."""
+        with pytest.raises(ValueError):
+            iati.utilities.convert_xsd_datetime_to_datetime(datetime_str)
 
-    def test_log_exception(self):
-        """TODO: Implement testing for logging."""
-        pass
+    def test_convert_xsd_dates_to_datetime64(self):
+        """Check that a column of xsd:date strings is converted to a NumPy datetime64 array, with missing values as NaT."""
+        numpy = pytest.importorskip('numpy')
 
-    def test_log_warning(self):
-        """TODO: Implement testing for logging."""
-        pass
+        dates = iati.utilities.convert_xsd_dates_to_datetime64(['2016-08-17', '2017-08-17Z', '', None])
+
+        assert dates.dtype == numpy.dtype('datetime64[D]')
+        assert list(dates[:2]) == [numpy.datetime64('2016-08-17'), numpy.datetime64('2017-08-17')]
+        assert numpy.isnat(dates[2:]).all()
+        assert (dates[:1] < dates[1:2]).all()
+
+    def test_convert_xsd_dates_to_datetime64_invalid(self):
+        """Check that a column containing a string that is not a permitted xsd:date raises a ValueError."""
+        pytest.importorskip('numpy')
+
+        with pytest.raises(ValueError):
+            iati.utilities.convert_xsd_dates_to_datetime64(['2016-08-17', '17-08-2016'])
+
+    def test_log(self, log_records):
+        """Check that a message is logged at the specified level, with its arguments substituted."""
+        iati.utilities.log(logging.INFO, 'A message about %s', 'something')
+
+        records = log_records()
+
+        assert [(record.levelno, record.getMessage()) for record in records] == [(logging.INFO, 'A message about something')]
+
+    def test_log_error(self, log_records):
+        """Check that an error is logged."""
+        iati.utilities.log_error('An error')
+
+        assert [record.levelno for record in log_records()] == [logging.ERROR]
+
+    def test_log_exception(self, log_records):
+        """Check that an exception is logged as an error, along with its traceback."""
+        try:
+            raise ValueError('A problem')
+        except ValueError:
+            iati.utilities.log_exception('An exception')
+
+        record = log_records()[0]
+
+        assert record.levelno == logging.ERROR
+        assert 'ValueError: A problem' in record.exc_text
+
+    def test_log_warning(self, log_records):
+        """Check that a warning is logged."""
+        iati.utilities.log_warning('A warning')
+
+        assert [record.levelno for record in log_records()] == [logging.WARNING]
 
 
 class TestFileLoading:
@@ -596,6 +596,106 @@ class TestVersionNormalisation:
         assert (result == original_value) or isinstance(original_value, type(iter([]))) or math.isnan(original_value)
 
 
+class TestFusedVersionNormalisation:
+    """A container for tests relating to the decorators that normalise and check a version in a single step."""
+
+    @iati.version.decimalise_integer
+    @iati.version.normalise_decimals
+    @iati.version.allow_fully_supported_version
+    def return_stacked_fully_supported_version(version):  # pylint: disable=no-self-argument
+        """Return the version parameter, normalised and checked by applying the individual decorators in turn."""
+        return version
+
+    @iati.version.decimalise_integer
+    @iati.version.normalise_decimals
+    @iati.version.allow_known_version
+    def return_stacked_known_version(version):  # pylint: disable=no-self-argument
+        """Return the version parameter, normalised and checked by applying the individual decorators in turn."""
+        return version
+
+    @iati.version.normalise_fully_supported_version
+    def return_fused_fully_supported_version(version):  # pylint: disable=no-self-argument
+        """Return the version parameter, normalised and checked by the fused decorator."""
+        return version
+
+    @iati.version.normalise_known_version
+    def return_fused_known_version(version):  # pylint: disable=no-self-argument
+        """Return the version parameter, normalised and checked by the fused decorator."""
+        return version
+
+    @pytest.fixture(params=[
+        (return_stacked_fully_supported_version, return_fused_fully_supported_version),
+        (return_stacked_known_version, return_fused_known_version)
+    ])
+    def stacked_and_fused_funcs(self, request):
+        """Return a function decorated with the individual decorators, along with one decorated with the equivalent fused decorator."""
+        return request.param
+
+    def check_equivalent(self, stacked_and_fused_funcs, version):
+        """Check that a pair of functions behave identically when given a version, including when called a second time."""
+        stacked_func, fused_func = stacked_and_fused_funcs
+
+        try:
+            expected = stacked_func(version)
+        except (TypeError, ValueError) as err:
+            for _ in range(2):
+                with pytest.raises(type(err)):
+                    fused_func(version)
+        else:
+            for _ in range(2):
+                result = fused_func(version)
+
+                assert result == expected
+                assert isinstance(result, iati.Version)
+
+    def test_fused_decorators_valid_decimal(self, std_ver_minor_mixedinst_valid_known, stacked_and_fused_funcs):
+        """Check that the fused decorators behave as the individual decorators do for Decimal Versions."""
+        self.check_equivalent(stacked_and_fused_funcs, std_ver_minor_mixedinst_valid_known)
+
+    def test_fused_decorators_valid_integer(self, std_ver_major_uninst_valid_known, stacked_and_fused_funcs):
+        """Check that the fused decorators behave as the individual decorators do for Integer Versions."""
+        self.check_equivalent(stacked_and_fused_funcs, std_ver_major_uninst_valid_known)
+
+    def test_fused_decorators_unknown(self, std_ver_all_mixedinst_valid_unknown, stacked_and_fused_funcs):
+        """Check that the fused decorators behave as the individual decorators do for versions that do not exist."""
+        self.check_equivalent(stacked_and_fused_funcs, std_ver_all_mixedinst_valid_unknown)
+
+    def test_fused_decorators_junk(self, std_ver_all_uninst_mixederr, stacked_and_fused_funcs):
+        """Check that the fused decorators behave as the individual decorators do for values that cannot represent a version."""
+        self.check_equivalent(stacked_and_fused_funcs, std_ver_all_uninst_mixederr)
+
+    @pytest.mark.parametrize('version', ['2.03', '2', 2, iati.Version('2.2.0')])
+    def test_fused_decorators_return_standard_version(self, version):
+        """Check that the fused decorators return the instance of a version that is within `STANDARD_VERSIONS`."""
+        result = TestFusedVersionNormalisation.return_fused_known_version(version)
+
+        assert any(result is standard_version for standard_version in iati.version.STANDARD_VERSIONS)
+
+    def test_fused_decorators_distinguish_bool(self):
+        """Check that `True` is not treated as the Integer Version 1 after 1 has been normalised, even though `True == 1`."""
+        TestFusedVersionNormalisation.return_fused_known_version(1)
+
+        with pytest.raises(ValueError):
+            TestFusedVersionNormalisation.return_fused_known_version(True)
+
+    def test_fused_decorators_modified_version(self):
+        """Check that a Version modified after it has been normalised is normalised afresh."""
+        version = iati.Version('2.2.0')
+        assert TestFusedVersionNormalisation.return_fused_known_version(version) == iati.Version('2.2.0')
+
+        version.minor = 1
+        assert TestFusedVersionNormalisation.return_fused_known_version(version) == iati.Version('2.1.0')
+
+    @pytest.mark.parametrize('decorator', [
+        iati.version.normalise_fully_supported_version,
+        iati.version.normalise_known_version
+    ])
+    def test_fused_decorators_require_arg(self, decorator):
+        """Test that the fused decorators raise a TypeError when given a function that requires no arguments."""
+        with pytest.raises(TypeError):
+            decorator(lambda: True)()
+
+
 class TestVersionMajorMinorRelationship:
     """A container for tests relating to the relationship between major and minor versions."""
 
@@ -0,0 +1,166 @@
+"""A module containing tests for compiling Rulesets into XSLT stylesheets."""
+from datetime import datetime
+import json
+import pytest
+from lxml import etree
+import iati.default
+import iati.rulesets
+import iati.tests.resources
+import iati.tests.test_rulesets as rule_tests
+import iati.validator
+import iati.xslt
+
+
+RULE_TYPE_TESTS = [
+    ('atleast_one', rule_tests.TestRuleAtLeastOne, 'atleastone'),
+    ('date_order', rule_tests.TestRuleDateOrder, 'dateorder'),
+    ('dependent', rule_tests.TestRuleDependent, 'dependent'),
+    ('no_more_than_one', rule_tests.TestRuleNoMoreThanOne, 'nomorethanone'),
+    ('regex_matches', rule_tests.TestRuleRegexMatches, 'regexmatches'),
+    ('regex_no_matches', rule_tests.TestRuleRegexNoMatches, 'regexnomatches'),
+    ('startswith', rule_tests.TestRuleStartsWith, 'startswith'),
+    ('sum', rule_tests.TestRuleSum, 'sum'),
+    ('unique', rule_tests.TestRuleUnique, 'unique')
+]
+"""The type of each Rule, along with the class containing its cases and the name of its test data."""
+
+PARITY_CASES = [
+    (rule_type, case, data_name)
+    for rule_type, test_class, data_name in RULE_TYPE_TESTS
+    for case in getattr(test_class, 'validating_cases', test_class.all_valid_cases) + test_class.invalidating_cases + getattr(test_class, 'nest_cases', [])
+]
+"""Every case used to check the Python implementation of each type of Rule against a Dataset."""
+
+STANDARD_RULESET_DATASETS = [
+    'valid_std_ruleset',
+    'ruleset-std/invalid_std_ruleset_bad_date_order',
+    'ruleset-std/invalid_std_ruleset_bad_identifier',
+    'ruleset-std/invalid_std_ruleset_does_not_sum_100',
+    'ruleset-std/invalid_std_ruleset_missing_sector_element'
+]
+"""Datasets to check against the Standard Ruleset."""
+
+
+def ruleset_containing(*rules):
+    """Return a Ruleset containing the given Rules."""
+    ruleset = iati.Ruleset()
+    ruleset.rules = set(rules)
+    return ruleset
+
+
+def result_or_error(ruleset, dataset):
+    """Check a Dataset against a Ruleset, returning either the results or the type of error that is raised."""
+    try:
+        return dict(ruleset.results_for(dataset))
+    except ValueError as err:
+        return type(err)
+
+
+class TestCompiledRulesetParity:
+    """A container for tests checking that compiled Rulesets give the same results as checking each Rule in Python."""
+
+    @pytest.mark.parametrize('rule_type, case, data_name', PARITY_CASES)
+    def test_rule_parity(self, rule_type, case, data_name):
+        """Check that each case gives the same result in all contexts, with and without conditions, whether compiled or not."""
+        datasets = [iati.tests.resources.load_as_dataset('ruleset/{0}_{1}'.format(validity, data_name)) for validity in ['valid', 'invalid']]
+        constructor = iati.rulesets.constructor_for_rule_type(rule_type)
+        ruleset = ruleset_containing()
+
+        for context in ['//root_element', '//nest', '//non-existent-context']:
+            for condition in [None, 'count(condition)>0', 'count(condition)<1', 'nocondition']:
+                conditional_case = dict(case) if condition is None else dict(case, condition=condition)
+                ruleset.rules = {constructor(context, conditional_case)}
+                compiled_ruleset = iati.xslt.CompiledRuleset(ruleset)
+
+                for dataset in datasets:
+                    assert result_or_error(compiled_ruleset, dataset) == result_or_error(ruleset, dataset)
+
+    @pytest.mark.parametrize('data_name', STANDARD_RULESET_DATASETS)
+    def test_standard_ruleset_parity(self, data_name):
+        """Check that the Standard Ruleset gives the same results for each Rule whether compiled or not."""
+        ruleset = iati.default.ruleset('2.02')
+        compiled_ruleset = iati.xslt.CompiledRuleset(ruleset)
+        dataset = iati.tests.resources.load_as_dataset(data_name, '2.02')
+
+        assert dict(compiled_ruleset.results_for(dataset)) == dict(ruleset.results_for(dataset))
+        assert compiled_ruleset.is_valid_for(dataset) is ruleset.is_valid_for(dataset)
+
+    @pytest.mark.parametrize('data_name', STANDARD_RULESET_DATASETS)
+    def test_validation_parity(self, data_name):
+        """Check that Ruleset validation gives the same errors whether the Ruleset is compiled or not."""
+        ruleset = iati.default.ruleset('2.02')
+        compiled_ruleset = iati.xslt.CompiledRuleset(ruleset)
+        dataset = iati.tests.resources.load_as_dataset(data_name, '2.02')
+
+        compiled_errors = iati.validator._check_rules(dataset, compiled_ruleset)  # pylint: disable=protected-access
+        python_errors = iati.validator._check_rules(dataset, ruleset)  # pylint: disable=protected-access
+
+        assert sorted(error.name for error in compiled_errors) == sorted(error.name for error in python_errors)
+
+
+class TestCompiledRuleset:
+    """A container for tests relating to compiling Rulesets."""
+
+    def test_compiled_ruleset_is_ruleset(self):
+        """Check that a compiled Ruleset contains the same Rules as the Ruleset it is compiled from."""
+        ruleset = iati.default.ruleset('2.02')
+        compiled_ruleset = iati.xslt.CompiledRuleset(ruleset)
+
+        assert isinstance(compiled_ruleset, iati.Ruleset)
+        assert compiled_ruleset == ruleset
+
+    def test_stylesheet_is_xslt(self):
+        """Check that the compiled stylesheet is valid XSLT containing a template for each compiled Rule."""
+        ruleset = ruleset_containing(
+            iati.RuleAtLeastOne('//iati-activity', {'paths': ['iati-identifier']}),
+            iati.RuleDateOrder('//iati-activity', {'less': 'activity-date[@type="1"]/@iso-date', 'more': 'NOW'})
+        )
+        compiled_ruleset = iati.xslt.CompiledRuleset(ruleset)
+
+        etree.XSLT(compiled_ruleset.stylesheet)
+        assert len(compiled_ruleset.stylesheet.getroot().findall('{http://www.w3.org/1999/XSL/Transform}template[@name]')) == 1
+
+    @pytest.mark.parametrize('regex', [r"'", r'"', r'''^['"]+$'''])
+    def test_regex_containing_quotes(self, regex):
+        """Check that regexes containing either or both types of quote are compiled correctly."""
+        dataset = iati.Dataset('<root><value>\'"</value><value>\'</value></root>')
+        ruleset = ruleset_containing(iati.RuleRegexMatches('//root', {'regex': regex, 'paths': ['value']}))
+
+        assert dict(iati.xslt.CompiledRuleset(ruleset).results_for(dataset)) == dict(ruleset.results_for(dataset))
+
+    @pytest.mark.parametrize('values, total', [
+        (['50', '50'], 100),  # summed natively
+        (['33.33', '33.33', '33.34'], 100),  # summed exactly in Python
+        (['33.33', '33.33', '33.33'], 100),
+        (['50', '50'], 100.5)
+    ])
+    def test_sum_parity(self, values, total):
+        """Check that values are summed in the same way as in Python, whether or not they can be summed natively."""
+        dataset = iati.Dataset('<root><parent>{0}</parent></root>'.format(''.join('<value>{0}</value>'.format(value) for value in values)))
+        ruleset = ruleset_containing(iati.RuleSum('//parent', {'paths': ['value'], 'sum': total}))
+
+        assert dict(iati.xslt.CompiledRuleset(ruleset).results_for(dataset)) == dict(ruleset.results_for(dataset))
+
+    def test_results_for_raises_error_when_not_dataset(self):
+        """Check that an error is raised when something other than a Dataset is checked."""
+        compiled_ruleset = iati.xslt.CompiledRuleset(iati.default.ruleset('2.02'))
+
+        with pytest.raises(TypeError):
+            compiled_ruleset.results_for('not a Dataset')
+
+    @pytest.mark.parametrize('check', [
+        lambda ruleset, dataset, now: ruleset.is_valid_for(dataset, now=now, record_statistics=True),
+        lambda ruleset, dataset, now: dict(ruleset.results_for(dataset, now=now, record_statistics=True))
+    ])
+    def test_statistics_recorded_for_rules_checked_in_python(self, check):
+        """Check that a compiled Ruleset accepts the arguments of any Ruleset, recording statistics for the Rules that are checked in Python but not for those checked by the stylesheet."""
+        dataset = iati.Dataset('<iati-activities><iati-activity><iati-identifier>AA-1</iati-identifier><activity-date type="1" iso-date="2017-01-01"/></iati-activity></iati-activities>')
+        python_rule = iati.RuleDateOrder('//iati-activity', {'less': 'activity-date[@type="1"]/@iso-date', 'more': 'NOW'})
+        compiled_rule = iati.RuleAtLeastOne('//iati-activity', {'paths': ['iati-identifier']})
+        now = datetime(2018, 1, 1)
+        ruleset = ruleset_containing(python_rule, compiled_rule)
+        compiled_ruleset = iati.xslt.CompiledRuleset(ruleset_containing(python_rule, compiled_rule))
+
+        assert check(compiled_ruleset, dataset, now) == check(ruleset, dataset, now)
+        assert len(ruleset.statistics) == 2
+        assert [statistics['rule_type'] for statistics in json.loads(compiled_ruleset.statistics.to_json())] == ['date_order']
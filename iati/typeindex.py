@@ -0,0 +1,510 @@
+"""A module containing an index of the datatypes of the elements and attributes declared within a Schema.
+
+The index is a tree of TypeNodes, mirroring the structure of the XML that a Schema permits. Each node records the datatype and cardinality of an element or attribute.
+Child nodes are held in dictionaries, so a node may be located in constant time from its parent.
+This allows streaming code that tracks its position within the tree to look up the type of each node as it is reached.
+
+Example:
+    To locate every `xsd:date` attribute within an Activity Schema::
+
+        type_index = iati.default.activity_schema('2.03').type_index()
+        date_paths = type_index.paths_of_type('xsd:date')
+
+Note:
+    Datatypes are named with an `xsd:` prefix, such as `xsd:decimal`, whatever prefix is used within the XSD. Types derived from built-in XSD types are resolved to the built-in type that they are derived from.
+
+"""
+from lxml import etree
+import iati.constants
+
+
+XSD_NAMESPACE = iati.constants.NSMAP['xsd']
+"""The namespace of XSD elements and built-in datatypes."""
+
+XML_NAMESPACE = 'http://www.w3.org/XML/1998/namespace'
+"""The namespace of attributes such as `xml:lang`."""
+
+_XML_ATTRIBUTE_TYPES = {'base': 'xsd:anyURI', 'id': 'xsd:ID', 'lang': 'xsd:language', 'space': 'xsd:NCName'}
+"""The datatype of each attribute within the XML namespace. The schema declaring these is imported rather than included, so is not within a flattened Schema."""
+
+_MIXED_CONTENT_TYPE = 'xsd:string'
+"""The datatype given to the text of elements with mixed content."""
+
+
+class TypeNode:
+    """An element or attribute declared within a Schema, at a particular location within the XML that the Schema permits.
+
+    Attributes:
+        name (str): The name of the element or attribute, as used by lxml. Attributes within the XML namespace are named in `{namespace}name` form.
+        path (str): The location of the node, such as `iati-activities/iati-activity/budget/value/@value-date`.
+        datatype (str or None): The datatype of the text content of an element, or the value of an attribute, such as `xsd:date`. `None` for elements that may only contain other elements.
+        min_occurs (int): The minimum number of times that the node must occur within its parent.
+        max_occurs (int or None): The maximum number of times that the node may occur within its parent. `None` when unbounded.
+        is_attribute (bool): Whether the node is an attribute rather than an element.
+        children (dict): The elements that this element may contain, keyed by name. Empty for attributes.
+        attributes (dict): The attributes that this element may have, keyed by name. Empty for attributes.
+
+    """
+
+    __slots__ = ('name', 'path', 'datatype', 'min_occurs', 'max_occurs', 'is_attribute', 'children', 'attributes')
+
+    def __init__(self, name, path, datatype=None, min_occurs=1, max_occurs=1, is_attribute=False):
+        """Initialise a TypeNode.
+
+        Args:
+            name (str): The name of the element or attribute.
+            path (str): The location of the node.
+            datatype (str): The datatype of the node.
+            min_occurs (int): The minimum number of times that the node must occur.
+            max_occurs (int): The maximum number of times that the node may occur. `None` when unbounded.
+            is_attribute (bool): Whether the node is an attribute.
+
+        """
+        self.name = name
+        self.path = path
+        self.datatype = datatype
+        self.min_occurs = min_occurs
+        self.max_occurs = max_occurs
+        self.is_attribute = is_attribute
+        self.children = dict()
+        self.attributes = dict()
+
+    def __repr__(self):
+        """Return a representation of the node, showing its location and datatype."""
+        return '{0}({1!r}, datatype={2!r})'.format(type(self).__name__, self.path, self.datatype)
+
+    def attribute(self, name):
+        """Locate an attribute of this element.
+
+        Args:
+            name (str): The name of the attribute, as used by lxml.
+
+        Returns:
+            iati.typeindex.TypeNode or None: The attribute. `None` when the element has no such attribute.
+
+        """
+        return self.attributes.get(name)
+
+    def child(self, name):
+        """Locate a child element of this element.
+
+        Args:
+            name (str): The name of the child element.
+
+        Returns:
+            iati.typeindex.TypeNode or None: The child element. `None` when the element may not contain such an element.
+
+        """
+        return self.children.get(name)
+
+
+class TypeIndex:
+    """An index of the datatypes and cardinalities of the elements and attributes declared within a Schema.
+
+    Attributes:
+        root (iati.typeindex.TypeNode): The root element of the XML that the Schema permits.
+
+    """
+
+    def __init__(self, tree, root_name):
+        """Build the index for a Schema.
+
+        Args:
+            tree (etree._ElementTree): The XML Schema, with includes flattened.
+            root_name (str): The name of the root element of the XML that the Schema permits.
+
+        Raises:
+            ValueError: When the XML Schema does not declare the root element.
+
+        """
+        builder = _TypeIndexBuilder(tree.getroot())
+        self.root = builder.build(root_name)
+        self._nodes_by_path = {node.path: node for node in _walk(self.root)}
+
+    def __iter__(self):
+        """Iterate over every node within the index, with each element followed by its attributes and then its children."""
+        return iter(self._nodes_by_path.values())
+
+    def __len__(self):
+        """Return the number of nodes within the index."""
+        return len(self._nodes_by_path)
+
+    def lookup(self, path):
+        """Locate a node by its location.
+
+        Args:
+            path (str): The location of the node, such as `iati-activities/iati-activity/@last-updated-datetime`. A leading `/` is permitted.
+
+        Returns:
+            iati.typeindex.TypeNode or None: The node at the location. `None` when the Schema does not declare a node at the location.
+
+        """
+        return self._nodes_by_path.get(path.lstrip('/'))
+
+    def node_for(self, element, attribute_name=None):
+        """Locate the node for an element within a Dataset, or one of its attributes.
+
+        Args:
+            element (etree._Element): An element within a Dataset.
+            attribute_name (str): The name of an attribute of the element, as used by lxml. Defaults to the element itself.
+
+        Returns:
+            iati.typeindex.TypeNode or None: The node for the element or attribute. `None` when the Schema does not declare it at the location of the element.
+
+        Note:
+            This walks up the ancestors of the element. Code that processes each element in turn should instead track the node of the current element, locating the nodes of its children with `TypeNode.child()`.
+
+        """
+        names = [ancestor.tag for ancestor in element.iterancestors()][::-1] + [element.tag]
+        if names[0] != self.root.name:
+            return None
+
+        node = self.root
+        for name in names[1:]:
+            node = node.child(name)
+            if node is None:
+                return None
+
+        return node if attribute_name is None else node.attribute(attribute_name)
+
+    def paths_of_type(self, *datatypes):
+        """List the locations of nodes with any of the given datatypes.
+
+        Args:
+            *datatypes (str): The datatypes to locate, such as `xsd:date`.
+
+        Returns:
+            list of str: The location of each node with one of the datatypes, in the order given by iterating over the index.
+
+        """
+        return [node.path for node in self if node.datatype in datatypes]
+
+
+def _walk(node):
+    """Iterate over a node and all of its descendants, with each element followed by its attributes and then its children."""
+    to_visit = [node]
+    while to_visit:
+        current = to_visit.pop()
+        yield current
+        for attribute in current.attributes.values():
+            yield attribute
+        to_visit.extend(reversed(list(current.children.values())))
+
+
+def _multiply_occurs(first, second):
+    """Multiply two maximum numbers of occurrences, where `None` is unbounded."""
+    if first is None or second is None:
+        return None
+    return first * second
+
+
+class _TypeIndexBuilder:
+    """Resolve the declarations within an XML Schema into a tree of TypeNodes."""
+
+    def __init__(self, schema_root):
+        """Gather the global declarations within an XML Schema.
+
+        Args:
+            schema_root (etree._Element): The root `xsd:schema` element.
+
+        """
+        self._declarations = dict()
+        for declaration_type in ['element', 'attribute', 'attributeGroup', 'complexType', 'simpleType']:
+            self._declarations[declaration_type] = {declaration.get('name'): declaration for declaration in schema_root.iterchildren(_xsd(declaration_type))}
+
+    def build(self, root_name):
+        """Build the tree of nodes beneath a global element.
+
+        Args:
+            root_name (str): The name of the global element.
+
+        Returns:
+            iati.typeindex.TypeNode: The node for the root element.
+
+        Raises:
+            ValueError: When there is no such global element.
+
+        """
+        try:
+            declaration = self._declarations['element'][root_name]
+        except KeyError:
+            raise ValueError('The XML Schema does not declare a `{0}` element.'.format(root_name))
+
+        node = TypeNode(root_name, root_name)
+        self._element_content(declaration, node, set())
+        return node
+
+    def _element_content(self, declaration, node, expanding):
+        """Add the datatype, attributes and children of an element to its node.
+
+        Args:
+            declaration (etree._Element): The `xsd:element` declaring the element, after any `ref` has been resolved.
+            node (iati.typeindex.TypeNode): The node for the element.
+            expanding (set): The complex types being expanded by the ancestors of the element, so that recursive types are only expanded once.
+
+        """
+        type_name = declaration.get('type')
+        if type_name is not None:
+            self._typed_content(declaration, type_name, node, expanding)
+            return
+
+        complex_type = declaration.find(_xsd('complexType'))
+        if complex_type is not None:
+            self._complex_content(complex_type, node, expanding)
+            return
+
+        simple_type = declaration.find(_xsd('simpleType'))
+        if simple_type is not None:
+            node.datatype = self._simple_datatype(simple_type)
+
+    def _typed_content(self, declaration, type_name, node, expanding):
+        """Add the content of a named type to a node.
+
+        Args:
+            declaration (etree._Element): The element in which the type is referenced, used to resolve namespace prefixes.
+            type_name (str): The name of the type, which may have a namespace prefix.
+            node (iati.typeindex.TypeNode): The node to add the content to.
+            expanding (set): The complex types being expanded, as described by `_element_content()`.
+
+        """
+        builtin_type = _builtin_type(declaration, type_name)
+        if builtin_type is not None:
+            node.datatype = builtin_type
+            return
+
+        local_name = _local_name(type_name)
+        if local_name in self._declarations['simpleType']:
+            node.datatype = self._simple_datatype(self._declarations['simpleType'][local_name])
+        elif local_name in self._declarations['complexType'] and local_name not in expanding:
+            self._complex_content(self._declarations['complexType'][local_name], node, expanding | {local_name})
+
+    def _complex_content(self, container, node, expanding):
+        """Add the content defined within a complex type, or an extension of another type, to a node.
+
+        Args:
+            container (etree._Element): The `xsd:complexType` or `xsd:extension` element.
+            node (iati.typeindex.TypeNode): The node to add the content to.
+            expanding (set): The complex types being expanded, as described by `_element_content()`.
+
+        """
+        if container.get('mixed') == 'true':
+            node.datatype = _MIXED_CONTENT_TYPE
+
+        for child in container.iterchildren(tag=etree.Element):
+            child_type = _local_name(child.tag)
+
+            if child_type in ('sequence', 'choice', 'all'):
+                self._particles(child, node, expanding, 1, 1)
+            elif child_type == 'attribute':
+                self._attribute(child, node)
+            elif child_type == 'attributeGroup':
+                self._attribute_group(child, node, set())
+            elif child_type in ('simpleContent', 'complexContent'):
+                for derivation in child.iterchildren(_xsd('extension'), _xsd('restriction')):
+                    self._typed_content(derivation, derivation.get('base'), node, expanding)
+                    self._complex_content(derivation, node, expanding)
+
+    def _particles(self, group, node, expanding, group_min_occurs, group_max_occurs):
+        """Add the child elements within a `sequence`, `choice` or `all` to a node.
+
+        Args:
+            group (etree._Element): The `xsd:sequence`, `xsd:choice` or `xsd:all` element.
+            node (iati.typeindex.TypeNode): The node to add child elements to.
+            expanding (set): The complex types being expanded, as described by `_element_content()`.
+            group_min_occurs (int): The minimum number of times that any enclosing group must occur.
+            group_max_occurs (int or None): The maximum number of times that any enclosing group may occur.
+
+        """
+        min_occurs = group_min_occurs * _min_occurs(group)
+        max_occurs = _multiply_occurs(group_max_occurs, _max_occurs(group))
+        if _local_name(group.tag) == 'choice':
+            # any one of the options within a choice may be absent
+            min_occurs = 0
+
+        for particle in group.iterchildren(tag=etree.Element):
+            particle_type = _local_name(particle.tag)
+
+            if particle_type in ('sequence', 'choice', 'all'):
+                self._particles(particle, node, expanding, min_occurs, max_occurs)
+            elif particle_type == 'element':
+                self._child_element(particle, node, expanding, min_occurs, max_occurs)
+
+    def _child_element(self, particle, node, expanding, group_min_occurs, group_max_occurs):
+        """Add a child element to a node.
+
+        Args:
+            particle (etree._Element): The `xsd:element` declaring or referencing the child element.
+            node (iati.typeindex.TypeNode): The node to add the child element to.
+            expanding (set): The complex types being expanded, as described by `_element_content()`.
+            group_min_occurs (int): The minimum number of times that the enclosing group must occur.
+            group_max_occurs (int or None): The maximum number of times that the enclosing group may occur.
+
+        """
+        reference = particle.get('ref')
+        name = particle.get('name') if reference is None else _local_name(reference)
+        declaration = particle if reference is None else self._declarations['element'].get(name)
+
+        child = TypeNode(
+            name,
+            '{0}/{1}'.format(node.path, name),
+            min_occurs=group_min_occurs * _min_occurs(particle),
+            max_occurs=_multiply_occurs(group_max_occurs, _max_occurs(particle))
+        )
+        node.children[name] = child
+
+        if declaration is not None:
+            element_key = ('element', name) if reference is not None else None
+            if element_key not in expanding:
+                self._element_content(declaration, child, expanding if element_key is None else expanding | {element_key})
+
+    def _attribute(self, declaration, node):
+        """Add an attribute to a node.
+
+        Args:
+            declaration (etree._Element): The `xsd:attribute` declaring or referencing the attribute.
+            node (iati.typeindex.TypeNode): The node to add the attribute to.
+
+        """
+        if declaration.get('use') == 'prohibited':
+            return
+
+        reference = declaration.get('ref')
+        if reference is not None:
+            prefix, _, local_name = reference.rpartition(':')
+            # the `xml` prefix is bound implicitly, so does not appear within the nsmap
+            if prefix == 'xml' or declaration.nsmap.get(prefix or None) == XML_NAMESPACE:
+                name = '{{{0}}}{1}'.format(XML_NAMESPACE, local_name)
+                path_name = 'xml:' + local_name
+                datatype = _XML_ATTRIBUTE_TYPES.get(local_name, 'xsd:anySimpleType')
+            else:
+                name = path_name = local_name
+                datatype = self._attribute_datatype(self._declarations['attribute'].get(local_name))
+        else:
+            name = path_name = declaration.get('name')
+            datatype = self._attribute_datatype(declaration)
+
+        node.attributes[name] = TypeNode(
+            name,
+            '{0}/@{1}'.format(node.path, path_name),
+            datatype=datatype,
+            min_occurs=1 if declaration.get('use') == 'required' else 0,
+            max_occurs=1,
+            is_attribute=True
+        )
+
+    def _attribute_datatype(self, declaration):
+        """Determine the datatype of an attribute declaration.
+
+        Returns:
+            str: The datatype of the attribute. `xsd:anySimpleType` when no type is declared, or the declaration cannot be found.
+
+        """
+        if declaration is None:
+            return 'xsd:anySimpleType'
+
+        type_name = declaration.get('type')
+        if type_name is not None:
+            return self._named_simple_datatype(declaration, type_name)
+
+        simple_type = declaration.find(_xsd('simpleType'))
+        if simple_type is not None:
+            return self._simple_datatype(simple_type)
+
+        return 'xsd:anySimpleType'
+
+    def _attribute_group(self, reference, node, expanding):
+        """Add the attributes within a referenced attribute group to a node.
+
+        Args:
+            reference (etree._Element): The `xsd:attributeGroup` referencing the group.
+            node (iati.typeindex.TypeNode): The node to add the attributes to.
+            expanding (set): The names of the attribute groups being expanded, so that recursive groups are only expanded once.
+
+        """
+        group_name = _local_name(reference.get('ref', ''))
+        group = self._declarations['attributeGroup'].get(group_name)
+        if group is None or group_name in expanding:
+            return
+
+        for child in group.iterchildren(_xsd('attribute'), _xsd('attributeGroup')):
+            if _local_name(child.tag) == 'attribute':
+                self._attribute(child, node)
+            else:
+                self._attribute_group(child, node, expanding | {group_name})
+
+    def _named_simple_datatype(self, declaration, type_name):
+        """Resolve a named simple type to the built-in datatype that it is derived from.
+
+        Returns:
+            str: The built-in datatype. `xsd:anySimpleType` when the type cannot be resolved.
+
+        """
+        builtin_type = _builtin_type(declaration, type_name)
+        if builtin_type is not None:
+            return builtin_type
+
+        simple_type = self._declarations['simpleType'].get(_local_name(type_name))
+        if simple_type is None:
+            return 'xsd:anySimpleType'
+
+        return self._simple_datatype(simple_type)
+
+    def _simple_datatype(self, simple_type, depth=0):
+        """Resolve an `xsd:simpleType` to the built-in datatype that it is derived from.
+
+        Returns:
+            str: The built-in datatype. Lists and unions are treated as `xsd:string`. `xsd:anySimpleType` when the type cannot be resolved.
+
+        """
+        restriction = simple_type.find(_xsd('restriction'))
+        if restriction is None:
+            return 'xsd:string'
+
+        base = restriction.get('base')
+        builtin_type = _builtin_type(restriction, base) if base is not None else None
+        if builtin_type is not None:
+            return builtin_type
+
+        base_type = self._declarations['simpleType'].get(_local_name(base or ''))
+        if base_type is None or depth > len(self._declarations['simpleType']):
+            return 'xsd:anySimpleType'
+
+        return self._simple_datatype(base_type, depth + 1)
+
+
+def _builtin_type(declaration, type_name):
+    """Determine whether a type name refers to a built-in XSD datatype.
+
+    Args:
+        declaration (etree._Element): The element in which the type is referenced, used to resolve namespace prefixes.
+        type_name (str): The name of the type, which may have a namespace prefix.
+
+    Returns:
+        str or None: The datatype with an `xsd:` prefix. `None` when the type is not built in.
+
+    """
+    prefix, _, local_name = type_name.rpartition(':')
+    if declaration.nsmap.get(prefix or None) == XSD_NAMESPACE:
+        return 'xsd:' + local_name
+    return None
+
+
+def _local_name(name):
+    """Remove any namespace prefix, or namespace in `{namespace}name` form, from a name."""
+    return name.rpartition('}')[2].rpartition(':')[2]
+
+
+def _max_occurs(declaration):
+    """Determine the `maxOccurs` of a declaration, where `None` is unbounded."""
+    max_occurs = declaration.get('maxOccurs', '1')
+    return None if max_occurs == 'unbounded' else int(max_occurs)
+
+
+def _min_occurs(declaration):
+    """Determine the `minOccurs` of a declaration."""
+    return int(declaration.get('minOccurs', '1'))
+
+
+def _xsd(name):
+    """Return the name of an XSD element in `{namespace}name` form."""
+    return '{{{0}}}{1}'.format(XSD_NAMESPACE, name)
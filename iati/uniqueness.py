@@ -0,0 +1,217 @@
+"""A module containing functionality to check that values are unique across many Datasets and files.
+
+A `unique` Rule checks that values are unique within each of its context elements. Some values, such as `iati-identifier`, must instead be unique across every file that is published.
+
+A UniquenessIndex records each value matched by a `unique` Rule, along with where it was found, in an SQLite database on disk. This allows repeated values to be located across any number of files without holding every value in memory.
+
+Todo:
+    Consider whether the index should be able to hold values for multiple Rules.
+
+"""
+import itertools
+import os
+import re
+import sqlite3
+import tempfile
+from lxml import etree
+import iati.rulesets
+import iati.utilities
+
+
+_STREAMABLE_CONTEXT = re.compile(r'//([A-Za-z_][\w.\-]*)')
+"""A regex matching a Rule context that selects every element with a given name, capturing that name. Files may be streamed when a Rule has such a context."""
+
+_NON_DOWNWARD_PATH = re.compile(r'(?:^|[\[(,|=<>!+\s])\s*/|\.\.|\b(?:ancestor|ancestor-or-self|parent|preceding|preceding-sibling|following|following-sibling)\s*::|\bid\s*\(')
+"""A regex matching a Rule path that may select nodes other than the context element and its descendants, such as an absolute path, or one using a parent, ancestor, sibling or `id()` lookup. Files may only be streamed when no Rule path matches."""
+
+
+class UniquenessIndex:
+    """A disk-backed index of the values matched by a `unique` Rule, used to locate values that are repeated across many Datasets and files.
+
+    Attributes:
+        rule (iati.RuleUnique): The Rule with the `context` and `paths` used to locate values to add to the index.
+        path (str): The location of the SQLite database containing the index.
+
+    Note:
+        Values are compared across every context element in every Dataset or file that is added, rather than within each context element as when a Dataset is checked against the Rule itself.
+
+    Warning:
+        Adding the same Dataset or file more than once will cause every value within it to be reported as repeated.
+
+    """
+
+    def __init__(self, rule, path=None):
+        """Initialise a UniquenessIndex.
+
+        Args:
+            rule (iati.RuleUnique): The Rule that locates values to add to the index.
+            path (str): The location of the SQLite database to store the index in. If the database already exists, values are added to those already indexed. Defaults to a temporary file that is removed when the index is closed.
+
+        Raises:
+            TypeError: When the Rule is not a `unique` Rule.
+
+        """
+        if not isinstance(rule, iati.rulesets.RuleUnique):
+            raise TypeError('A UniquenessIndex must be created for a `unique` Rule, not a {0}.'.format(type(rule).__name__))
+
+        self.rule = rule
+        self._is_temporary = path is None
+
+        if self._is_temporary:
+            file_descriptor, path = tempfile.mkstemp(suffix='.sqlite')
+            os.close(file_descriptor)
+        self.path = path
+
+        self._connection = sqlite3.connect(self.path)
+        # the index can always be rebuilt from the source files, so durability is traded for speed
+        self._connection.execute('PRAGMA synchronous = OFF')
+        self._connection.execute('CREATE TABLE IF NOT EXISTS source (id INTEGER PRIMARY KEY, name TEXT)')
+        self._connection.execute('CREATE TABLE IF NOT EXISTS occurrence (value TEXT NOT NULL, source_id INTEGER NOT NULL REFERENCES source (id), line INTEGER)')
+        self._connection.commit()
+
+    def __enter__(self):
+        """Allow the index to be used as a context manager that closes the index on exit."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Close the index."""
+        self.close()
+
+    def __len__(self):
+        """Return the number of values that have been added to the index."""
+        return self._connection.execute('SELECT COUNT(*) FROM occurrence').fetchone()[0]
+
+    def add_dataset(self, dataset, source=None):
+        """Add the values within a Dataset to the index.
+
+        Args:
+            dataset (iati.Dataset): The Dataset to locate values within.
+            source (str): The name to report for the Dataset when it contains repeated values, such as the path to the file it was loaded from.
+
+        Raises:
+            TypeError: When a Dataset is not given as an argument.
+
+        """
+        try:
+            context_elements = self.rule._find_context_elements(dataset)  # pylint: disable=protected-access
+        except AttributeError:
+            raise TypeError
+
+        self._add_occurrences(self._occurrences_within(context_elements), source)
+
+    def add_file(self, path):
+        """Add the values within an XML file to the index.
+
+        Args:
+            path (str): The path to the file to locate values within. This is reported as the source of any repeated values that it contains.
+
+        Raises:
+            FileNotFoundError: When the specified file does not exist.
+            etree.XMLSyntaxError: When the specified file does not contain valid XML.
+
+        Note:
+            When the Rule context is of the form `//element-name`, the file is streamed so that only one context element is held in memory at a time. Otherwise, the whole file is loaded as a Dataset.
+            The whole file is also loaded where a Rule path may look outside the context element, such as at its parent or siblings, since these are discarded or not yet parsed while streaming.
+
+        """
+        streamable_context = _STREAMABLE_CONTEXT.fullmatch(self.rule.context)
+        if streamable_context is None or any(_NON_DOWNWARD_PATH.search(rule_path) for rule_path in self.rule.paths):
+            self.add_dataset(iati.utilities.load_as_dataset(path), path)
+            return
+
+        context_elements = _stream_elements_called(path, streamable_context.group(1))
+        self._add_occurrences(self._occurrences_within(context_elements), path)
+
+    def close(self):
+        """Close the index, removing the database if it is temporary."""
+        self._connection.close()
+        if self._is_temporary:
+            os.remove(self.path)
+
+    def collisions(self):
+        """Locate the values that have been found more than once.
+
+        Yields:
+            tuple: A value that has been found more than once, followed by a list of `(source, line)` tuples stating where it was found. Values are given in sorted order, with the places each was found in the order they were added to the index.
+
+        Note:
+            Values are streamed from disk, so the collisions are not all held in memory at once.
+
+        """
+        self._connection.execute('CREATE INDEX IF NOT EXISTS occurrence_value ON occurrence (value)')
+        self._connection.commit()
+
+        occurrences_of_repeated_values = self._connection.execute(
+            'SELECT occurrence.value, source.name, occurrence.line FROM occurrence '
+            'JOIN (SELECT value FROM occurrence GROUP BY value HAVING COUNT(*) > 1) AS repeated ON occurrence.value = repeated.value '
+            'JOIN source ON occurrence.source_id = source.id '
+            'ORDER BY occurrence.value, occurrence.rowid'
+        )
+        for value, occurrences in itertools.groupby(occurrences_of_repeated_values, key=lambda occurrence: occurrence[0]):
+            yield value, [(source, line) for _, source, line in occurrences]
+
+    def _add_occurrences(self, occurrences, source):
+        """Add values from a single source to the index.
+
+        Args:
+            occurrences (iterable of tuple): `(value, line)` tuples to add. These are inserted as they are generated.
+            source (str): The name to record as the source of the values.
+
+        Note:
+            Sources are stored separately from values so that the name of each source is only stored once.
+
+        """
+        source_id = self._connection.execute('INSERT INTO source (name) VALUES (?)', (source,)).lastrowid
+        self._connection.executemany('INSERT INTO occurrence (value, source_id, line) VALUES (?, ?, ?)', ((value, source_id, line) for value, line in occurrences))
+        self._connection.commit()
+
+    def _occurrences_within(self, context_elements):
+        """Locate the values matched by the Rule within some context elements.
+
+        Args:
+            context_elements (iterable of etree._Element): The XML Elements to locate values within.
+
+        Yields:
+            tuple: A `(value, line)` tuple for each value found. `line` is the line number of the element containing the value.
+
+        Note:
+            Text is extracted in the same manner as when checking against the Rule, so elements without text have a value of an empty string.
+
+        """
+        compiled_paths = [etree.XPath(path) for path in sorted(set(self.rule.paths))]
+
+        for context_element in context_elements:
+            for compiled_path in compiled_paths:
+                for result in compiled_path(context_element):
+                    if isinstance(result, str):
+                        value = str(result)
+                        containing_element = result.getparent()
+                    else:
+                        value = result.text
+                        containing_element = result
+
+                    line = None if containing_element is None else containing_element.sourceline
+                    yield ('' if value is None else value), line
+
+
+def _stream_elements_called(path, element_name):
+    """Stream the elements with a given name from an XML file, discarding each once it has been used.
+
+    Args:
+        path (str): The path to the XML file.
+        element_name (str): The name of the elements to locate.
+
+    Yields:
+        etree._Element: Each element with the given name, once its end tag has been parsed.
+
+    Warning:
+        Each element is cleared once the next element is requested. This means elements with the specified name that are nested within one another will not be complete.
+
+    """
+    for _, element in etree.iterparse(path, events=('end',), tag=element_name):
+        yield element
+
+        # remove the element and anything before it so that memory use does not grow with the size of the file
+        element.clear()
+        while element.getprevious() is not None:
+            del element.getparent()[0]
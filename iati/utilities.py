@@ -9,12 +9,26 @@ Example:
         dataset = iati.utilities.load_as_dataset(path)
 
 """
+import functools
 import logging
-import os
+import re
+import sys
+from datetime import datetime
 from io import StringIO
-import chardet
 from lxml import etree
 import iati
+import iati.bundle
+import iati.logs
+
+
+_XSD_DATE_PATTERN = re.compile(r'([0-9]{4})-([0-9]{2})-([0-9]{2})([+-]([01][0-9]|2[0-3]):[0-5][0-9]|Z)?')
+"""A compiled regex to match a zero-padded `xsd:date` string, with an optional timezone."""
+
+_XSD_DATETIME_PATTERN = re.compile(r'([0-9]{4})-([0-9]{2})-([0-9]{2})T([01][0-9]|2[0-3]):([0-5][0-9]):([0-5][0-9])(\.[0-9]+)?([+-]([01][0-9]|2[0-3]):[0-5][0-9]|Z)?')
+"""A compiled regex to match a zero-padded `xsd:dateTime` string, with an optional timezone."""
+
+_STACKLEVEL_SUPPORTED = sys.version_info >= (3, 8)
+"""Whether the Python `logging` module can attribute a record to a frame further up the stack than the one that logs it."""
 
 
 def add_namespace(tree, new_ns_name, new_ns_uri):
@@ -137,6 +151,82 @@ def convert_xml_to_tree(xml):
         raise TypeError(msg)
 
 
+@functools.lru_cache(maxsize=4096)
+def convert_xsd_date_to_datetime(date_str):
+    """Convert an `xsd:date` string into a datetime.
+
+    Args:
+        date_str (str): A zero-padded `YYYY-MM-DD` date string. This may be followed by a timezone in the format `Z`, `+hh:mm` or `-hh:mm`.
+
+    Returns:
+        datetime.datetime: The start of the specified day. Any timezone is ignored.
+
+    Raises:
+        TypeError: When `date_str` is not a string.
+        ValueError: When `date_str` is not in the permitted format, or is not a real date.
+
+    Note:
+        Though technically permitted, any dates with a leading '-' character are almost certainly incorrect and are therefore not permitted.
+
+        Results are cached since the same dates tend to be repeated many times within a Dataset.
+
+    """
+    match = _XSD_DATE_PATTERN.fullmatch(date_str)
+    if match is None:
+        raise ValueError('{0} is not a permitted xsd:date value.'.format(date_str))
+
+    return datetime(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+
+
+@functools.lru_cache(maxsize=4096)
+def convert_xsd_datetime_to_datetime(datetime_str):
+    """Convert an `xsd:dateTime` string into a datetime.
+
+    Args:
+        datetime_str (str): A zero-padded `YYYY-MM-DDThh:mm:ss` string, optionally with fractional seconds. This may be followed by a timezone in the format `Z`, `+hh:mm` or `-hh:mm`.
+
+    Returns:
+        datetime.datetime: The specified date and time. Any timezone is ignored. Fractional seconds are truncated to microseconds.
+
+    Raises:
+        TypeError: When `datetime_str` is not a string.
+        ValueError: When `datetime_str` is not in the permitted format, or is not a real date and time.
+
+    """
+    match = _XSD_DATETIME_PATTERN.fullmatch(datetime_str)
+    if match is None:
+        raise ValueError('{0} is not a permitted xsd:dateTime value.'.format(datetime_str))
+
+    microsecond = int(match.group(7)[1:7].ljust(6, '0')) if match.group(7) else 0
+
+    return datetime(*[int(match.group(idx)) for idx in range(1, 7)], microsecond=microsecond)
+
+
+def convert_xsd_dates_to_datetime64(date_strs):
+    """Convert a column of `xsd:date` strings into a NumPy array for vectorised comparison.
+
+    Args:
+        date_strs (iterable of str): The `xsd:date` strings to convert. Empty strings and `None` represent missing values.
+
+    Returns:
+        numpy.ndarray: An array with the `datetime64[D]` dtype. Missing values are `NaT`.
+
+    Raises:
+        ImportError: When NumPy is not installed.
+        TypeError: When a value is not a string.
+        ValueError: When a value is not in the permitted `xsd:date` format, or is not a real date.
+
+    Note:
+        NumPy is not a dependency of pyIATI. It must be installed separately to use this function.
+
+    """
+    import numpy  # pylint: disable=import-error
+
+    dates = [convert_xsd_date_to_datetime(date_str) if date_str else None for date_str in date_strs]
+
+    return numpy.array(dates, dtype='datetime64[D]')
+
+
 def dict_raise_on_duplicates(ordered_pairs):
     """Reject duplicate keys in a dictionary.
 
@@ -177,10 +267,17 @@ def load_as_bytes(path):
     Raises:
         FileNotFoundError: When a file at the specified path does not exist.
 
+    Note:
+        Resources within the current bundle are read from the bundle rather than from the file system. See `iati.bundle`.
+
     Todo:
         Ensure all reasonably possible OSErrors are documented here and in functions that call this.
 
     """
+    data = iati.bundle.read_resource(path)
+    if data is not None:
+        return data
+
     with open(path, 'rb') as file_to_load:
         data = file_to_load.read()
 
@@ -230,6 +327,8 @@ def load_as_string(path):
     except UnicodeDecodeError:
         # the file was not UTF-8, so perform a (slow) test to detect encoding
         # only use the first section of the file since this is generally enough and prevents big files taking ages
+        import chardet  # imported on first use since it is slow to import
+
         detected_info = chardet.detect(loaded_bytes[:25000])
         try:
             loaded_str = loaded_bytes.decode(detected_info['encoding'])
@@ -251,6 +350,9 @@ def load_as_tree(path):
     Raises:
         OSError: An error occurred accessing the specified file.
 
+    Note:
+        Resources within the current bundle are parsed from the bundle rather than from the file system, as are any documents they include. See `iati.bundle`.
+
     Warning:
         There should be errors raised when the request is to load something that is not valid XML.
 
@@ -260,6 +362,10 @@ def load_as_tree(path):
         Handle when the specified file can be accessed without issue, but it does not contain valid XML. Pending `version-independent` test data folder addition - see #218.
 
     """
+    doc = iati.bundle.parse_resource(path)
+    if doc is not None:
+        return doc
+
     try:
         doc = etree.parse(path)
         return doc
@@ -276,23 +382,16 @@ def log(lvl, msg, *args, **kwargs):
         *args
         **kwargs
 
-    Warning:
-        Potentially too tightly coupled to the Python `logging` module.
-
-        Logging needs to be defined in a much more useful and configurable manner.
+    Note:
+        The logging subsystem is configured the first time that a message is logged. See `iati.logs` for how records are written, and how to route or disable them.
 
-        Logging should not fill up logfiles at lightspeed unless this is specifically desired.
+        From Python 3.8, the source location of the record is that of the code that called this function.
 
-        Outputs should be more easily parsable.
+    Warning:
+        Potentially too tightly coupled to the Python `logging` module.
 
     """
-    logging.basicConfig(
-        filename=os.path.join(iati.constants.LOG_FILE_NAME),
-        format='%(asctime)s %(levelname)s:%(name)s: %(message)s %(stack_info)s',
-        level=logging.DEBUG
-    )
-    logger = logging.getLogger(iati.constants.LOGGER_NAME)
-    logger.log(lvl, msg, *args, **kwargs)
+    iati.logs.get_logger().log(lvl, msg, *args, **_from_caller(kwargs))
 
 
 def log_error(msg, *args, **kwargs):
@@ -307,7 +406,7 @@ def log_error(msg, *args, **kwargs):
         Potentially too tightly coupled to the Python `logging` module.
 
     """
-    log(logging.ERROR, msg, *args, **kwargs)
+    log(logging.ERROR, msg, *args, **_from_caller(kwargs))
 
 
 def log_exception(msg, *args, **kwargs):
@@ -324,7 +423,7 @@ def log_exception(msg, *args, **kwargs):
         Potentially too tightly coupled to the Python `logging` module.
 
     """
-    log(logging.ERROR, msg, exc_info=True, *args, **kwargs)
+    log(logging.ERROR, msg, exc_info=True, *args, **_from_caller(kwargs))
 
 
 def log_warning(msg, *args, **kwargs):
@@ -339,4 +438,20 @@ def log_warning(msg, *args, **kwargs):
         Potentially too tightly coupled to the Python `logging` module.
 
     """
-    log(logging.WARN, msg, *args, **kwargs)
+    log(logging.WARN, msg, *args, **_from_caller(kwargs))
+
+
+def _from_caller(log_kwargs):
+    """Attribute a record to the caller of the function that is logging it, rather than to that function.
+
+    Args:
+        log_kwargs (dict): The keyword arguments to pass on to the logging function.
+
+    Returns:
+        dict: The keyword arguments, with the `stacklevel` increased by one where the Python `logging` module supports it.
+
+    """
+    if _STACKLEVEL_SUPPORTED:
+        log_kwargs['stacklevel'] = log_kwargs.get('stacklevel', 1) + 1
+
+    return log_kwargs
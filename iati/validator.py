@@ -1,10 +1,15 @@
 """A module containing validation functionality."""
 
 import sys
+from datetime import datetime
 from lxml import etree
-import yaml
+import iati.data
 import iati.default
+import iati.exceptions
 import iati.resources
+import iati.uniqueness
+import iati.utilities
+import iati.version
 
 
 class ValidationError:
@@ -390,9 +395,10 @@ def _check_codes(dataset, codelist):
         parent_el_xpath, last_xpath_section = mapping['xpath'].rsplit('/', 1)
 
         located_codes = _extract_codes(dataset, parent_el_xpath, last_xpath_section, mapping['condition'])
+        invalid_codes = codelist.invalid_values(code for (code, _) in located_codes)
 
         for (code, line_number) in located_codes:  # `line_number` used via `locals()` # pylint: disable=unused-variable
-            if code not in codelist.codes:
+            if code in invalid_codes:
                 if last_xpath_section.startswith('@'):
                     attr_name = last_xpath_section[1:]  # used via `locals()`  # pylint: disable=unused-variable
                     error = ValidationError(err_name_prefix + '-code-not-on-codelist', locals())
@@ -512,12 +518,13 @@ def _check_is_xml(maybe_xml):
     return error_log
 
 
-def _check_rules(dataset, ruleset):
+def _check_rules(dataset, ruleset, now=None):
     """Determine whether a given Dataset conforms with a provided Ruleset.
 
     Args:
         dataset (iati.data.Dataset): The Dataset to check Ruleset conformance with.
         ruleset (iati.code.Ruleset): The Ruleset to check conformance with.
+        now (datetime.datetime): The date and time to treat as the present for all Rules. Defaults to the time at which the check starts.
 
     Returns:
         iati.validator.ValidationErrorLog: A log of the errors that occurred.
@@ -526,8 +533,10 @@ def _check_rules(dataset, ruleset):
     error_log = ValidationErrorLog()
     error_found = False
 
-    for rule in ruleset.rules:
-        validation_status = rule.is_valid_for(dataset)
+    if now is None:
+        now = datetime.today()
+
+    for rule, validation_status in ruleset.results_for(dataset, now):
         if validation_status is None:
             # A result of `None` signifies that a rule was skipped.
             error = ValidationError('warn-rule-skipped', locals())
@@ -559,8 +568,38 @@ def _check_ruleset_conformance(dataset, schema):
     """
     error_log = ValidationErrorLog()
 
+    # `NOW` is fixed for the whole validation run so that all Rules see the same present
+    now = datetime.today()
+
     for ruleset in schema.rulesets:
-        error_log.extend(_check_rules(dataset, ruleset))
+        error_log.extend(_check_rules(dataset, ruleset, now))
+
+    return error_log
+
+
+def _check_uniqueness_across_files(file_paths, rule, index_path=None):
+    """Check whether the values matched by a `unique` Rule are unique across a number of files.
+
+    Args:
+        file_paths (iterable of str): The paths to the files to check.
+        rule (iati.RuleUnique): The Rule that locates the values that must be unique.
+        index_path (str): The location of the SQLite database to store the index of values in. Defaults to a temporary file.
+
+    Returns:
+        iati.validator.ValidationErrorLog: A log containing an error for each place that a value is repeated.
+
+    """
+    error_log = ValidationErrorLog()
+
+    with iati.uniqueness.UniquenessIndex(rule, index_path) as index:
+        for file_path in file_paths:
+            index.add_file(file_path)
+
+        for value, occurrences in index.collisions():
+            first_source, first_line = occurrences[0]
+            for source, line_number in occurrences[1:]:
+                error = ValidationError('err-rule-unique-across-files-conformance-fail', locals())
+                error_log.add(error)
 
     return error_log
 
@@ -726,6 +765,8 @@ def get_error_codes():
         Raise an error when there is a problem with non-base_exception-related errors.
 
     """
+    import yaml  # imported on first use since it is slow to import
+
     err_codes_str = iati.utilities.load_as_string(iati.resources.create_lib_data_path('validation_err_codes.yaml'))
     err_codes_list_of_dict = yaml.safe_load(err_codes_str)
     # yaml parses the values into a list of dicts, so they need combining into one
@@ -830,3 +871,24 @@ def validate_is_xml(maybe_xml):
 
     """
     return _check_is_xml(maybe_xml)
+
+
+def validate_uniqueness_across_files(file_paths, rule, index_path=None):
+    """Check whether the values matched by a `unique` Rule are unique across a number of files, such as `iati-identifier` values across every file from a publisher.
+
+    Args:
+        file_paths (iterable of str): The paths to the files to check.
+        rule (iati.RuleUnique): The Rule that locates the values that must be unique.
+        index_path (str): The location of the SQLite database to store the index of values in. Defaults to a temporary file that is removed once the check is complete.
+
+    Returns:
+        iati.validator.ValidationErrorLog: A log of the errors that occurred. There is an error for each place that a value is found after the first.
+
+    Raises:
+        TypeError: When the Rule is not a `unique` Rule.
+
+    Note:
+        Values are indexed on disk and files are streamed where the Rule context allows, so this scales to more values than may be held in memory. See `iati.uniqueness.UniquenessIndex` for details.
+
+    """
+    return _check_uniqueness_across_files(file_paths, rule, index_path)
@@ -232,6 +232,9 @@ STANDARD_VERSIONS_MINOR = STANDARD_VERSIONS
 """The minor versions of the IATI Standard."""
 
 
+_INTERNED_VERSIONS = {tuple(version): version for version in STANDARD_VERSIONS}
+"""Shared Version instances, keyed by their components. Each version of the Standard is represented by the Version within `STANDARD_VERSIONS`. See `_intern()`."""
+
 STANDARD_VERSION_ANY = '*'
 """A value to represent that something is applicable to all versions of the IATI Standard - it is version independent.
 
@@ -388,6 +391,36 @@ def normalise_decimals(input_func):
     return wrap_normalise_decimals
 
 
+def normalise_fully_supported_version(input_func):
+    """Decorate function by converting an input version into a fully supported Decimal Version, raising an error if this is not possible.
+
+    This is equivalent to applying `decimalise_integer`, `normalise_decimals` and `allow_fully_supported_version` in turn, though the normalised version is determined once for each distinct input.
+
+    Args:
+        input_func (function): The function to decorate. Takes the `version` argument as its first argument.
+
+    Returns:
+        function: The input function, wrapped such that it is called with a shared, fully supported iati.Version representing a Decimal Version.
+
+    """
+    return _normalise_and_check_version(input_func, _is_fully_supported, 'fully supported')
+
+
+def normalise_known_version(input_func):
+    """Decorate function by converting an input version into a Decimal Version that pyIATI knows exists, raising an error if this is not possible.
+
+    This is equivalent to applying `decimalise_integer`, `normalise_decimals` and `allow_known_version` in turn, though the normalised version is determined once for each distinct input.
+
+    Args:
+        input_func (function): The function to decorate. Takes the `version` argument as its first argument.
+
+    Returns:
+        function: The input function, wrapped such that it is called with a shared iati.Version representing a real Decimal Version.
+
+    """
+    return _normalise_and_check_version(input_func, _is_known, 'known')
+
+
 def versions_for_integer(integer):
     """Return a list containing the supported versions for the input integer version.
 
@@ -452,6 +485,22 @@ def _extract_version_arg(arg_list):
     return version
 
 
+def _intern(version):
+    """Return the shared Version instance with the same components as a Version.
+
+    Args:
+        version (iati.Version): The Version to intern.
+
+    Returns:
+        iati.Version: The shared Version instance. This is the given Version where no Version with the same components has been interned.
+
+    Warning:
+        Shared Versions must not be modified.
+
+    """
+    return _INTERNED_VERSIONS.setdefault(tuple(version), version)
+
+
 def _is_fully_supported(version):
     """Detect whether a Version is fully supported by pyIATI.
 
@@ -478,6 +527,50 @@ def _is_known(version):
     return version in iati.version.STANDARD_VERSIONS
 
 
+def _normalise_and_check_version(input_func, check_func, description):
+    """Wrap a function such that its version argument is normalised and checked, remembering the result for each distinct input.
+
+    Args:
+        input_func (function): The function to decorate. Takes the `version` argument as its first argument.
+        check_func (function): A function that takes a normalised version, and returns whether it is permitted.
+        description (str): A description of the permitted versions, for use in error messages.
+
+    Returns:
+        function: The input function, wrapped such that it is called with a shared iati.Version that is permitted by `check_func`.
+
+    Note:
+        Only versions that are permitted are remembered. Distinct inputs are told apart by their type as well as their value, since `True == 1`.
+
+    """
+    normalised_versions = dict()
+
+    def wrap_normalise_and_check_version(*args, **kwargs):
+        """Act as a wrapper to convert an input version number into a normalised Decimal Version, and check that it is permitted.
+
+        Raises:
+            ValueError: If the normalised version is not permitted by `check_func`.
+
+        """
+        version = _extract_version_arg(args)
+        key = _version_input_key(version)
+
+        try:
+            normalised_version = normalised_versions[key]
+        except KeyError:
+            normalised_version = _normalise_decimal_version(_decimalise_integer(version))
+
+            if not check_func(normalised_version):
+                raise ValueError('{0} is not a {1} version of the IATI Standard in a normalised representation.'.format(repr(normalised_version), description))
+
+            normalised_version = _intern(normalised_version)
+            if key is not None:
+                normalised_versions[key] = normalised_version
+
+        return input_func(normalised_version, *args[1:], **kwargs)
+
+    return wrap_normalise_and_check_version
+
+
 def _normalise_decimal_version(version):
     """Normalise the format of Decimal Versions.
 
@@ -499,6 +592,26 @@ def _normalise_decimal_version(version):
     return version
 
 
+def _version_input_key(version):
+    """Determine a key that identifies a value specified to represent a Version.
+
+    Args:
+        version (Any): The value to identify.
+
+    Returns:
+        tuple or None: The type of the value, along with its value. Versions are identified by their components, since they may be modified. `None` for values that cannot be used as keys.
+
+    """
+    key = (Version,) + tuple(version) if isinstance(version, Version) else (type(version), version)
+
+    try:
+        hash(key)
+    except TypeError:
+        return None
+
+    return key
+
+
 def _prevent_non_version_representations(version):
     """Detect whether a value specified to be a Version could possibly represent a Version.
 
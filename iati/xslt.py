@@ -0,0 +1,379 @@
+"""A module containing functionality to compile Rulesets into XSLT stylesheets.
+
+Checking a Dataset against a Ruleset normally evaluates each Rule in turn in Python. A CompiledRuleset instead compiles the Rules into a single XSLT stylesheet, which libxslt applies to the Dataset in one native pass.
+The compact result document that this produces is then converted back into the results that the Rules themselves would give.
+
+The result for each Rule is built up as a string with a character for each context element:
+
+* `T` - The context element is valid against the Rule.
+* `F` - The context element is not valid against the Rule.
+* `N` - The Rule is skipped for the context element, such as when there are no values to sum.
+* `E` - The context element contains a value that the Rule cannot recover from. The Rule raises a ValueError.
+* `P` - The context element contains values that XSLT cannot check in the same way as Python, such as decimal values to sum exactly. The Rule is checked in Python instead.
+* `C` - The condition for the Rule is met, so it is skipped for this and all following context elements.
+
+Note:
+    Types of Rule that XSLT 1.0 is unable to express, such as `date_order` Rules, are always checked in Python.
+
+"""
+import decimal
+from lxml import etree
+import iati.rulesets
+
+
+_XSL_NAMESPACE = 'http://www.w3.org/1999/XSL/Transform'
+"""The namespace that XSLT instructions are specified within."""
+
+_REGEXP_NAMESPACE = 'http://exslt.org/regular-expressions'
+"""The namespace of the EXSLT regular expression extension functions, which lxml implements using Python regular expressions."""
+
+_VALUE_OF_NODE = 'string(self::*/node()[1][self::text()] | self::node()[not(self::*)])'
+"""An XPath expression giving the value of the current node in the same way as `Rule._extract_text_from_element_or_attribute()`. This is the text before the first child of an element, or the value of an attribute or text node."""
+
+_MAX_EXACT_INTEGER = 2 ** 53
+"""The magnitude below which every integer is exactly representable as a floating point number."""
+
+
+class CompiledRuleset(iati.rulesets.Ruleset):
+    """Representation of a Ruleset that is checked by applying a single XSLT stylesheet to a Dataset.
+
+    Attributes:
+        stylesheet (etree._ElementTree): The XSLT stylesheet that the Rules are compiled into.
+
+    Warning:
+        The Rules are compiled when the CompiledRuleset is initialised. Changes made to `rules` after this point are not reflected in the stylesheet.
+
+    """
+
+    def __init__(self, ruleset):  # pylint: disable=super-init-not-called
+        """Compile a Ruleset.
+
+        Args:
+            ruleset (iati.Ruleset): The Ruleset to compile.
+
+        Note:
+            The Rules are taken from a Ruleset that has already been validated, so no Ruleset string is parsed.
+
+        """
+        self.rules = set(ruleset.rules)
+        self.statistics = ruleset.statistics
+
+        self._ordered_rules = list(self.rules)
+        self.stylesheet = _compile_rules(self._ordered_rules)
+        self._transform = etree.XSLT(self.stylesheet)
+
+    def is_valid_for(self, dataset, now=None, record_statistics=False):
+        """Validate a Dataset against the Ruleset.
+
+        Args:
+            dataset (iati.Dataset): A Dataset to be checked for validity against the Ruleset.
+            now (datetime.datetime): The date and time to treat as the present for Rules that are checked in Python. Defaults to the time at which the check starts.
+            record_statistics (bool): Whether the time taken to check each Rule that is checked in Python, and whether the Dataset is valid against it, is recorded in `statistics`.
+
+        Returns:
+            bool:
+                `True` when the Dataset is valid against the Ruleset.
+
+                `False` when part or all of the Dataset is not valid against the Ruleset.
+
+        Note:
+            Rules checked by the compiled stylesheet are checked together in a single pass, so their statistics are not recorded.
+
+        """
+        try:
+            return all(result is not False for _, result in self.results_for(dataset, now, record_statistics))
+        except ValueError:
+            return False
+
+    def results_for(self, dataset, now=None, record_statistics=False):
+        """Check a Dataset against each Rule in the Ruleset by applying the compiled stylesheet.
+
+        Args:
+            dataset (iati.Dataset): A Dataset to be checked for validity against the Ruleset.
+            now (datetime.datetime): The date and time to treat as the present for Rules that are checked in Python. Defaults to the time at which the check starts.
+            record_statistics (bool): Whether the time taken to check each Rule that is checked in Python, and whether the Dataset is valid against it, is recorded in `statistics`.
+
+        Returns:
+            list of tuple: A `(rule, result)` tuple for each Rule in the Ruleset, where `result` is the value that `rule.is_valid_for()` would return for the Dataset.
+
+        Raises:
+            TypeError: When a Dataset is not given as an argument.
+            ValueError: When a Rule encounters a completely incorrect value that it is unable to recover from.
+
+        Note:
+            Rules checked by the compiled stylesheet are checked together in a single pass, so their statistics are not recorded.
+
+        """
+        try:
+            xml_tree = dataset.xml_tree
+        except AttributeError:
+            raise TypeError
+
+        compiled_results = {int(result.get('index')): result for result in self._transform(xml_tree).getroot()}
+
+        queries = None
+        results = list()
+        for index, rule in enumerate(self._ordered_rules):
+            try:
+                result = _interpret_result(rule, compiled_results.get(index))
+            except _CheckInPython:
+                if queries is None:
+                    queries = iati.rulesets._DatasetQueries(dataset)  # pylint: disable=protected-access
+                result = self._timed_result_for(rule, queries, now, raise_errors=True, record_statistics=record_statistics)
+            results.append((rule, result))
+
+        return results
+
+
+class _CheckInPython(Exception):
+    """An exception raised when the result of a Rule must be determined in Python rather than by the compiled stylesheet."""
+
+
+def _compile_rules(rules):
+    """Compile Rules into an XSLT stylesheet.
+
+    Args:
+        rules (list of iati.Rule): The Rules to compile.
+
+    Returns:
+        etree._ElementTree: An XSLT stylesheet that outputs a `results` document containing a `rule` element for each Rule that can be compiled. The `index` of each `rule` is the position of the Rule in `rules`.
+
+    """
+    stylesheet = etree.Element(_xsl('stylesheet'), version='1.0', nsmap={'xsl': _XSL_NAMESPACE, 'regexp': _REGEXP_NAMESPACE})
+    stylesheet.set('exclude-result-prefixes', 'regexp')
+    etree.SubElement(stylesheet, _xsl('output'), method='xml', indent='no')
+
+    # relative contexts are evaluated from the root element, as with `Rule._find_context_elements()`
+    root_template = etree.SubElement(stylesheet, _xsl('template'), match='/*')
+    results = etree.Element('results')
+
+    for index, rule in enumerate(rules):
+        try:
+            compile_check = _CHECK_COMPILERS[rule.name]
+        except KeyError:
+            continue
+
+        template_name = 'rule-{0}'.format(index)
+        check_template = etree.SubElement(stylesheet, _xsl('template'), name=template_name)
+        compile_check(rule, check_template)
+
+        # build the string containing a character for each context element
+        outcomes = etree.SubElement(root_template, _xsl('variable'), name=template_name)
+        check_context = etree.SubElement(outcomes, _xsl('for-each'), select=rule.context)
+        if hasattr(rule, 'condition'):
+            choose = etree.SubElement(check_context, _xsl('choose'))
+            _add_outcome(choose, 'boolean({0})'.format(rule.condition), 'C')
+            check_context = etree.SubElement(choose, _xsl('otherwise'))
+        etree.SubElement(check_context, _xsl('call-template'), name=template_name)
+
+        # the Rule is skipped from the first context element that meets the condition onwards, so only the characters before that point determine the result
+        result = etree.SubElement(results, 'rule', index=str(index))
+        result.set('first', '{{substring(translate(substring-before(concat(${0}, "C"), "C"), "T", ""), 1, 1)}}'.format(template_name))
+        result.set('found', '{{string-length(${0}) > 0}}'.format(template_name))
+        result.set('skipped', '{{contains(${0}, "C")}}'.format(template_name))
+
+    # the results are output once every variable they refer to has been declared
+    root_template.append(results)
+
+    return etree.ElementTree(stylesheet)
+
+
+def _interpret_result(rule, result):
+    """Convert the result of a compiled Rule into the result that the Rule would give.
+
+    Args:
+        rule (iati.Rule): The Rule that was compiled.
+        result (etree._Element): The `rule` element output by the stylesheet for the Rule.
+
+    Returns:
+        bool or None: The value that `rule.is_valid_for()` would return.
+
+    Raises:
+        ValueError: When the Rule would raise a ValueError.
+        _CheckInPython: When the Rule was not compiled, or must be checked in Python to determine its result.
+
+    """
+    if result is None:
+        raise _CheckInPython
+
+    first = result.get('first')
+    if first == 'P':
+        raise _CheckInPython
+    elif first == 'E':
+        raise ValueError
+
+    if result.get('found') == 'false' or first == 'N':
+        is_valid = None
+    elif first == 'F':
+        is_valid = False
+    elif result.get('skipped') == 'true':
+        is_valid = None
+    else:
+        is_valid = True
+
+    # `atleast_one` Rules invert the result of checking each context element
+    if rule.name == 'atleast_one' and is_valid is not None:
+        return not is_valid
+    return is_valid
+
+
+def _xsl(name):
+    """Return the qualified name of an XSLT instruction.
+
+    Args:
+        name (str): The local name of the instruction.
+
+    Returns:
+        str: The name of the instruction within the XSLT namespace.
+
+    """
+    return '{{{0}}}{1}'.format(_XSL_NAMESPACE, name)
+
+
+def _xpath_string_literal(value):
+    """Create an XPath expression that evaluates to a given string.
+
+    Args:
+        value (str): The string to represent.
+
+    Returns:
+        str: An XPath string literal, or a call to `concat()` when the string contains both types of quote.
+
+    """
+    if "'" not in value:
+        return "'{0}'".format(value)
+    elif '"' not in value:
+        return '"{0}"'.format(value)
+    return 'concat({0})'.format(', "\'", '.join("'{0}'".format(part) for part in value.split("'")))
+
+
+def _union_of(paths):
+    """Create an XPath expression that selects the nodes located by any of a number of paths.
+
+    Args:
+        paths (iterable of str): XPath expressions that locate nodes.
+
+    Returns:
+        str: An XPath expression for the union of the nodes located by each path.
+
+    """
+    return '({0})'.format(' | '.join('({0})'.format(path) for path in paths))
+
+
+def _add_outcome(choose, test, outcome):
+    """Add a branch to an `xsl:choose` that outputs a character when a test is met.
+
+    Args:
+        choose (etree._Element): The `xsl:choose` element to add to.
+        test (str): The XPath test for the branch. `None` adds the `xsl:otherwise` branch.
+        outcome (str): The character to output.
+
+    """
+    if test is None:
+        branch = etree.SubElement(choose, _xsl('otherwise'))
+    else:
+        branch = etree.SubElement(choose, _xsl('when'), test=test)
+    branch.text = outcome
+
+
+def _add_pass_fail(template, failure_test):
+    """Add a check that outputs `F` when a test is met, and `T` otherwise.
+
+    Args:
+        template (etree._Element): The template to add the check to.
+        failure_test (str): The XPath test for the context element not being valid against the Rule.
+
+    """
+    choose = etree.SubElement(template, _xsl('choose'))
+    _add_outcome(choose, failure_test, 'F')
+    _add_outcome(choose, None, 'T')
+
+
+def _compile_atleast_one(rule, template):
+    """Compile the check for an `atleast_one` Rule, which outputs `F` when any of the paths is found."""
+    _add_pass_fail(template, ' or '.join('boolean({0})'.format(path) for path in rule.paths))
+
+
+def _compile_dependent(rule, template):
+    """Compile the check for a `dependent` Rule, which fails when some, but not all, of the paths are found."""
+    unique_paths = sorted(set(rule.paths))
+    found_paths = ' + '.join('number(boolean({0}))'.format(path) for path in unique_paths)
+    _add_pass_fail(template, '({0}) != 0 and ({0}) != {1}'.format(found_paths, len(unique_paths)))
+
+
+def _compile_no_more_than_one(rule, template):
+    """Compile the check for a `no_more_than_one` Rule, which fails when more than one node is found."""
+    _add_pass_fail(template, ' + '.join('count({0})'.format(path) for path in sorted(set(rule.paths))) + ' > 1')
+
+
+def _compile_regex_matches(rule, template):
+    """Compile the check for a `regex_matches` Rule, which fails when any value does not match the regex."""
+    _add_pass_fail(template, '{0}[not(regexp:test({1}, {2}))]'.format(_union_of(rule.paths), _VALUE_OF_NODE, _xpath_string_literal(rule.regex)))
+
+
+def _compile_regex_no_matches(rule, template):
+    """Compile the check for a `regex_no_matches` Rule, which fails when any value matches the regex."""
+    _add_pass_fail(template, '{0}[regexp:test({1}, {2})]'.format(_union_of(rule.paths), _VALUE_OF_NODE, _xpath_string_literal(rule.regex)))
+
+
+def _compile_startswith(rule, template):
+    """Compile the check for a `startswith` Rule, which outputs `E` unless there is exactly one prefix, and fails when any value does not start with it."""
+    etree.SubElement(template, _xsl('variable'), name='start', select=rule.start)
+    choose = etree.SubElement(template, _xsl('choose'))
+    _add_outcome(choose, 'count($start) != 1', 'E')
+    otherwise = etree.SubElement(choose, _xsl('otherwise'))
+
+    prefix = etree.SubElement(otherwise, _xsl('variable'), name='prefix')
+    for_each_start = etree.SubElement(prefix, _xsl('for-each'), select='$start')
+    etree.SubElement(for_each_start, _xsl('value-of'), select=_VALUE_OF_NODE)
+
+    _add_pass_fail(otherwise, '{0}[not(starts-with({1}, $prefix))]'.format(_union_of(rule.paths), _VALUE_OF_NODE))
+
+
+def _compile_sum(rule, template):
+    """Compile the check for a `sum` Rule.
+
+    Values are summed natively in the same circumstances as `RuleSum`. Where values must be summed exactly using decimal arithmetic, the check outputs `P` so that the Rule is checked in Python.
+
+    """
+    unique_paths = sorted(set(rule.paths))
+    count_values = ' + '.join('count({0})'.format(path) for path in unique_paths)
+    sum_values = ' + '.join('sum({0})'.format(path) for path in unique_paths)
+    count_inexact_values = ' + '.join('count(({0})[{1}])'.format(path, iati.rulesets._INEXACT_SUM_VALUE_PREDICATE) for path in unique_paths)  # pylint: disable=protected-access
+
+    etree.SubElement(template, _xsl('variable'), name='total', select=sum_values)
+    choose = etree.SubElement(template, _xsl('choose'))
+    _add_outcome(choose, '({0}) = 0'.format(count_values), 'N')
+    _add_outcome(choose, '({0}) > {1} or $total != $total or ({2}) > 0'.format(count_values, iati.rulesets._NATIVE_SUM_MAX_VALUES, count_inexact_values), 'P')  # pylint: disable=protected-access
+
+    # a native total is an exactly represented integer, so can only equal a target that is also such an integer
+    target = decimal.Decimal(str(rule.sum))
+    if target == target.to_integral_value() and abs(target) < _MAX_EXACT_INTEGER:
+        _add_outcome(choose, '$total = {0}'.format(int(target)), 'T')
+    _add_outcome(choose, None, 'F')
+
+
+def _compile_unique(rule, template):
+    """Compile the check for a `unique` Rule, which fails when any two values are the same."""
+    etree.SubElement(template, _xsl('variable'), name='values', select=_union_of(sorted(set(rule.paths))))
+
+    duplicates = etree.SubElement(template, _xsl('variable'), name='duplicates')
+    for_each_value = etree.SubElement(duplicates, _xsl('for-each'), select='$values')
+    etree.SubElement(for_each_value, _xsl('variable'), name='value', select=_VALUE_OF_NODE)
+    is_duplicate = etree.SubElement(for_each_value, _xsl('if'), test='$values[generate-id() != generate-id(current())][{0} = $value]'.format(_VALUE_OF_NODE))
+    is_duplicate.text = 'F'
+
+    _add_pass_fail(template, 'string-length($duplicates) > 0')
+
+
+_CHECK_COMPILERS = {
+    'atleast_one': _compile_atleast_one,
+    'dependent': _compile_dependent,
+    'no_more_than_one': _compile_no_more_than_one,
+    'regex_matches': _compile_regex_matches,
+    'regex_no_matches': _compile_regex_no_matches,
+    'startswith': _compile_startswith,
+    'sum': _compile_sum,
+    'unique': _compile_unique
+}
+"""The functions that compile the check for each type of Rule that may be expressed in XSLT. Each adds instructions to a named template that is called with a context element as the current node, and outputs a single character."""